@@ -0,0 +1,212 @@
+import re
+
+import numpy as np
+import pandas as pd
+from asreview import ASReviewData
+
+from asreviewcontrib.datatools.normalize import normalize_texts
+
+# Available block keys. A number can be given after a colon, for example
+# 'title_prefix:8' for the first 8 characters of the title.
+BLOCK_KEYS = ["year", "first_author", "title_prefix"]
+# Default number of characters of the 'title_prefix' block key.
+DEFAULT_TITLE_PREFIX = 8
+# Maximum difference of the years of records in adjacent blocks.
+YEAR_TOLERANCE = 1
+
+YEAR_COLUMNS = ["publication_year", "year"]
+YEAR_REGEX = re.compile(r"(\d{4})")
+
+
+def parse_block_keys(spec: str) -> list[tuple[str, int]]:
+    """Parse a comma separated list of block keys.
+
+    Parameters
+    ----------
+    spec : str
+        Block keys, for example 'year,title_prefix:8'.
+
+    Returns
+    -------
+    list[tuple[str, int]]
+        The names of the block keys and their numbers, or None for keys without a
+        number.
+
+    Raises
+    ------
+    ValueError
+        If a block key is unknown or its number is invalid.
+    """
+    keys = []
+    for part in spec.split(","):
+        name, _, number = part.strip().partition(":")
+        if name not in BLOCK_KEYS:
+            raise ValueError(f"Unknown block key '{name}', choose from {BLOCK_KEYS}.")
+
+        if name == "title_prefix":
+            if not number:
+                number = DEFAULT_TITLE_PREFIX
+            elif not number.isdigit() or int(number) < 1:
+                raise ValueError(f"Invalid number of characters in '{part.strip()}'.")
+            keys.append((name, int(number)))
+        elif number:
+            raise ValueError(f"Block key '{name}' does not take a number.")
+        else:
+            keys.append((name, None))
+    return keys
+
+
+def block_columns(asdata: ASReviewData, spec: str) -> list[str]:
+    """Get the columns of a dataset that are read by block keys.
+
+    Parameters
+    ----------
+    asdata : ASReviewData
+        The data object.
+    spec : str
+        Comma separated block keys, for example 'year,title_prefix:8'.
+
+    Returns
+    -------
+    list[str]
+        The names of the columns in the dataset that the block keys are made from.
+    """
+    columns = []
+    for name, _ in parse_block_keys(spec):
+        if name == "year":
+            candidates = YEAR_COLUMNS
+        elif name == "first_author":
+            candidates = ["authors"]
+        else:
+            candidates = ["title"]
+        # like the block keys, only the first available column is used
+        column = next((c for c in candidates if c in asdata.df.columns), None)
+        if column is not None and column not in columns:
+            columns.append(column)
+    return columns
+
+
+def _years(asdata: ASReviewData) -> np.ndarray:
+    for column in YEAR_COLUMNS:
+        if column in asdata.df.columns:
+            years = asdata.df[column].astype(str).str.extract(YEAR_REGEX)[0]
+            return pd.to_numeric(years, errors="coerce").to_numpy(dtype=float)
+
+    print("Not using year for blocking because there is no such data.")
+    return None
+
+
+def _first_author(authors) -> str:
+    if isinstance(authors, (list, tuple, np.ndarray)):
+        authors = authors[0] if len(authors) else None
+    elif isinstance(authors, str):
+        authors = authors.strip("[]").split(";")[0].split("', '")[0].strip(" '\"")
+    if not isinstance(authors, str):
+        return None
+
+    # the family name comes before the comma, or is the last word
+    if "," in authors:
+        return authors.split(",")[0]
+    return authors.split()[-1] if authors.split() else None
+
+
+def _codes(values: list) -> np.ndarray:
+    codes = pd.factorize(pd.Series(values, dtype=object))[0].astype(float)
+    codes[codes < 0] = np.nan
+    return codes
+
+
+def _first_authors(asdata: ASReviewData) -> np.ndarray:
+    if "authors" not in asdata.df.columns:
+        print("Not using first_author for blocking because there is no such data.")
+        return None
+
+    authors = [_first_author(value) for value in asdata.df["authors"]]
+    return _codes(normalize_texts(authors))
+
+
+def _title_prefixes(asdata: ASReviewData, n_characters: int) -> np.ndarray:
+    titles = normalize_texts(asdata.df["title"])
+    return _codes([None if t is None else t[:n_characters] for t in titles])
+
+
+class Blocks:
+    """Blocks of records that are compared with each other.
+
+    Every block key assigns a value to each record. Two records are in the same or
+    in adjacent blocks if, for every block key, their values differ by at most the
+    tolerance of the key. Records with a missing value for a block key are in all
+    blocks of that key, so no duplicates are missed because of missing data.
+
+    Parameters
+    ----------
+    values : list[np.ndarray]
+        For every block key, the values of the records as a float array, with NaN
+        for missing values.
+    tolerances : list[float]
+        For every block key, the maximum difference of the values of records in
+        adjacent blocks.
+    """
+
+    def __init__(self, values: list[np.ndarray], tolerances: list[float]):
+        self.values = values
+        self.tolerances = tolerances
+
+    @classmethod
+    def from_data(cls, asdata: ASReviewData, spec: str) -> "Blocks":
+        """Assign the records of a dataset to blocks.
+
+        Parameters
+        ----------
+        asdata : ASReviewData
+            The data object.
+        spec : str
+            Comma separated block keys, for example 'year,title_prefix:8'. With
+            'year' the publication year is used, and records with a difference of
+            one year are in adjacent blocks. With 'first_author' the family name of
+            the first author is used, and with 'title_prefix:N' the first N
+            characters of the cleaned title.
+
+        Returns
+        -------
+        Blocks
+            The blocks.
+        """
+        values = []
+        tolerances = []
+        for name, number in parse_block_keys(spec):
+            if name == "year":
+                key_values, tolerance = _years(asdata), YEAR_TOLERANCE
+            elif name == "first_author":
+                key_values, tolerance = _first_authors(asdata), 0
+            else:
+                key_values, tolerance = _title_prefixes(asdata, number), 0
+
+            if key_values is not None:
+                values.append(key_values)
+                tolerances.append(tolerance)
+        return cls(values, tolerances)
+
+    def compatible(self, i: int, rows: np.ndarray) -> np.ndarray:
+        """Check which records are in the same or an adjacent block as a record.
+
+        Parameters
+        ----------
+        i : int
+            Position of the record.
+        rows : np.ndarray
+            Positions of the other records.
+
+        Returns
+        -------
+        np.ndarray
+            Boolean array indicating which of the other records are in the same or
+            an adjacent block.
+        """
+        keep = np.ones(len(rows), dtype=bool)
+        for values, tolerance in zip(self.values, self.tolerances):
+            if np.isnan(values[i]):
+                continue
+            other = values[rows]
+            keep &= np.isnan(other) | (np.abs(other - values[i]) <= tolerance)
+        return keep
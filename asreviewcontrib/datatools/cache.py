@@ -0,0 +1,367 @@
+import hashlib
+import json
+import sqlite3
+import time
+import zlib
+from contextlib import closing
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from asreviewcontrib.datatools.normalize import NORMALIZATION_VERSION
+
+# Default maximum size of the normalized text cache in megabytes.
+DEFAULT_CACHE_SIZE = 500
+# Default number of days after which cached OpenAlex data expires.
+DEFAULT_OPENALEX_TTL = 30
+
+
+def dataset_hash(texts: list[str], **options) -> str:
+    """Compute a hash of a list of texts and a set of options.
+
+    Parameters
+    ----------
+    texts : list[str]
+        The texts. Missing texts are hashed differently from empty texts.
+    **options
+        Options that change the result computed from the texts.
+
+    Returns
+    -------
+    str
+        Hexadecimal hash.
+    """
+    h = hashlib.blake2b(digest_size=20)
+    h.update(json.dumps(options, sort_keys=True).encode())
+    for text in texts:
+        if pd.isna(text):
+            h.update(b"\x00")
+        else:
+            encoded = text.encode()
+            h.update(len(encoded).to_bytes(8, "little"))
+            h.update(encoded)
+    return h.hexdigest()
+
+
+class NormalizedTextCache:
+    """On-disk cache of normalized texts.
+
+    The normalized texts of a dataset and their lengths are stored in a SQLite
+    database in the cache directory. When the total size of the stored entries
+    exceeds `max_size` megabytes, the least recently used entries are removed.
+
+    Parameters
+    ----------
+    cache_dir : str
+        Directory of the cache. It is created if it does not exist.
+    max_size : int, optional
+        Maximum size of the cache in megabytes, by default 500.
+    """
+
+    def __init__(self, cache_dir: str, max_size: int = DEFAULT_CACHE_SIZE):
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+        self.path = Path(cache_dir, "normalized_texts.sqlite")
+        self.max_size = max_size * 1024**2
+
+        with closing(sqlite3.connect(self.path)) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, texts BLOB,"
+                " lengths BLOB, size INTEGER, last_used REAL)"
+            )
+
+    @staticmethod
+    def key(texts: list[str], title_only: bool, stopwords_language: str) -> str:
+        """Get the cache key of the raw texts of a dataset.
+
+        Parameters
+        ----------
+        texts : list[str]
+            The raw texts.
+        title_only : bool
+            Whether the texts are only the titles.
+        stopwords_language : str
+            Language of the removed stopwords, or None.
+
+        Returns
+        -------
+        str
+            The cache key.
+        """
+        return dataset_hash(
+            texts,
+            normalization_version=NORMALIZATION_VERSION,
+            title_only=title_only,
+            stopwords_language=stopwords_language,
+        )
+
+    def get(self, key: str) -> tuple[list[str], np.ndarray]:
+        """Get the normalized texts and their lengths from the cache.
+
+        Parameters
+        ----------
+        key : str
+            The cache key.
+
+        Returns
+        -------
+        tuple[list[str], np.ndarray]
+            The normalized texts and their lengths (NaN for missing texts), or None
+            if the key is not in the cache.
+        """
+        with closing(sqlite3.connect(self.path)) as conn, conn:
+            row = conn.execute(
+                "SELECT texts, lengths FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key)
+            )
+
+        texts = json.loads(zlib.decompress(row[0]))
+        return texts, np.frombuffer(row[1], dtype=float).copy()
+
+    def put(self, key: str, texts: list[str], lengths: np.ndarray) -> None:
+        """Store normalized texts and their lengths in the cache.
+
+        Parameters
+        ----------
+        key : str
+            The cache key.
+        texts : list[str]
+            The normalized texts.
+        lengths : np.ndarray
+            The lengths of the normalized texts.
+        """
+        texts_blob = zlib.compress(json.dumps(texts).encode())
+        lengths_blob = np.asarray(lengths, dtype=float).tobytes()
+        size = len(texts_blob) + len(lengths_blob)
+        if size > self.max_size:
+            return
+
+        with closing(sqlite3.connect(self.path)) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                (key, texts_blob, lengths_blob, size, time.time()),
+            )
+
+            # remove the least recently used entries until the cache is small enough
+            total_size = conn.execute("SELECT SUM(size) FROM entries").fetchone()[0]
+            for old_key, old_size in conn.execute(
+                "SELECT key, size FROM entries ORDER BY last_used"
+            ).fetchall():
+                if total_size <= self.max_size:
+                    break
+                conn.execute("DELETE FROM entries WHERE key = ?", (old_key,))
+                total_size -= old_size
+
+
+class OpenAlexCache:
+    """On-disk cache of OpenAlex works for snowballing.
+
+    The works are stored in a SQLite database in the cache directory, together
+    with the identifiers of the works citing a work, the OpenAlex identifiers of
+    DOIs and the identifiers of the works that redirected identifiers point to.
+    Entries older than `ttl` days are not used, so changes in OpenAlex such as new
+    citations are picked up. In offline mode, all entries are used and nothing is
+    requested from OpenAlex.
+
+    Parameters
+    ----------
+    cache_dir : str
+        Directory of the cache. It is created if it does not exist.
+    ttl : float, optional
+        Number of days after which an entry expires, or None for entries that never
+        expire. By default 30.
+    offline : bool, optional
+        Only use the cache, by default False.
+    """
+
+    def __init__(
+        self, cache_dir: str, ttl: float = DEFAULT_OPENALEX_TTL, offline: bool = False
+    ):
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+        self.path = Path(cache_dir, "openalex.sqlite")
+        self.ttl = ttl
+        self.offline = offline
+
+        with closing(sqlite3.connect(self.path)) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS works (id TEXT PRIMARY KEY, data TEXT,"
+                " fetched REAL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS citing (id TEXT PRIMARY KEY, citing TEXT,"
+                " fetched REAL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS dois (doi TEXT PRIMARY KEY, id TEXT,"
+                " fetched REAL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS aliases (alias TEXT PRIMARY KEY, id TEXT,"
+                " fetched REAL)"
+            )
+
+    def _select(self, table: str, key: str, columns: str, keys: list[str]) -> list:
+        if self.offline or self.ttl is None:
+            oldest = 0.0
+        else:
+            oldest = time.time() - self.ttl * 24 * 60 * 60
+
+        rows = []
+        keys = list(dict.fromkeys(keys))
+        with closing(sqlite3.connect(self.path)) as conn:
+            # stay below the maximum number of parameters of SQLite
+            for i in range(0, len(keys), 500):
+                batch = keys[i : i + 500]
+                rows += conn.execute(
+                    f"SELECT {key}, {columns} FROM {table} WHERE fetched >= ? AND"
+                    f" {key} IN ({','.join('?' * len(batch))})",
+                    [oldest, *batch],
+                ).fetchall()
+        return rows
+
+    def get_works(self, identifiers: list[str]) -> dict[str, dict]:
+        """Get works from the cache.
+
+        Parameters
+        ----------
+        identifiers : list[str]
+            OpenAlex identifiers of the works.
+
+        Returns
+        -------
+        dict[str, dict]
+            The works that are in the cache, by identifier.
+        """
+        rows = self._select("works", "id", "data", identifiers)
+        return {identifier: json.loads(data) for identifier, data in rows}
+
+    def put_works(self, works: list[dict]) -> None:
+        """Store works in the cache.
+
+        Parameters
+        ----------
+        works : list[dict]
+            The works, with their OpenAlex identifier in the field 'id'.
+        """
+        now = time.time()
+        with closing(sqlite3.connect(self.path)) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO works VALUES (?, ?, ?)",
+                [(work["id"], json.dumps(work), now) for work in works],
+            )
+
+    def get_citing(self, identifiers: list[str]) -> dict[str, list[dict]]:
+        """Get the works citing works from the cache.
+
+        Parameters
+        ----------
+        identifiers : list[str]
+            OpenAlex identifiers of the cited works.
+
+        Returns
+        -------
+        dict[str, list[dict]]
+            The citing works of the cited works for which they are all in the cache,
+            by identifier of the cited work.
+        """
+        citing_ids = {
+            identifier: json.loads(citing)
+            for identifier, citing in self._select(
+                "citing", "id", "citing", identifiers
+            )
+        }
+        works = self.get_works([i for ids in citing_ids.values() for i in ids])
+        return {
+            identifier: [works[i] for i in ids]
+            for identifier, ids in citing_ids.items()
+            if all(i in works for i in ids)
+        }
+
+    def put_citing(self, citing_ids: dict[str, list[str]]) -> None:
+        """Store the identifiers of the works citing works in the cache.
+
+        The citing works themselves are stored with `put_works`.
+
+        Parameters
+        ----------
+        citing_ids : dict[str, list[str]]
+            The identifiers of the citing works, by identifier of the cited work.
+        """
+        now = time.time()
+        with closing(sqlite3.connect(self.path)) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO citing VALUES (?, ?, ?)",
+                [
+                    (identifier, json.dumps(ids), now)
+                    for identifier, ids in citing_ids.items()
+                ],
+            )
+
+    def get_dois(self, dois: list[str]) -> dict[str, str]:
+        """Get the OpenAlex identifiers of DOIs from the cache.
+
+        Parameters
+        ----------
+        dois : list[str]
+            The DOIs.
+
+        Returns
+        -------
+        dict[str, str]
+            The OpenAlex identifiers of the DOIs that are in the cache, by DOI. The
+            identifier is None for DOIs that were not found in OpenAlex.
+        """
+        return dict(self._select("dois", "doi", "id", dois))
+
+    def put_dois(self, id_mapping: dict[str, str]) -> None:
+        """Store the OpenAlex identifiers of DOIs in the cache.
+
+        Parameters
+        ----------
+        id_mapping : dict[str, str]
+            The OpenAlex identifiers by DOI, None for DOIs not found in OpenAlex.
+        """
+        now = time.time()
+        with closing(sqlite3.connect(self.path)) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO dois VALUES (?, ?, ?)",
+                [(doi, identifier, now) for doi, identifier in id_mapping.items()],
+            )
+
+    def get_aliases(self, identifiers: list[str]) -> dict[str, str]:
+        """Get the identifiers of the works that identifiers redirect to.
+
+        Parameters
+        ----------
+        identifiers : list[str]
+            OpenAlex identifiers that may redirect to another work.
+
+        Returns
+        -------
+        dict[str, str]
+            The identifiers of the works that the identifiers in the cache redirect
+            to, by identifier.
+        """
+        return dict(self._select("aliases", "alias", "id", identifiers))
+
+    def put_aliases(self, aliases: dict[str, str]) -> None:
+        """Store the identifiers of the works that identifiers redirect to.
+
+        The works themselves are stored with `put_works`.
+
+        Parameters
+        ----------
+        aliases : dict[str, str]
+            The identifiers of the works that are redirected to, by the identifier
+            that redirects.
+        """
+        now = time.time()
+        with closing(sqlite3.connect(self.path)) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO aliases VALUES (?, ?, ?)",
+                [(alias, identifier, now) for alias, identifier in aliases.items()],
+            )
@@ -1,7 +1,19 @@
-import re
+from __future__ import annotations
+
+import contextlib
+import gzip
+import json
+import math
+import os
+import time
+import warnings
+from collections import Counter
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
 from difflib import SequenceMatcher
+from pathlib import Path
 
-import ftfy
+import numpy as np
 import pandas as pd
 from asreview import ASReviewData
 from pandas.api.types import is_object_dtype
@@ -10,6 +22,34 @@ from rich.console import Console
 from rich.text import Text
 from tqdm import tqdm
 
+from asreviewcontrib.datatools.blocking import Blocks
+from asreviewcontrib.datatools.blocking import block_columns
+from asreviewcontrib.datatools.cache import DEFAULT_CACHE_SIZE
+from asreviewcontrib.datatools.cache import NormalizedTextCache
+from asreviewcontrib.datatools.cache import dataset_hash
+from asreviewcontrib.datatools.lsh import LSHIndex
+from asreviewcontrib.datatools.lsh import minhash_signatures
+from asreviewcontrib.datatools.normalize import NORMALIZATION_VERSION
+from asreviewcontrib.datatools.normalize import normalize_texts
+from asreviewcontrib.datatools.profiling import Profile
+from asreviewcontrib.datatools.report import PairReport
+from asreviewcontrib.datatools.scorers import SCORERS
+from asreviewcontrib.datatools.scorers import DifflibScorer
+from asreviewcontrib.datatools.scorers import _is_similar
+
+# Methods to find the pairs of similar records.
+DEDUP_METHODS = ["window", "lsh", "tfidf"]
+# Maximum number of records compared in one chunk of work.
+DEDUP_CHUNK_SIZE = 1000
+# Sizes of the character n-grams of the TF-IDF vectors.
+TFIDF_NGRAM_RANGE = (3, 3)
+# Maximum number of similarities computed in one chunk by the TF-IDF method.
+TFIDF_CHUNK_ENTRIES = 10**7
+# Version of the format of the files with the duplicate pairs of a shard.
+SHARD_FORMAT_VERSION = 2
+# Minimum number of seconds between two checkpoints of a deduplication.
+CHECKPOINT_INTERVAL = 60
+
 
 def _print_similar_list(
     similar_list: list[tuple[int, int]],
@@ -59,106 +99,1465 @@ def _print_similar_list(
     print("")
 
 
-def _drop_duplicates_by_similarity(
+def _raw_texts(asdata: ASReviewData, title_only: bool) -> pd.Series:
+    if title_only:
+        return asdata.df["title"].reset_index(drop=True)
+    return pd.Series(asdata.texts)
+
+
+def _normalize_pids(values: pd.Series, pid: str) -> list:
+    """Normalize persistent identifiers for comparison.
+
+    Parameters
+    ----------
+    values : pd.Series
+        The persistent identifiers.
+    pid : str
+        Name of the persistent identifier. DOIs are lowercased and the 'doi.org'
+        prefix is removed.
+
+    Returns
+    -------
+    list
+        The normalized identifiers. Missing identifiers are None.
+    """
+    if is_string_dtype(values) or is_object_dtype(values):
+        values = values.str.strip().replace("", None)
+        if pid == "doi":
+            values = values.str.lower().str.replace(
+                r"^https?://(www\.)?doi\.org/", "", regex=True
+            )
+    return [None if pd.isna(p) else p for p in values]
+
+
+class _CandidateIndex:
+    """Index of the records that are candidates for a similarity comparison.
+
+    Two records are candidates if the lengths of their cleaned texts differ by less
+    than `window` characters, or if they share the same persistent identifier. The
+    records are sorted by the length of their cleaned text, so the records within the
+    length window of a record are found with a binary search instead of a scan over
+    the whole dataset. The records sharing a persistent identifier are stored in a
+    hash map.
+
+    Parameters
+    ----------
+    lengths : np.ndarray
+        The lengths of the cleaned texts. Records with a missing text (NaN) are only
+        candidates through their persistent identifier.
+    pids : pd.Series, optional
+        The persistent identifiers of the records, by default None.
+    window : int, optional
+        Size of the length window, by default 5.
+    lsh : LSHIndex, optional
+        If given, records within the length window are only candidates if they also
+        share a bucket in this locality sensitive hashing index. By default None.
+    blocks : Blocks, optional
+        If given, records within the length window are only candidates if they are
+        also in the same or an adjacent block. By default None.
+    """
+
+    def __init__(
+        self,
+        lengths: np.ndarray,
+        pids: pd.Series = None,
+        window: int = 5,
+        lsh: LSHIndex = None,
+        blocks: Blocks = None,
+    ):
+        self.window = window
+        self.lsh = lsh
+        self.blocks = blocks
+        self.lengths = np.asarray(lengths, dtype=float)
+
+        has_text = np.flatnonzero(~np.isnan(self.lengths))
+        self.order = has_text[np.argsort(self.lengths[has_text], kind="stable")]
+        self.sorted_lengths = self.lengths[self.order]
+
+        self.pids = None if pids is None else pids.to_list()
+        self.pid_rows = {}
+        for row, value in enumerate(self.pids or []):
+            if not pd.isna(value):
+                self.pid_rows.setdefault(value, []).append(row)
+
+    def lookup(self, length: float, pid=None) -> np.ndarray:
+        """Get the records within the length window of a length or with a pid.
+
+        Parameters
+        ----------
+        length : float
+            Length of a cleaned text, or NaN.
+        pid : optional
+            Persistent identifier, by default None.
+
+        Returns
+        -------
+        np.ndarray
+            Sorted positions of the records.
+        """
+        rows = [np.empty(0, dtype=int)]
+
+        if not np.isnan(length):
+            start = np.searchsorted(
+                self.sorted_lengths, length - self.window, side="right"
+            )
+            stop = np.searchsorted(self.sorted_lengths, length + self.window)
+            rows.append(self.order[start:stop])
+
+        if pid is not None and not pd.isna(pid) and pid in self.pid_rows:
+            rows.append(np.asarray(self.pid_rows[pid]))
+
+        return np.unique(np.concatenate(rows))
+
+    def candidates(self, i: int, counts: Counter = None) -> np.ndarray:
+        """Get the candidates of a record that come after it in the dataset.
+
+        Parameters
+        ----------
+        i : int
+            Position of the record in the dataset.
+        counts : Counter, optional
+            If given, the number of records that are not candidates because of the
+            blocks is added to `counts["blocked"]`. By default None.
+
+        Returns
+        -------
+        np.ndarray
+            Sorted positions of the candidate records after position `i`.
+        """
+        length = self.lengths[i]
+        pid = None if self.pids is None else self.pids[i]
+
+        if self.lsh is None or np.isnan(length):
+            rows = self.lookup(length)
+        else:
+            rows = self.lsh.candidates(i)
+            rows = rows[np.abs(self.lengths[rows] - length) < self.window]
+        rows = rows[rows > i]
+        pid_rows = self.lookup(np.nan, pid)
+        pid_rows = pid_rows[pid_rows > i]
+
+        # records with the same pid are candidates in any block
+        if self.blocks is not None:
+            keep = self.blocks.compatible(i, rows)
+            if counts is not None:
+                counts["blocked"] += len(np.setdiff1d(rows[~keep], pid_rows))
+            rows = rows[keep]
+
+        return np.union1d(rows, pid_rows)
+
+
+def _first_match(
+    text: str,
+    pid,
+    rows: np.ndarray,
+    texts: list[str],
+    pids: list,
+    seq_matcher: SequenceMatcher,
+    threshold: float,
+    strict: bool,
+) -> int:
+    """Get the first of the rows with the same pid as or a text similar to a record.
+
+    Returns None if there is no such row.
+    """
+    for i in rows.tolist():
+        if pid is not None and pids[i] == pid:
+            return i
+
+        if text is not None and texts[i] is not None:
+            seq_matcher.set_seq2(text)
+            seq_matcher.set_seq1(texts[i])
+            if _is_similar(seq_matcher, threshold, strict):
+                return i
+
+    return None
+
+
+class _UnionFind:
+    """Disjoint sets of records, to cluster duplicates.
+
+    Records are only stored once they are joined with another record, so the memory
+    use depends on the number of duplicates instead of the size of the dataset. The
+    paths to the roots are compressed on every lookup.
+    """
+
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, i: int) -> int:
+        """Get the root record of the cluster of a record."""
+        root = i
+        while root in self.parent:
+            root = self.parent[root]
+        while i != root:
+            self.parent[i], i = root, self.parent[i]
+        return root
+
+    def union(self, i: int, j: int) -> bool:
+        """Join the clusters of two records.
+
+        Returns False if the records were already in the same cluster.
+        """
+        root_i, root_j = self.find(i), self.find(j)
+        if root_i == root_j:
+            return False
+        # the first record of a cluster stays its root
+        if root_j < root_i:
+            root_i, root_j = root_j, root_i
+        self.parent[root_j] = root_i
+        return True
+
+    def connected(self, i: int, j: int) -> bool:
+        """Check if two records are in the same cluster."""
+        return self.find(i) == self.find(j)
+
+    def labels(self, n_records: int) -> np.ndarray:
+        """Get the cluster of every record.
+
+        Parameters
+        ----------
+        n_records : int
+            Number of records.
+
+        Returns
+        -------
+        np.ndarray
+            Cluster numbers, in order of the first record of each cluster.
+        """
+        return pd.factorize(np.array([self.find(i) for i in range(n_records)]))[0]
+
+
+def _mark_duplicate(
+    i: int, j: int, duplicated: set, clusters: _UnionFind = None
+) -> bool:
+    """Mark a record as duplicate, returns False if it was already known."""
+    if clusters is None:
+        duplicated.add(j)
+        return True
+    return clusters.union(i, j)
+
+
+class _DuplicateFinder:
+    """Find the records that are duplicates of an earlier record.
+
+    A record is a duplicate of an earlier record if they have the same persistent
+    identifier, or if they are candidates in the index and their texts are similar.
+    The texts of a record and all its candidates are scored in one call to the
+    scorer. The number of candidates, of pid matches, of compared pairs and of pairs
+    skipped by blocking are counted in `counts`, together with the counts of the
+    scorer.
+
+    Parameters
+    ----------
+    texts : list[str]
+        The cleaned texts.
+    pids : list
+        The normalized persistent identifiers, or None.
+    index : _CandidateIndex
+        Index with the candidates of each record.
+    scorer : DifflibScorer
+        Scorer of the similarity of the texts, see `SCORERS`.
+    """
+
+    def __init__(
+        self,
+        texts: list[str],
+        pids: list,
+        index: _CandidateIndex,
+        scorer: DifflibScorer,
+    ):
+        self.texts = texts
+        self.pids = pids
+        self.index = index
+        self.scorer = scorer
+        self.chunk_size = DEDUP_CHUNK_SIZE
+        self.counts = Counter()
+
+    def find(
+        self,
+        start: int,
+        stop: int,
+        duplicated: set,
+        clusters: _UnionFind = None,
+    ) -> list[tuple[int, int]]:
+        """Find the duplicates of the records in a range of the dataset.
+
+        Parameters
+        ----------
+        start : int
+            Position of the first record of the range.
+        stop : int
+            Position after the last record of the range.
+        duplicated : set
+            Positions of the records that are already marked as duplicate. These are
+            not compared again. The duplicates found are added to the set.
+        clusters : _UnionFind, optional
+            If given, `duplicated` is ignored. Records are only skipped if they are
+            already in the same cluster, and the duplicates found are joined.
+
+        Returns
+        -------
+        list[tuple[int, int]]
+            Pairs `(i, j)` with `start <= i < stop` where record `j` is a duplicate
+            of record `i`, sorted by `i` and then by `j`. With `clusters`, only the
+            pairs that joined two clusters.
+        """
+        texts = self.texts
+        pids = self.pids
+
+        similar_list = []
+        n_candidates = 0
+        n_pid_matches = 0
+        n_compared = 0
+        for i in range(start, stop):
+            matches = []
+            rows = []
+            candidates = self.index.candidates(i, self.counts).tolist()
+            n_candidates += len(candidates)
+            for j in candidates:
+                # a record that is already marked as duplicate stays a duplicate
+                if clusters is None and j in duplicated:
+                    continue
+                if clusters is not None and clusters.connected(i, j):
+                    continue
+
+                # records with the same pid are duplicates, the others are
+                # compared by text
+                if pids is not None and pids[i] is not None and pids[i] == pids[j]:
+                    matches.append(j)
+                elif texts[i] is not None and texts[j] is not None:
+                    rows.append(j)
+
+            n_pid_matches += len(matches)
+            if rows:
+                n_compared += len(rows)
+                matches += [
+                    j
+                    for j, similar in zip(rows, self.scorer.similar(i, rows))
+                    if similar
+                ]
+
+            # mark the second record of every match as duplicate
+            for j in sorted(matches):
+                if _mark_duplicate(i, j, duplicated, clusters):
+                    similar_list.append((i, j))
+
+        self.counts["candidates"] += n_candidates
+        self.counts["pid_matches"] += n_pid_matches
+        self.counts["compared"] += n_compared
+        self.counts.update(self.scorer.counts)
+        self.scorer.counts.clear()
+        return similar_list
+
+    def score(self, i: int, j: int) -> float:
+        """Get the similarity score of two records, or None without texts."""
+        if self.texts[i] is None or self.texts[j] is None:
+            return None
+        return self.scorer.score(i, j)
+
+
+def _exact_duplicates(texts: list[str]) -> list[tuple[int, int]]:
+    """Find the records with the same text as an earlier record.
+
+    Parameters
+    ----------
+    texts : list[str]
+        The cleaned texts. Missing texts (None) are ignored.
+
+    Returns
+    -------
+    list[tuple[int, int]]
+        For every record `j` with the same text as an earlier record, the pair
+        `(i, j)` with the first record `i` with that text, sorted by `j`.
+    """
+    first_record = {}
+    exact_list = []
+    for j, text in enumerate(texts):
+        if text is not None:
+            i = first_record.setdefault(text, j)
+            if i != j:
+                exact_list.append((i, j))
+    return exact_list
+
+
+class _TfidfFinder:
+    """Find duplicates by the cosine similarity of TF-IDF vectors.
+
+    The texts are vectorized into sparse TF-IDF vectors of character n-grams. The
+    cosine similarities of a chunk of records with all records are computed with one
+    sparse matrix product, so the memory use is bounded by the chunk size. Records
+    with the same persistent identifier are duplicates as well.
+
+    Parameters
+    ----------
+    texts : list[str]
+        The cleaned texts.
+    pids : list
+        The normalized persistent identifiers, or None.
+    threshold : float
+        Cosine similarity above which two texts are similar.
+    """
+
+    def __init__(self, texts: list[str], pids: list, threshold: float):
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        self.texts = texts
+        self.threshold = threshold
+
+        vectorizer = TfidfVectorizer(
+            analyzer="char_wb", ngram_range=TFIDF_NGRAM_RANGE, dtype=np.float32
+        )
+        self.vectors = vectorizer.fit_transform(
+            ["" if text is None else text for text in texts]
+        ).tocsr()
+        self.vectors_t = self.vectors.T.tocsr()
+        self.chunk_size = max(1, TFIDF_CHUNK_ENTRIES // max(1, len(texts)))
+        self.counts = Counter()
+
+        self.pid_index = (
+            None
+            if pids is None
+            else _CandidateIndex(
+                np.full(len(texts), np.nan), pd.Series(pids, dtype=object)
+            )
+        )
+        self.pids = pids
+
+    def find(
+        self,
+        start: int,
+        stop: int,
+        duplicated: set,
+        clusters: _UnionFind = None,
+    ) -> list[tuple[int, int]]:
+        """Find the duplicates of the records in a range of the dataset.
+
+        See `_DuplicateFinder.find`.
+        """
+        similarities = self.vectors[start:stop] @ self.vectors_t
+        self.counts["compared"] += (stop - start) * len(self.texts)
+
+        similar_list = []
+        for i in range(start, stop):
+            row = slice(*similarities.indptr[i - start : i - start + 2])
+            rows = similarities.indices[row][similarities.data[row] > self.threshold]
+            if self.pid_index is not None:
+                rows = np.union1d(rows, self.pid_index.lookup(np.nan, self.pids[i]))
+            else:
+                rows = np.sort(rows)
+
+            for j in rows[rows > i].tolist():
+                if clusters is None and j in duplicated:
+                    continue
+                if _mark_duplicate(i, j, duplicated, clusters):
+                    similar_list.append((i, j))
+
+        return similar_list
+
+    def score(self, i: int, j: int) -> float:
+        """Get the cosine similarity of two records, or None without texts."""
+        if self.texts[i] is None or self.texts[j] is None:
+            return None
+        return float(self.vectors[i].multiply(self.vectors[j]).sum())
+
+
+# The duplicate finder of a worker process, see `_find_duplicates`.
+_worker_finder = None
+
+
+def _init_worker(finder: _DuplicateFinder | _TfidfFinder) -> None:
+    global _worker_finder
+    _worker_finder = finder
+
+
+def _find_in_worker(
+    bounds: tuple[int, int], cluster: bool = False
+) -> tuple[list[tuple[int, int]], Counter]:
+    _worker_finder.counts = Counter()
+    clusters = _UnionFind() if cluster else None
+    similar_list = _worker_finder.find(*bounds, duplicated=set(), clusters=clusters)
+    return similar_list, _worker_finder.counts
+
+
+def _shard_chunks(
+    n_records: int, chunk_size: int, shard: tuple[int, int] = None
+) -> list[tuple[int, int]]:
+    """Split the records in chunks, and select the chunks of a shard.
+
+    Shard `k` of `n` gets every `n`-th chunk starting at chunk `k - 1`, so the shards
+    get a similar amount of work.
+    """
+    chunks = [
+        (start, min(start + chunk_size, n_records))
+        for start in range(0, n_records, chunk_size)
+    ]
+    if shard is None:
+        return chunks
+    return chunks[shard[0] - 1 :: shard[1]]
+
+
+def _save_state(path: str, state: dict) -> None:
+    # write to a temporary file first, so an existing file is not corrupted if
+    # writing fails
+    tmp_path = f"{path}.tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        json.dump(state, f, default=lambda value: value.item())
+    os.replace(tmp_path, path)
+
+
+def _load_state(path: str) -> dict:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class _Checkpoint:
+    """Progress of finding duplicates, saved periodically to a file.
+
+    The checkpoint holds the size of the chunks, the number of chunks that are
+    done and the pairs of duplicates found in them. It is identified by a key with
+    the hash of the data and the options, so a checkpoint of other data or options
+    is not used. If the checkpoint can not be saved, a warning is given and the
+    deduplication continues without it.
+
+    Parameters
+    ----------
+    path : str
+        Location of the checkpoint.
+    key : dict
+        Identification of the data and options.
+    """
+
+    def __init__(self, path: str, key: dict):
+        self.path = path
+        # compare the key as it is stored in JSON
+        self.key = json.loads(json.dumps(key))
+        self.last_saved = time.monotonic()
+
+    def load(self) -> tuple[int, int, list[tuple[int, int]]]:
+        """Load the checkpoint.
+
+        Returns
+        -------
+        tuple[int, int, list[tuple[int, int]]]
+            The chunk size, the number of chunks that are done and the pairs found
+            in them, or None if there is no checkpoint for the data and options.
+        """
+        if not Path(self.path).exists():
+            return None
+
+        state = _load_state(self.path)
+        if state["key"] != self.key:
+            print(
+                f"Not resuming from the checkpoint at {self.path}, because the data"
+                " or options changed."
+            )
+            return None
+
+        print(f"Resuming from the checkpoint at {self.path}.")
+        pairs = [(i, j) for i, j in state["pairs"]]
+        return state["chunk_size"], state["n_chunks_done"], pairs
+
+    def update(
+        self,
+        chunk_size: int,
+        n_chunks_done: int,
+        pairs: list[tuple[int, int]],
+        force: bool = False,
+    ) -> None:
+        """Save the checkpoint if `CHECKPOINT_INTERVAL` seconds have passed.
+
+        Parameters
+        ----------
+        chunk_size : int
+            Number of records in a chunk.
+        n_chunks_done : int
+            Number of chunks that are done.
+        pairs : list[tuple[int, int]]
+            The pairs of duplicates found in these chunks.
+        force : bool, optional
+            Save the checkpoint regardless of the interval, by default False.
+        """
+        if self.path is None:
+            return
+        if force or time.monotonic() - self.last_saved >= CHECKPOINT_INTERVAL:
+            try:
+                _save_state(
+                    self.path,
+                    {
+                        "key": self.key,
+                        "chunk_size": chunk_size,
+                        "n_chunks_done": n_chunks_done,
+                        "pairs": pairs,
+                    },
+                )
+            except OSError as err:
+                warnings.warn(
+                    f"Could not save the checkpoint at {self.path}, continuing"
+                    f" without checkpoint: {err}",
+                    stacklevel=2,
+                )
+                self.path = None
+            self.last_saved = time.monotonic()
+
+
+def _find_duplicates(
+    finder: _DuplicateFinder | _TfidfFinder,
+    jobs: int = 1,
+    duplicated: set = None,
+    clusters: _UnionFind = None,
+    shard: tuple[int, int] = None,
+    checkpoint: _Checkpoint = None,
+    resume: bool = False,
+    on_pairs: Callable[[list[tuple[int, int]]], None] = None,
+) -> list[tuple[int, int]]:
+    """Find all records that are a duplicate of an earlier record.
+
+    The dataset is split in chunks of consecutive records. With more than one job,
+    the chunks are processed independently by a pool of processes. Because a record
+    is a duplicate if it is similar to any earlier record, merging the chunks in
+    order gives the same result as processing the whole dataset in one go. The
+    counts of the workers are added to `finder.counts`.
+
+    Parameters
+    ----------
+    finder : _DuplicateFinder or _TfidfFinder
+        The duplicate finder.
+    jobs : int, optional
+        Number of processes. Use -1 to use all processors. By default 1.
+    duplicated : set, optional
+        Positions of the records that are already known to be duplicates, by default
+        None.
+    clusters : _UnionFind, optional
+        If given, all duplicates are joined in these clusters instead of only
+        finding the first record of which a record is a duplicate. Chunks are then
+        merged by joining the clusters of the pairs found in each chunk. By default
+        None.
+    shard : tuple[int, int], optional
+        Only find the duplicates of the records in the chunks of shard `k` of `n`,
+        see `_shard_chunks`. The chunks then have the same size for any number of
+        jobs. By default None.
+    checkpoint : _Checkpoint, optional
+        If given, the progress is saved to this checkpoint periodically and when
+        all chunks are done. By default None.
+    resume : bool, optional
+        Continue from the checkpoint, if there is one for the same data and
+        options. The chunk size of the checkpoint is used. By default False.
+    on_pairs : Callable, optional
+        Called with the new pairs after each chunk is merged, including the pairs
+        restored from the checkpoint. The pairs passed are final. By default None.
+
+    Returns
+    -------
+    list[tuple[int, int]]
+        For every other duplicate record `j`, the pair `(i, j)` with the first record
+        `i` of which it is a duplicate, sorted by `i` and then by `j`. With
+        `clusters`, the pairs that joined two clusters.
+    """
+    n_records = len(finder.texts)
+    if jobs < 1:
+        jobs = os.cpu_count()
+    if shard is None:
+        chunk_size = max(1, min(finder.chunk_size, math.ceil(n_records / (4 * jobs))))
+    else:
+        chunk_size = finder.chunk_size
+
+    duplicated = set() if duplicated is None else set(duplicated)
+    similar_list = []
+    n_chunks_done = 0
+
+    state = checkpoint.load() if checkpoint is not None and resume else None
+    if state is not None:
+        chunk_size, n_chunks_done, similar_list = state
+        for i, j in similar_list:
+            _mark_duplicate(i, j, duplicated, clusters)
+        if on_pairs is not None:
+            on_pairs(similar_list)
+
+    chunks = _shard_chunks(n_records, chunk_size, shard)
+    todo = chunks[n_chunks_done:]
+
+    total = sum(stop - start for start, stop in chunks)
+    done = sum(stop - start for start, stop in chunks[:n_chunks_done])
+    with tqdm(total=total, initial=done, desc="Deduplicating") as progress:
+        if jobs == 1:
+            chunk_results = (
+                (finder.find(start, stop, duplicated, clusters), None)
+                for start, stop in todo
+            )
+            executor = None
+        else:
+            executor = ProcessPoolExecutor(
+                max_workers=jobs, initializer=_init_worker, initargs=(finder,)
+            )
+            chunk_results = executor.map(
+                _find_in_worker, todo, [clusters is not None] * len(todo)
+            )
+
+        try:
+            for (start, stop), (chunk_list, counts) in zip(todo, chunk_results):
+                if counts is not None:
+                    finder.counts.update(counts)
+                    worker_list, chunk_list = chunk_list, []
+                    for i, j in worker_list:
+                        if clusters is None and j in duplicated:
+                            continue
+                        if _mark_duplicate(i, j, duplicated, clusters):
+                            chunk_list.append((i, j))
+                similar_list += chunk_list
+                if on_pairs is not None:
+                    on_pairs(chunk_list)
+
+                n_chunks_done += 1
+                if checkpoint is not None:
+                    checkpoint.update(chunk_size, n_chunks_done, similar_list)
+                progress.update(stop - start)
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+    if checkpoint is not None:
+        checkpoint.update(chunk_size, n_chunks_done, similar_list, force=True)
+    return similar_list
+
+
+class DedupIndex:
+    """Index of earlier records to deduplicate new records against.
+
+    The index holds the normalized texts and persistent identifiers of the records,
+    a map of the normalized texts to the first record with that text (the exact
+    fingerprints), and the records sorted by text length. New records can be
+    checked against the index with `query` and added with `add`, so a new batch of
+    records is deduplicated against all earlier batches without comparing the
+    earlier batches again.
+
+    Parameters
+    ----------
+    pid : str, optional
+        Persistent identifier used for deduplication, by default "doi".
+    title_only : bool, optional
+        Only use the title for deduplication, by default False.
+    stopwords_language : str, optional
+        Remove stopwords from this language before comparing texts, by default None.
+    """
+
+    def __init__(
+        self,
+        pid: str = "doi",
+        title_only: bool = False,
+        stopwords_language: str = None,
+    ):
+        self.pid = pid
+        self.title_only = title_only
+        self.stopwords_language = stopwords_language
+        self.texts = []
+        self.pids = []
+        self._build()
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def _build(self) -> None:
+        self.fingerprints = {}
+        for row, text in enumerate(self.texts):
+            if text is not None:
+                self.fingerprints.setdefault(text, row)
+        self.candidate_index = _CandidateIndex(
+            pd.Series(self.texts, dtype=object).str.len().to_numpy(dtype=float),
+            pd.Series(self.pids, dtype=object),
+        )
+
+    def _normalize(self, asdata: ASReviewData) -> tuple[list[str], list]:
+        texts = normalize_texts(
+            _raw_texts(asdata, self.title_only), self.stopwords_language
+        )
+        if self.pid in asdata.df.columns:
+            pids = _normalize_pids(asdata.df[self.pid], self.pid)
+        else:
+            pids = [None] * len(texts)
+        return texts, pids
+
+    @classmethod
+    def from_data(
+        cls,
+        asdata: ASReviewData,
+        pid: str = "doi",
+        title_only: bool = False,
+        stopwords_language: str = None,
+    ) -> DedupIndex:
+        """Build an index from a dataset.
+
+        Parameters
+        ----------
+        asdata : ASReviewData
+            The data object.
+        pid : str, optional
+            Persistent identifier used for deduplication, by default "doi".
+        title_only : bool, optional
+            Only use the title for deduplication, by default False.
+        stopwords_language : str, optional
+            Remove stopwords from this language before comparing texts, by default
+            None.
+
+        Returns
+        -------
+        DedupIndex
+            The index.
+        """
+        dedup_index = cls(pid, title_only, stopwords_language)
+        dedup_index.add(asdata)
+        return dedup_index
+
+    @classmethod
+    def load(cls, path: str) -> DedupIndex:
+        """Load an index from a file.
+
+        Parameters
+        ----------
+        path : str
+            Location of the index.
+
+        Returns
+        -------
+        DedupIndex
+            The index.
+
+        Raises
+        ------
+        ValueError
+            If the index was made with a different version of the text normalization.
+        """
+        state = _load_state(path)
+        if state["normalization_version"] != NORMALIZATION_VERSION:
+            raise ValueError(
+                f"The index at {path} was made with a different version of the text"
+                " normalization. Build a new index."
+            )
+
+        dedup_index = cls(
+            state["pid"], state["title_only"], state["stopwords_language"]
+        )
+        dedup_index.texts = state["texts"]
+        dedup_index.pids = state["pids"]
+        dedup_index._build()
+        return dedup_index
+
+    def save(self, path: str) -> None:
+        """Save the index to a file.
+
+        Parameters
+        ----------
+        path : str
+            Location of the index.
+        """
+        state = {
+            "normalization_version": NORMALIZATION_VERSION,
+            "pid": self.pid,
+            "title_only": self.title_only,
+            "stopwords_language": self.stopwords_language,
+            "texts": self.texts,
+            "pids": self.pids,
+        }
+        _save_state(path, state)
+
+    def add(self, asdata: ASReviewData) -> None:
+        """Add all records of a dataset to the index.
+
+        Parameters
+        ----------
+        asdata : ASReviewData
+            The data object.
+        """
+        self._add(*self._normalize(asdata))
+
+    def _add(self, texts: list[str], pids: list) -> None:
+        self.texts += texts
+        self.pids += pids
+        self._build()
+
+    def query(
+        self,
+        asdata: ASReviewData,
+        similar: bool = True,
+        threshold: float = 0.98,
+        strict: bool = False,
+    ) -> list[tuple[int, int]]:
+        """Find the records of a dataset that are duplicates of indexed records.
+
+        The records of the dataset are treated as if they were added after the
+        records in the index. A record is a duplicate if it has the same persistent
+        identifier or the same normalized text as a record in the index or an
+        earlier record in the dataset, or, if `similar` is True, if its text is
+        similar to one of these records. The index is not changed.
+
+        Parameters
+        ----------
+        asdata : ASReviewData
+            The data object with the new records.
+        similar : bool, optional
+            Also find records with a similar text, by default True.
+        threshold : float, optional
+            Threshold score above which two records are considered duplicate, by
+            default 0.98.
+        strict : bool, optional
+            Use a stricter algorithm to calculate the similarity, by default False.
+
+        Returns
+        -------
+        list[tuple[int, int]]
+            Pairs `(i, j)` where record `j` of the dataset is a duplicate of record
+            `i`. If `i` is smaller than the number of records in the index, it is
+            the position of an indexed record, otherwise record `i - len(index)` of
+            the dataset.
+        """
+        return self._query(
+            *self._normalize(asdata),
+            similar=similar,
+            threshold=threshold,
+            strict=strict,
+        )
+
+    def _query(
+        self,
+        texts: list[str],
+        pids: list,
+        similar: bool = True,
+        threshold: float = 0.98,
+        strict: bool = False,
+    ) -> list[tuple[int, int]]:
+        lengths = pd.Series(texts, dtype=object).str.len().to_numpy(dtype=float)
+        batch_index = _CandidateIndex(lengths, pd.Series(pids, dtype=object))
+        batch_fingerprints = {}
+        seq_matcher = SequenceMatcher()
+
+        n_indexed = len(self)
+        exact = threshold < 1 or not similar
+        similar_list = []
+        for j, (text, pid) in enumerate(zip(texts, pids)):
+            if exact and text in self.fingerprints:
+                similar_list.append((self.fingerprints[text], j))
+                continue
+            if exact and text in batch_fingerprints:
+                similar_list.append((n_indexed + batch_fingerprints[text], j))
+                continue
+            if text is not None:
+                batch_fingerprints[text] = j
+
+            # without similarity, only records with the same pid are candidates
+            length = lengths[j] if similar else np.nan
+            rows = self.candidate_index.lookup(length, pid)
+            i = _first_match(
+                text, pid, rows, self.texts, self.pids, seq_matcher, threshold, strict
+            )
+            if i is None:
+                rows = batch_index.lookup(length, pid)
+                rows = rows[rows < j]
+                i = _first_match(
+                    text, pid, rows, texts, pids, seq_matcher, threshold, strict
+                )
+                if i is not None:
+                    i += n_indexed
+
+            if i is not None:
+                similar_list.append((i, j))
+
+        return similar_list
+
+
+def _candidate_index(
+    s: pd.Series,
+    lengths: np.ndarray,
+    raw_pids: pd.Series,
+    method: str,
+    lsh_bands: int,
+    lsh_rows: int,
+    blocks: Blocks = None,
+) -> _CandidateIndex:
+    if method == "lsh":
+        lsh = LSHIndex(
+            minhash_signatures(s.to_list(), n_permutations=lsh_bands * lsh_rows),
+            bands=lsh_bands,
+            rows=lsh_rows,
+            mask=s.notna().to_numpy(),
+        )
+    else:
+        lsh = None
+
+    # Records are only compared with records sharing the same raw pid or with
+    # records of similar length.
+    return _CandidateIndex(lengths, raw_pids, lsh=lsh, blocks=blocks)
+
+
+def _similar_pairs(
     asdata: ASReviewData,
     pid: str,
     threshold: float = 0.98,
     title_only: bool = False,
     stopwords_language: str = None,
     strict: bool = False,
-    verbose: bool = False,
-) -> None:
-    if title_only:
-        data = asdata.df["title"]
+    method: str = "window",
+    lsh_bands: int = 16,
+    lsh_rows: int = 8,
+    jobs: int = 1,
+    cache_dir: str = None,
+    cache_max_size: int = DEFAULT_CACHE_SIZE,
+    cluster: bool = False,
+    block: str = None,
+    scorer: str = "difflib",
+    shard: tuple[int, int] = None,
+    checkpoint_path: str = None,
+    resume: bool = False,
+    report_path: str = None,
+    report_diff: bool = False,
+    profile: Profile = None,
+) -> tuple[list[tuple[int, int]], list[tuple[int, int]]]:
+    """Find the pairs of duplicates with the same text and the other pairs.
+
+    With `report_path`, the pairs are written to a `PairReport` while they are
+    found. With `profile`, the time of each stage and the counts of the duplicate
+    finder are added to the profile.
+    """
+    if method not in DEDUP_METHODS:
+        raise ValueError(
+            f"Unknown deduplication method '{method}', choose from {DEDUP_METHODS}."
+        )
+    if scorer not in SCORERS:
+        raise ValueError(f"Unknown scorer '{scorer}', choose from {list(SCORERS)}.")
+    if block is not None and method == "tfidf":
+        raise ValueError("Blocking can not be used with the 'tfidf' method.")
+    if profile is None:
+        profile = Profile()
+
+    data = _raw_texts(asdata, title_only)
+
+    if cache_dir is not None:
+        with profile.stage("cache"):
+            cache = NormalizedTextCache(cache_dir, max_size=cache_max_size)
+            cache_key = cache.key(data, title_only, stopwords_language)
+            cached = cache.get(cache_key)
     else:
-        data = pd.Series(asdata.texts)
-
-    symbols_regex = re.compile(r"[^ \w\d\-_]")
-    spaces_regex = re.compile(r"\s+")
-
-    # clean the data
-    s = (
-        data.apply(ftfy.fix_text)
-        .str.replace(symbols_regex, "", regex=True)
-        .str.replace(spaces_regex, " ", regex=True)
-        .str.lower()
-        .str.strip()
-        .replace("", None)
-    )
+        cached = None
 
-    if stopwords_language:
-        try:
-            from nltk.corpus import stopwords
+    if cached is None:
+        s = pd.Series(normalize_texts(data, stopwords_language, profile), dtype=object)
+        lengths = s.str.len().to_numpy(dtype=float)
+        if cache_dir is not None:
+            with profile.stage("cache"):
+                cache.put(cache_key, s.to_list(), lengths)
+    else:
+        print("Using cached normalized texts.")
+        s = pd.Series(cached[0], dtype=object)
+        lengths = cached[1]
+
+    if pid in asdata.df.columns:
+        with profile.stage("pids"):
+            raw_pids = asdata.df[pid].reset_index(drop=True)
+            pids = _normalize_pids(raw_pids, pid)
+    else:
+        print(f"Not using {pid} for deduplication because there is no such data.")
 
-            stopwords_set = set(stopwords.words(stopwords_language))
-        except LookupError:
-            import nltk
+        raw_pids = None
+        pids = None
 
-            nltk.download("stopwords")
-            stopwords_set = set(stopwords.words(stopwords_language))
+    # Records with the same cleaned text are duplicates of the first of them (unless
+    # the threshold can not be reached). Only the first one is compared by text with
+    # the other records, the others are only compared by pid.
+    with profile.stage("exact_duplicates"):
+        exact_list = _exact_duplicates(s.to_list()) if threshold < 1 else []
+        if exact_list:
+            s = s.copy()
+            s.iloc[[j for _, j in exact_list]] = None
+            lengths = np.where(s.isna(), np.nan, lengths)
 
-        stopwords_regex = re.compile(rf"\b{'\\b|\\b'.join(stopwords_set)}\b")
-        s = s.str.replace(stopwords_regex, "", regex=True)
+    with profile.stage("index"):
+        if method == "tfidf":
+            finder = _TfidfFinder(s.to_list(), pids, threshold)
+        else:
+            blocks = None if block is None else Blocks.from_data(asdata, block)
+            index = _candidate_index(
+                s, lengths, raw_pids, method, lsh_bands, lsh_rows, blocks
+            )
+            finder = _DuplicateFinder(
+                s.to_list(),
+                pids,
+                index,
+                SCORERS[scorer](s.to_list(), threshold, strict),
+            )
 
-    seq_matcher = SequenceMatcher()
-    duplicated = [False] * len(s)
+    if cluster:
+        clusters = _UnionFind()
+        for i, j in exact_list:
+            clusters.union(i, j)
+    else:
+        clusters = None
 
-    similar_list = []
-    if pid in asdata.df.columns:
-        if is_string_dtype(asdata.df[pid]) or is_object_dtype(asdata.df[pid]):
-            pids = asdata.df[pid].str.strip().replace("", None)
-            if pid == "doi":
-                pids = pids.str.lower().str.replace(
-                    r"^https?://(www\.)?doi\.org/", "", regex=True
+    if checkpoint_path is not None:
+        # the checkpoint is only used for the same data and options
+        checkpoint = _Checkpoint(
+            checkpoint_path,
+            {
+                "normalization_version": NORMALIZATION_VERSION,
+                "dataset": _dataset_key(asdata, pid, title_only, block),
+                "options": {
+                    "pid": pid,
+                    "threshold": threshold,
+                    "title_only": title_only,
+                    "stopwords_language": stopwords_language,
+                    "strict": strict,
+                    "method": method,
+                    "lsh_bands": lsh_bands,
+                    "lsh_rows": lsh_rows,
+                    "cluster": cluster,
+                    "block": block,
+                },
+                "shard": shard,
+            },
+        )
+    else:
+        checkpoint = None
+
+    duplicated = {j for _, j in exact_list}
+    # the pairs of other shards are found by those shards
+    if shard is not None:
+        exact_list = [
+            (i, j)
+            for i, j in exact_list
+            if (i // finder.chunk_size) % shard[1] == shard[0] - 1
+        ]
+
+    with contextlib.ExitStack() as stack:
+        if report_path is not None:
+            report = stack.enter_context(
+                PairReport(
+                    report_path, data, asdata.df.index, pid, raw_pids, report_diff
                 )
+            )
+
+            def on_pairs(pairs: list[tuple[int, int]]) -> None:
+                for i, j in pairs:
+                    same_pid = pids is not None and pids[i] is not None
+                    same_pid = same_pid and pids[i] == pids[j]
+                    match = "pid" if same_pid else "similar"
+                    report.write(i, j, match, finder.score(i, j))
+                report.flush()
+
+            for i, j in exact_list:
+                report.write(i, j, "text", 1.0)
+            report.flush()
         else:
-            pids = asdata.df[pid]
+            on_pairs = None
 
-        for i, text in tqdm(s.items(), total=len(s), desc="Deduplicating"):
-            seq_matcher.set_seq2(text)
+        with profile.stage("compare"):
+            fuzzy_list = _find_duplicates(
+                finder,
+                jobs=jobs,
+                duplicated=duplicated,
+                clusters=clusters,
+                shard=shard,
+                checkpoint=checkpoint,
+                resume=resume,
+                on_pairs=on_pairs,
+            )
+
+    profile.counts.update(finder.counts)
+    profile.counts["records"] += len(s)
+    profile.counts["exact_duplicates"] += len(exact_list)
+    profile.counts["other_duplicates"] += len(fuzzy_list)
+
+    print(
+        f"Found {len(exact_list)} duplicates with the same text after normalization"
+        f" and {len(fuzzy_list)} other duplicates."
+    )
+    if block is not None:
+        print(
+            f"Compared {finder.counts['compared']} pairs of records, blocking"
+            f" avoided {finder.counts['blocked']} comparisons."
+        )
+
+    return exact_list, fuzzy_list
 
-            # loop through the rest of the data if it has the same pid or similar length
-            for j, t in s.iloc[i + 1 :][
-                (asdata.df[pid] == asdata.df.iloc[i][pid])
-                | (abs(s.str.len() - len(text)) < 5)
-            ].items():
-                seq_matcher.set_seq1(t)
-
-                # if the texts have the same pid or are similar enough,
-                # mark the second one as duplicate
-                if pids.iloc[i] == pids.iloc[j] or (
-                    seq_matcher.real_quick_ratio() > threshold
-                    and seq_matcher.quick_ratio() > threshold
-                    and (not strict or seq_matcher.ratio() > threshold)
-                ):
-                    if not duplicated[j]:
-                        similar_list.append((i, j))
-                    duplicated[j] = True
 
+def _apply_pairs(
+    asdata: ASReviewData, similar_list: list[tuple[int, int]], cluster: bool = False
+) -> None:
+    """Drop the second record of every pair, or add the clusters of the pairs."""
+    if cluster:
+        clusters = _UnionFind()
+        for i, j in similar_list:
+            clusters.union(i, j)
+        asdata.df["duplicate_cluster"] = clusters.labels(len(asdata.df))
     else:
-        print(f"Not using {pid} for deduplication because there is no such data.")
+        duplicated = np.zeros(len(asdata.df), dtype=bool)
+        duplicated[[j for _, j in similar_list]] = True
+        asdata.df = asdata.df[~duplicated].reset_index(drop=True)
 
-        for i, text in tqdm(s.items(), total=len(s), desc="Deduplicating"):
-            seq_matcher.set_seq2(text)
 
-            # loop through the rest of the data if it has similar length
-            for j, t in s.iloc[i + 1 :][abs(s.str.len() - len(text)) < 5].items():
-                seq_matcher.set_seq1(t)
-
-                # if the texts are similar enough, mark the second one as duplicate
-                if (
-                    seq_matcher.real_quick_ratio() > threshold
-                    and seq_matcher.quick_ratio() > threshold
-                    and (not strict or seq_matcher.ratio() > threshold)
-                ):
-                    if not duplicated[j]:
-                        similar_list.append((i, j))
-                    duplicated[j] = True
-    asdata.df = asdata.df[~pd.Series(duplicated)].reset_index(drop=True)
+def _drop_duplicates_by_similarity(
+    asdata: ASReviewData,
+    pid: str,
+    threshold: float = 0.98,
+    title_only: bool = False,
+    stopwords_language: str = None,
+    strict: bool = False,
+    verbose: bool = False,
+    method: str = "window",
+    lsh_bands: int = 16,
+    lsh_rows: int = 8,
+    jobs: int = 1,
+    cache_dir: str = None,
+    cache_max_size: int = DEFAULT_CACHE_SIZE,
+    cluster: bool = False,
+    block: str = None,
+    scorer: str = "difflib",
+    checkpoint_path: str = None,
+    resume: bool = False,
+    report_path: str = None,
+    report_diff: bool = False,
+    profile: Profile = None,
+) -> None:
+    if profile is None:
+        profile = Profile()
+
+    data = _raw_texts(asdata, title_only)
+    exact_list, fuzzy_list = _similar_pairs(
+        asdata,
+        pid,
+        threshold=threshold,
+        title_only=title_only,
+        stopwords_language=stopwords_language,
+        strict=strict,
+        method=method,
+        lsh_bands=lsh_bands,
+        lsh_rows=lsh_rows,
+        jobs=jobs,
+        cache_dir=cache_dir,
+        cache_max_size=cache_max_size,
+        cluster=cluster,
+        block=block,
+        scorer=scorer,
+        checkpoint_path=checkpoint_path,
+        resume=resume,
+        report_path=report_path,
+        report_diff=report_diff,
+        profile=profile,
+    )
+    similar_list = sorted(exact_list + fuzzy_list)
+
+    with profile.stage("apply"):
+        _apply_pairs(asdata, similar_list, cluster)
     if verbose:
         _print_similar_list(similar_list, data, pid)
 
 
+def _parse_shard(shard: str) -> tuple[int, int]:
+    """Parse a shard like '2/8' into the shard number and the number of shards."""
+    k, _, n = shard.partition("/")
+    if not (k.isdigit() and n.isdigit() and 1 <= int(k) <= int(n)):
+        raise ValueError(
+            f"Invalid shard '{shard}', use K/N with 1 <= K <= N, for example '1/4'."
+        )
+    return int(k), int(n)
+
+
+def _dataset_key(
+    asdata: ASReviewData, pid: str, title_only: bool, block: str = None
+) -> str:
+    """Hash the texts and the other columns of a dataset that change the pairs."""
+    texts = _raw_texts(asdata, title_only).to_list()
+    columns = [pid] if pid in asdata.df.columns else []
+    if block is not None:
+        columns += block_columns(asdata, block)
+    for column in columns:
+        texts += [None if pd.isna(value) else str(value) for value in asdata.df[column]]
+    return dataset_hash(
+        texts, pid=pid, title_only=title_only, block=block, columns=columns
+    )
+
+
+def _keep_first(similar_list: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    """Keep the pair with the first record for every duplicate record."""
+    duplicated = set()
+    first_pairs = []
+    for i, j in sorted(similar_list):
+        if j not in duplicated:
+            first_pairs.append((i, j))
+            duplicated.add(j)
+    return first_pairs
+
+
+def _write_shard(
+    asdata: ASReviewData, pairs_path: str, shard: str, pid: str, **options
+) -> None:
+    k, n = _parse_shard(shard)
+    exact_list, fuzzy_list = _similar_pairs(asdata, pid, shard=(k, n), **options)
+
+    # only the options that change the pairs are stored
+    for option in ["jobs", "cache_dir", "cache_max_size", "scorer"]:
+        options.pop(option, None)
+    checkpoint_path = options.pop("checkpoint_path", None)
+    for option in ["resume", "report_path", "report_diff", "profile"]:
+        options.pop(option, None)
+
+    _save_state(
+        pairs_path,
+        {
+            "format_version": SHARD_FORMAT_VERSION,
+            "dataset": _dataset_key(
+                asdata, pid, options["title_only"], options["block"]
+            ),
+            "shard": [k, n],
+            "options": {"pid": pid, **options},
+            "exact_pairs": exact_list,
+            "pairs": fuzzy_list,
+        },
+    )
+    print(
+        f"Saved {len(exact_list) + len(fuzzy_list)} pairs of duplicates of shard"
+        f" {k}/{n} to {pairs_path}."
+    )
+    if checkpoint_path is not None:
+        Path(checkpoint_path).unlink(missing_ok=True)
+
+
+def merge_shards(
+    asdata: ASReviewData,
+    pairs_paths: list[str],
+    output_path: str = None,
+    verbose: bool = False,
+) -> None:
+    """Deduplicate an ASReview data object with the duplicate pairs of all shards.
+
+    The pairs found by `deduplicate_data` with `shard` for every shard are combined,
+    and the same keep-first rule as without shards is applied: every record that is
+    a duplicate of an earlier record is removed. The result is the same as
+    deduplicating the data without shards. If the shards were made with `cluster`,
+    the records are kept and the column `duplicate_cluster` is added instead.
+
+    Parameters
+    ----------
+    asdata : ASReviewData
+        The data object the shards were made from.
+    pairs_paths : list[str]
+        Locations of the files with the pairs of every shard.
+    output_path : str, optional
+        If provided, the deduplicated data object is stored at this location. By
+        default None.
+    verbose : bool, optional
+        Print the pairs of duplicates, by default False.
+
+    Raises
+    ------
+    ValueError
+        If the files are not the pairs of all shards of the same data and options,
+        or of a different data object.
+    """
+    states = [_load_state(path) for path in pairs_paths]
+    first = states[0]
+    for path, state in zip(pairs_paths, states):
+        if state["format_version"] != SHARD_FORMAT_VERSION:
+            raise ValueError(
+                f"The pairs at {path} were saved by another version. Run the shard"
+                " again."
+            )
+        if (state["dataset"], state["options"], state["shard"][1]) != (
+            first["dataset"],
+            first["options"],
+            first["shard"][1],
+        ):
+            raise ValueError(
+                f"The pairs at {path} were found with other data, options or number"
+                f" of shards than the pairs at {pairs_paths[0]}."
+            )
+
+    n_shards = first["shard"][1]
+    shards = sorted(state["shard"][0] for state in states)
+    if shards != list(range(1, n_shards + 1)):
+        raise ValueError(
+            f"Expected the pairs of shards 1 to {n_shards} once each, got the pairs"
+            f" of shards {shards}."
+        )
+
+    options = first["options"]
+    dataset = _dataset_key(
+        asdata, options["pid"], options["title_only"], options.get("block")
+    )
+    if dataset != first["dataset"]:
+        raise ValueError("The pairs of the shards were found in other data.")
+
+    exact_list = [(i, j) for state in states for i, j in state["exact_pairs"]]
+    fuzzy_list = [(i, j) for state in states for i, j in state["pairs"]]
+    if not options["cluster"]:
+        fuzzy_list = _keep_first(fuzzy_list)
+    similar_list = sorted(exact_list + fuzzy_list)
+
+    print(
+        f"Found {len(exact_list)} duplicates with the same text after normalization"
+        f" and {len(fuzzy_list)} other duplicates in {n_shards} shards."
+    )
+
+    initial_length = len(asdata.df)
+    data = _raw_texts(asdata, options["title_only"])
+    _apply_pairs(asdata, similar_list, options["cluster"])
+    if verbose:
+        _print_similar_list(similar_list, data, options["pid"])
+
+    if output_path:
+        asdata.to_file(output_path)
+
+    if options["cluster"]:
+        n_dup = initial_length - asdata.df["duplicate_cluster"].nunique()
+    else:
+        n_dup = initial_length - len(asdata.df)
+    print(f"Found {n_dup} duplicates in dataset with {initial_length} records.")
+
+
+def _drop_duplicates_against(
+    asdata: ASReviewData,
+    index_path: str,
+    pid: str,
+    similar: bool = False,
+    threshold: float = 0.98,
+    title_only: bool = False,
+    stopwords_language: str = None,
+    strict: bool = False,
+) -> None:
+    if Path(index_path).exists():
+        dedup_index = DedupIndex.load(index_path)
+        index_options = (
+            dedup_index.pid,
+            dedup_index.title_only,
+            dedup_index.stopwords_language,
+        )
+        if index_options != (pid, title_only, stopwords_language):
+            raise ValueError(
+                f"The index at {index_path} was built with pid={index_options[0]},"
+                f" title_only={index_options[1]} and"
+                f" stopwords_language={index_options[2]}. Use the same options."
+            )
+    else:
+        dedup_index = DedupIndex(pid, title_only, stopwords_language)
+
+    # the texts are only normalized once, for the query and for adding them
+    texts, pids = dedup_index._normalize(asdata)
+    similar_list = dedup_index._query(
+        texts, pids, similar=similar, threshold=threshold, strict=strict
+    )
+
+    # The duplicates are added to the index as well, so later records that are
+    # similar to them are found, like when deduplicating all records at once.
+    n_indexed = len(dedup_index)
+    dedup_index._add(texts, pids)
+    dedup_index.save(index_path)
+    print(
+        f"Added {len(asdata.df)} records to the index at {index_path} with"
+        f" {n_indexed} records."
+    )
+
+    duplicated = np.zeros(len(asdata.df), dtype=bool)
+    duplicated[[j for _, j in similar_list]] = True
+    asdata.df = asdata.df[~duplicated].reset_index(drop=True)
+
+
 def deduplicate_data(
     asdata: ASReviewData,
     output_path: str = None,
@@ -169,6 +1568,22 @@ def deduplicate_data(
     stopwords_language: str = None,
     strict: bool = False,
     verbose: bool = False,
+    method: str = "window",
+    lsh_bands: int = 16,
+    lsh_rows: int = 8,
+    jobs: int = 1,
+    cache_dir: str = None,
+    cache_max_size: int = DEFAULT_CACHE_SIZE,
+    against: str = None,
+    cluster: bool = False,
+    block: str = None,
+    scorer: str = "difflib",
+    shard: str = None,
+    checkpoint_path: str = None,
+    resume: bool = False,
+    report_path: str = None,
+    report_diff: bool = False,
+    profile_path: str = None,
 ) -> None:
     """Deduplicate an ASReview data object.
 
@@ -198,15 +1613,152 @@ def deduplicate_data(
     verbose : bool, optional
         Get verbose output during deduplicating. By default False. Only applies if
         `similar` is set to `True`.
+    method : str, optional
+        Method to select the pairs of records that are compared. With 'window' a
+        record is compared with all records of similar length. With 'lsh' it is only
+        compared with the records of similar length that share a bucket in a MinHash
+        locality sensitive hashing index, which is much faster on large datasets but
+        might miss some duplicates. With 'tfidf' all records are compared by the
+        cosine similarity of their TF-IDF vectors of character 3-grams. `threshold`
+        then applies to the cosine similarity and `strict` is ignored. By default
+        'window'. Only applies if `similar` is set to `True`.
+    lsh_bands : int, optional
+        Number of bands of the MinHash signatures, by default 16. Only applies if
+        `method` is 'lsh'.
+    lsh_rows : int, optional
+        Number of signature values per band, by default 8. Only applies if `method`
+        is 'lsh'.
+    jobs : int, optional
+        Number of processes used to compare the records. Use -1 to use all
+        processors. The result does not depend on the number of processes. By default
+        1. Only applies if `similar` is set to `True`.
+    cache_dir : str, optional
+        Directory of the cache of normalized texts. If given, the normalized texts
+        are stored in and retrieved from this cache, so repeated runs on the same
+        data with the same normalization options skip the normalization. By default
+        None. Only applies if `similar` is set to `True`.
+    cache_max_size : int, optional
+        Maximum size of the cache in megabytes, by default 500. The least recently
+        used data is removed first.
+    against : str, optional
+        Location of a `DedupIndex` of earlier records. If provided, the records are
+        only deduplicated against the records in the index and against each other,
+        and all records are added to the index. The index is created if it does not
+        exist. Without `similar`, records are duplicates if they have the same pid
+        or the same normalized text. By default None.
+    cluster : bool, optional
+        Keep all records and add a column `duplicate_cluster` with the cluster of
+        each record instead. Records are in the same cluster if they are connected
+        by a chain of duplicates, and clusters are numbered in order of their first
+        record. By default False. Only applies if `similar` is set to `True` and
+        `against` is not used.
+    block : str, optional
+        Comma separated block keys, for example 'year,title_prefix:8'. Records are
+        then only compared by text if they are in the same block for every key, or
+        in an adjacent block (a difference of one year). The keys are 'year',
+        'first_author' and 'title_prefix:N' (the first N characters of the cleaned
+        title). Records with the same pid or the same normalized text are found
+        in any block. By default None. Only applies if `similar` is set to `True`,
+        `against` is not used and `method` is not 'tfidf'.
+    scorer : str, optional
+        Implementation of the similarity score. 'difflib' uses the `SequenceMatcher`
+        of difflib. 'rapidfuzz' gives the same scores, but computes them in batches
+        with the compiled rapidfuzz package, which needs to be installed. By default
+        'difflib'. Only applies if `similar` is set to `True`, `against` is not used
+        and `method` is not 'tfidf'.
+    shard : str, optional
+        Only find the duplicates of shard K of N, given as 'K/N'. The records are
+        split in chunks, and shard K compares the records in every N-th chunk with
+        all later records. The pairs of duplicates are saved to `output_path` and
+        the data object is not changed. Combine the shards with `merge_shards`.
+        By default None. Requires `similar` and can not be combined with
+        `against`.
+    checkpoint_path : str, optional
+        Location of a checkpoint file. If provided, the progress of finding similar
+        records is saved to this file every minute, so an interrupted run can be
+        continued with `resume`. The file is removed when the deduplication is
+        done. By default None. Only applies if `similar` is set to `True` and
+        `against` is not used.
+    resume : bool, optional
+        Continue from the checkpoint at `checkpoint_path`. The checkpoint is only
+        used if the data and the options that change the result are the same,
+        otherwise the deduplication starts from the beginning. By default False.
+    report_path : str, optional
+        Location of a report of the pairs of duplicates, a '.csv' or '.html' file.
+        Every pair is written to the report as soon as it is found, with the record
+        ids, how the records matched ('text', 'pid' or 'similar'), the similarity
+        score and the pids. By default None. Only applies if `similar` is set to
+        `True` and `against` is not used.
+    report_diff : bool, optional
+        Add the difference between the texts of the records of every pair to the
+        report, by default False.
+    profile_path : str, optional
+        Location of a JSON file with the wall time of each stage of the
+        deduplication in seconds and counters of the work done, such as the number
+        of candidates, compared pairs and calls of each ratio of the similarity
+        score and the pairs they rejected. By default None.
     """
+    profile = Profile()
+
+    if shard is not None:
+        if not similar or against is not None:
+            raise ValueError(
+                "Sharding requires similarity deduplication and can not be combined"
+                " with an index of earlier records."
+            )
+        if output_path is None:
+            raise ValueError("Sharding requires an output path for the pairs.")
+
+        _write_shard(
+            asdata,
+            output_path,
+            shard,
+            pid,
+            threshold=threshold,
+            title_only=title_only,
+            stopwords_language=stopwords_language,
+            strict=strict,
+            method=method,
+            lsh_bands=lsh_bands,
+            lsh_rows=lsh_rows,
+            jobs=jobs,
+            cache_dir=cache_dir,
+            cache_max_size=cache_max_size,
+            cluster=cluster,
+            block=block,
+            scorer=scorer,
+            checkpoint_path=checkpoint_path,
+            resume=resume,
+            report_path=report_path,
+            report_diff=report_diff,
+            profile=profile,
+        )
+        if profile_path is not None:
+            profile.save(profile_path)
+        return
+
     initial_length = len(asdata.df)
 
-    if not similar:
+    if against is not None:
+        with profile.stage("against"):
+            _drop_duplicates_against(
+                asdata=asdata,
+                index_path=against,
+                pid=pid,
+                similar=similar,
+                threshold=threshold,
+                title_only=title_only,
+                stopwords_language=stopwords_language,
+                strict=strict,
+            )
+
+    elif not similar:
         if pid not in asdata.df.columns:
             print(f"Not using {pid} for deduplication because there is no such data.")
 
         # retrieve deduplicated ASReview data object
-        asdata.drop_duplicates(pid=pid, inplace=True)
+        with profile.stage("drop_duplicates"):
+            asdata.drop_duplicates(pid=pid, inplace=True)
 
     else:
         _drop_duplicates_by_similarity(
@@ -217,11 +1769,35 @@ def deduplicate_data(
             stopwords_language=stopwords_language,
             strict=strict,
             verbose=verbose,
+            method=method,
+            lsh_bands=lsh_bands,
+            lsh_rows=lsh_rows,
+            jobs=jobs,
+            cache_dir=cache_dir,
+            cache_max_size=cache_max_size,
+            cluster=cluster,
+            block=block,
+            scorer=scorer,
+            checkpoint_path=checkpoint_path,
+            resume=resume,
+            report_path=report_path,
+            report_diff=report_diff,
+            profile=profile,
         )
 
     if output_path:
-        asdata.to_file(output_path)
+        with profile.stage("write"):
+            asdata.to_file(output_path)
+
+    if checkpoint_path is not None:
+        Path(checkpoint_path).unlink(missing_ok=True)
 
     # count duplicates
-    n_dup = initial_length - len(asdata.df)
+    if cluster and similar and against is None:
+        n_dup = initial_length - asdata.df["duplicate_cluster"].nunique()
+    else:
+        n_dup = initial_length - len(asdata.df)
     print(f"Found {n_dup} duplicates in dataset with {initial_length} records.")
+
+    if profile_path is not None:
+        profile.save(profile_path)
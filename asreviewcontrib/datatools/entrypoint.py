@@ -1,18 +1,24 @@
 import argparse
+from pathlib import Path
 
 from asreview.data import load_data
 from asreview.entry_points import BaseEntryPoint
 
 from asreviewcontrib.datatools import __version__
+from asreviewcontrib.datatools.cache import DEFAULT_CACHE_SIZE
 from asreviewcontrib.datatools.compose import _parse_arguments_compose
 from asreviewcontrib.datatools.compose import compose
 from asreviewcontrib.datatools.convert import _parse_arguments_convert
 from asreviewcontrib.datatools.convert import convert
+from asreviewcontrib.datatools.dedup import DEDUP_METHODS
 from asreviewcontrib.datatools.dedup import deduplicate_data
+from asreviewcontrib.datatools.dedup import merge_shards
 from asreviewcontrib.datatools.describe import _parse_arguments_describe
 from asreviewcontrib.datatools.describe import describe
 from asreviewcontrib.datatools.sample import _parse_arguments_sample
 from asreviewcontrib.datatools.sample import sample
+from asreviewcontrib.datatools.scorers import SCORERS
+from asreviewcontrib.datatools.snapshot import build_snapshot_index
 from asreviewcontrib.datatools.snowball import _parse_arguments_snowball
 from asreviewcontrib.datatools.snowball import snowball
 from asreviewcontrib.datatools.stack import _parse_arguments_vstack
@@ -42,7 +48,37 @@ class DataEntryPoint(BaseEntryPoint):
                 args_convert_parser = _parse_arguments_convert()
                 args_convert = vars(args_convert_parser.parse_args(argv[1:]))
                 convert(**args_convert)
-            if argv[0] == "dedup":
+            if argv[0] == "dedup" and argv[1] == "merge":
+                merge_parser = argparse.ArgumentParser(prog="asreview data dedup merge")
+                merge_parser.add_argument(
+                    "input_path", type=str, help="The file path of the dataset."
+                )
+                merge_parser.add_argument(
+                    "pairs_paths",
+                    nargs="+",
+                    type=str,
+                    help="The file paths of the duplicate pairs of all shards.",
+                )
+                merge_parser.add_argument(
+                    "--output_path",
+                    "-o",
+                    default=None,
+                    type=str,
+                    help="The file path of the output dataset.",
+                )
+                merge_parser.add_argument(
+                    "--verbose", action="store_true", help="Print verbose output."
+                )
+                args_merge = merge_parser.parse_args(argv[2:])
+
+                merge_shards(
+                    asdata=load_data(args_merge.input_path),
+                    pairs_paths=args_merge.pairs_paths,
+                    output_path=args_merge.output_path,
+                    verbose=args_merge.verbose,
+                )
+
+            elif argv[0] == "dedup":
                 dedup_parser = argparse.ArgumentParser(prog="asreview data dedup")
                 dedup_parser.add_argument(
                     "input_path", type=str, help="The file path of the dataset."
@@ -105,6 +141,175 @@ class DataEntryPoint(BaseEntryPoint):
                         " is set to True."
                     ),
                 )
+                dedup_parser.add_argument(
+                    "--method",
+                    default="window",
+                    choices=DEDUP_METHODS,
+                    help=(
+                        "Method to select the records that are compared. 'window'"
+                        " compares all records of similar length, 'lsh' only compares"
+                        " records that are likely similar according to MinHash"
+                        " locality sensitive hashing and 'tfidf' compares all records"
+                        " by the cosine similarity of character n-gram TF-IDF vectors."
+                        " Default: window. Only applies if similarity is set to True."
+                    ),
+                )
+                dedup_parser.add_argument(
+                    "--lsh_bands",
+                    default=16,
+                    type=int,
+                    help=(
+                        "Number of bands of the MinHash signatures. Default: 16. Only"
+                        " applies if method is 'lsh'."
+                    ),
+                )
+                dedup_parser.add_argument(
+                    "--lsh_rows",
+                    default=8,
+                    type=int,
+                    help=(
+                        "Number of signature values per band. Default: 8. Only applies"
+                        " if method is 'lsh'."
+                    ),
+                )
+                dedup_parser.add_argument(
+                    "--jobs",
+                    "-j",
+                    default=1,
+                    type=int,
+                    help=(
+                        "Number of processes used to compare the records. Use -1 to"
+                        " use all processors. Default: 1. Only applies if similarity"
+                        " is set to True."
+                    ),
+                )
+                dedup_parser.add_argument(
+                    "--cache_dir",
+                    default=None,
+                    type=str,
+                    help=(
+                        "Directory to cache the normalized texts in. Repeated runs on"
+                        " the same data with the same normalization options skip the"
+                        " normalization. Default: no cache. Only applies if similarity"
+                        " is set to True."
+                    ),
+                )
+                dedup_parser.add_argument(
+                    "--cache_max_size",
+                    default=DEFAULT_CACHE_SIZE,
+                    type=int,
+                    help=(
+                        "Maximum size of the cache in megabytes. The least recently"
+                        f" used data is removed first. Default: {DEFAULT_CACHE_SIZE}."
+                    ),
+                )
+                dedup_parser.add_argument(
+                    "--against",
+                    default=None,
+                    type=str,
+                    help=(
+                        "File path of an index of earlier records. The records are"
+                        " deduplicated against the index and each other, and are then"
+                        " added to the index. The index is created if it does not"
+                        " exist."
+                    ),
+                )
+                dedup_parser.add_argument(
+                    "--scorer",
+                    default="difflib",
+                    choices=list(SCORERS),
+                    help=(
+                        "Implementation of the similarity score. 'rapidfuzz' gives"
+                        " the same result as 'difflib' but is much faster, it requires"
+                        " the rapidfuzz package. Default: difflib. Only applies if"
+                        " similarity is set to True. Can not be combined with"
+                        " --against."
+                    ),
+                )
+                dedup_parser.add_argument(
+                    "--block",
+                    default=None,
+                    type=str,
+                    help=(
+                        "Comma separated block keys, for example"
+                        " 'year,title_prefix:8'. Records are only compared if they are"
+                        " in the same or an adjacent block. Available keys: year,"
+                        " first_author and title_prefix:N. Only applies if similarity"
+                        " is set to True. Can not be combined with --against."
+                    ),
+                )
+                dedup_parser.add_argument(
+                    "--shard",
+                    default=None,
+                    type=str,
+                    help=(
+                        "Only find the duplicates of shard K of N, for example 1/4,"
+                        " and save the pairs of duplicates to the output path."
+                        " Combine the shards with 'asreview data dedup merge'."
+                        " Requires --similar and can not be combined with --against."
+                    ),
+                )
+                dedup_parser.add_argument(
+                    "--resume",
+                    action="store_true",
+                    help=(
+                        "Save the progress of similarity deduplication every minute"
+                        " to a checkpoint file, and continue an interrupted run from"
+                        " it. The checkpoint is a file next to the input file, unless"
+                        " --checkpoint is given. It is only used if the data and"
+                        " options did not change. Only applies if similarity is set"
+                        " to True."
+                    ),
+                )
+                dedup_parser.add_argument(
+                    "--checkpoint",
+                    default=None,
+                    type=str,
+                    help=(
+                        "File path of the checkpoint of the progress of similarity"
+                        " deduplication. The progress is saved every minute, and"
+                        " an interrupted run continues from it with --resume."
+                        " Default: no checkpoint, or a file next to the input file"
+                        " with --resume. Only applies if similarity is set to True."
+                    ),
+                )
+                dedup_parser.add_argument(
+                    "--report",
+                    default=None,
+                    type=str,
+                    help=(
+                        "File path of a report of the pairs of duplicates, a .csv or"
+                        " .html file. Pairs are written to the report as soon as they"
+                        " are found. Only applies if similarity is set to True."
+                    ),
+                )
+                dedup_parser.add_argument(
+                    "--report_diff",
+                    action="store_true",
+                    help=(
+                        "Add the difference between the texts of every pair to the"
+                        " report."
+                    ),
+                )
+                dedup_parser.add_argument(
+                    "--profile",
+                    default=None,
+                    type=str,
+                    help=(
+                        "File path of a JSON file with the time of each stage of the"
+                        " deduplication and counters of the candidates, comparisons"
+                        " and calls of each ratio of the similarity score."
+                    ),
+                )
+                dedup_parser.add_argument(
+                    "--cluster",
+                    action="store_true",
+                    help=(
+                        "Keep all records and add a column 'duplicate_cluster' with"
+                        " the cluster of duplicates of each record. Only applies if"
+                        " similarity is set to True."
+                    ),
+                )
                 dedup_parser.add_argument(
                     "--verbose",
                     action="store_true",
@@ -115,6 +320,32 @@ class DataEntryPoint(BaseEntryPoint):
                 )
 
                 args_dedup = dedup_parser.parse_args(argv[1:])
+                if args_dedup.shard is not None and (
+                    not args_dedup.similar or args_dedup.against is not None
+                ):
+                    dedup_parser.error(
+                        "--shard requires --similar and can not be combined with"
+                        " --against."
+                    )
+                if args_dedup.against is not None and (
+                    args_dedup.block is not None
+                    or args_dedup.scorer != dedup_parser.get_default("scorer")
+                ):
+                    dedup_parser.error(
+                        "--block and --scorer can not be combined with --against."
+                    )
+
+                # by default, the checkpoint of a resumable run is a file next to the
+                # input file, one for each shard
+                checkpoint_path = args_dedup.checkpoint
+                if (
+                    checkpoint_path is None
+                    and args_dedup.resume
+                    and Path(args_dedup.input_path).is_file()
+                ):
+                    checkpoint_path = f"{args_dedup.input_path}.dedup_checkpoint"
+                    if args_dedup.shard is not None:
+                        checkpoint_path += "_" + args_dedup.shard.replace("/", "_of_")
 
                 # read data in ASReview data object
                 asdata = load_data(args_dedup.input_path)
@@ -128,6 +359,22 @@ class DataEntryPoint(BaseEntryPoint):
                     stopwords_language=args_dedup.stopwords_language,
                     strict=args_dedup.strict,
                     verbose=args_dedup.verbose,
+                    method=args_dedup.method,
+                    lsh_bands=args_dedup.lsh_bands,
+                    lsh_rows=args_dedup.lsh_rows,
+                    jobs=args_dedup.jobs,
+                    cache_dir=args_dedup.cache_dir,
+                    cache_max_size=args_dedup.cache_max_size,
+                    against=args_dedup.against,
+                    cluster=args_dedup.cluster,
+                    block=args_dedup.block,
+                    scorer=args_dedup.scorer,
+                    shard=args_dedup.shard,
+                    checkpoint_path=checkpoint_path,
+                    resume=args_dedup.resume,
+                    report_path=args_dedup.report,
+                    report_diff=args_dedup.report_diff,
+                    profile_path=args_dedup.profile,
                 )
 
             if argv[0] == "compose":
@@ -143,7 +390,26 @@ class DataEntryPoint(BaseEntryPoint):
                     order=args_compose.hierarchy,
                     resolve=args_compose.conflict_resolve,
                 )
-            if argv[0] == "snowball":
+            if argv[0] == "snowball" and argv[1] == "index":
+                index_parser = argparse.ArgumentParser(
+                    prog="asreview data snowball index"
+                )
+                index_parser.add_argument(
+                    "snapshot_path",
+                    type=str,
+                    help=(
+                        "Directory of a local OpenAlex works snapshot with gzipped"
+                        " JSON Lines partitions."
+                    ),
+                )
+                index_parser.add_argument(
+                    "index_dir",
+                    type=str,
+                    help="Directory of the citation index of the snapshot.",
+                )
+                args_index = index_parser.parse_args(argv[2:])
+                build_snapshot_index(args_index.snapshot_path, args_index.index_dir)
+            elif argv[0] == "snowball":
                 args_snowballing_parser = _parse_arguments_snowball()
                 args_snowballing = vars(args_snowballing_parser.parse_args(argv[1:]))
                 snowball(**args_snowballing)
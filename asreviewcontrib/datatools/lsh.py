@@ -0,0 +1,189 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Number of characters (bytes) in a shingle.
+SHINGLE_SIZE = 5
+# Maximum number of shingles hashed at once when computing MinHash signatures.
+MAX_SHINGLES_PER_CHUNK = 2**16
+
+_UINT32_MAX = np.iinfo(np.uint32).max
+
+
+def _mix(x: np.ndarray) -> np.ndarray:
+    """Scramble the bits of 64 bit integers (splitmix64 finalizer)."""
+    x = x ^ (x >> np.uint64(30))
+    x = x * np.uint64(0xBF58476D1CE4E5B9)
+    x = x ^ (x >> np.uint64(27))
+    x = x * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def _shingle_hashes(encoded: list[bytes], shingle_size: int) -> np.ndarray:
+    """Hash all shingles of a list of byte strings in one pass.
+
+    The byte strings are concatenated and the polynomial hash of every window of
+    `shingle_size` bytes is computed at once. Windows crossing the boundary of two
+    byte strings are dropped afterwards.
+    """
+    lengths = np.array([len(b) for b in encoded])
+    buffer = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.uint64)
+
+    powers = np.uint64(257) ** np.arange(shingle_size, dtype=np.uint64)[::-1]
+    window_hashes = sliding_window_view(buffer, shingle_size) @ powers
+
+    n_shingles = lengths - shingle_size + 1
+    starts = np.repeat(np.cumsum(lengths) - lengths, n_shingles)
+    starts += np.arange(n_shingles.sum()) - np.repeat(
+        np.cumsum(n_shingles) - n_shingles, n_shingles
+    )
+    return _mix(window_hashes[starts])
+
+
+def minhash_signatures(
+    texts: list[str],
+    n_permutations: int = 128,
+    shingle_size: int = SHINGLE_SIZE,
+    seed: int = 0,
+) -> np.ndarray:
+    """Compute the MinHash signatures of a list of texts.
+
+    The texts are split in overlapping character shingles. The signature of a text
+    contains, for every random hash function, the minimum hash value of its
+    shingles. The fraction of equal signature values of two texts estimates the
+    Jaccard similarity of their shingle sets.
+
+    Parameters
+    ----------
+    texts : list[str]
+        The texts. Missing texts (None) get a signature of maximum values.
+    n_permutations : int, optional
+        Number of hash functions, by default 128.
+    shingle_size : int, optional
+        Number of characters in a shingle, by default 5. Shorter texts are padded.
+    seed : int, optional
+        Seed used to draw the hash functions, by default 0.
+
+    Returns
+    -------
+    np.ndarray
+        Array of shape (len(texts), n_permutations) with the signatures.
+    """
+    rng = np.random.default_rng(seed)
+    multipliers = rng.integers(0, _UINT32_MAX, (n_permutations, 1), np.uint32) | 1
+    increments = rng.integers(0, _UINT32_MAX, (n_permutations, 1), np.uint32)
+
+    signatures = np.full((len(texts), n_permutations), _UINT32_MAX, np.uint32)
+    rows = [i for i, text in enumerate(texts) if text is not None]
+    encoded = [texts[i].encode().ljust(shingle_size) for i in rows]
+
+    # group the texts in chunks with a bounded number of shingles
+    n_shingles = np.cumsum([len(b) - shingle_size + 1 for b in encoded])
+    start = 0
+    while start < len(rows):
+        offset = n_shingles[start - 1] if start else 0
+        stop = max(
+            np.searchsorted(n_shingles, offset + MAX_SHINGLES_PER_CHUNK, "right"),
+            start + 1,
+        )
+        chunk = encoded[start:stop]
+        hashes = (_shingle_hashes(chunk, shingle_size) >> np.uint64(32)).astype(
+            np.uint32
+        )
+
+        # apply all hash functions (x -> a * x + b mod 2 ** 32) to all shingles
+        permuted = np.empty((n_permutations, len(hashes)), np.uint32)
+        np.multiply(multipliers, hashes, out=permuted)
+        permuted += increments
+
+        chunk_lengths = np.array([len(b) - shingle_size + 1 for b in chunk])
+        signatures[rows[start:stop]] = np.minimum.reduceat(
+            permuted, np.cumsum(chunk_lengths) - chunk_lengths, axis=1
+        ).T
+        start = stop
+
+    return signatures
+
+
+class LSHIndex:
+    """Locality sensitive hashing index of MinHash signatures.
+
+    The signatures are split in `bands` bands of `rows` values. Two records are
+    candidates if all values in at least one band are equal, so they are hashed to
+    the same bucket. Records with a Jaccard similarity `s` become candidates with a
+    probability of `1 - (1 - s ** rows) ** bands`.
+
+    Parameters
+    ----------
+    signatures : np.ndarray
+        MinHash signatures with at least `bands * rows` columns.
+    bands : int, optional
+        Number of bands, by default 16.
+    rows : int, optional
+        Number of signature values per band, by default 8.
+    mask : np.ndarray, optional
+        Boolean array indicating which records to add to the index. By default all
+        records are added.
+    """
+
+    def __init__(
+        self,
+        signatures: np.ndarray,
+        bands: int = 16,
+        rows: int = 8,
+        mask: np.ndarray = None,
+    ):
+        if signatures.shape[1] < bands * rows:
+            raise ValueError(
+                f"Signatures of length {signatures.shape[1]} are too short for"
+                f" {bands} bands of {rows} rows."
+            )
+
+        self.bands = bands
+        self.rows = rows
+
+        records = np.arange(len(signatures))
+        if mask is not None:
+            records = records[mask]
+
+        self.bucket_of = np.full((bands, len(signatures)), -1)
+        self.members = []
+        self.offsets = []
+        for band in range(bands):
+            keys = np.zeros(len(records), np.uint64)
+            for value in signatures[records, band * rows : (band + 1) * rows].T:
+                keys = _mix(keys ^ value.astype(np.uint64))
+
+            _, inverse, counts = np.unique(
+                keys, return_inverse=True, return_counts=True
+            )
+            self.bucket_of[band, records] = inverse
+            self.members.append(records[np.argsort(inverse, kind="stable")])
+            self.offsets.append(np.concatenate([[0], np.cumsum(counts)]))
+
+    def candidates(self, i: int) -> np.ndarray:
+        """Get the records sharing at least one bucket with a record.
+
+        Parameters
+        ----------
+        i : int
+            Position of the record.
+
+        Returns
+        -------
+        np.ndarray
+            Sorted positions of the candidate records, excluding `i` itself.
+        """
+        rows = []
+        for band in range(self.bands):
+            bucket = self.bucket_of[band, i]
+            if bucket < 0:
+                return np.empty(0, dtype=int)
+            start, stop = self.offsets[band][bucket : bucket + 2]
+            if stop - start > 1:
+                rows.append(self.members[band][start:stop])
+
+        if not rows:
+            return np.empty(0, dtype=int)
+
+        rows = np.unique(np.concatenate(rows))
+        return rows[rows != i]
@@ -0,0 +1,150 @@
+import re
+from functools import lru_cache
+
+import ftfy
+import pandas as pd
+
+from asreviewcontrib.datatools.profiling import Profile
+
+# Version of the normalization. Increase it when the normalized texts change, so
+# cached normalized texts are invalidated.
+NORMALIZATION_VERSION = 1
+
+SYMBOLS_REGEX = re.compile(r"[^ \w\d\-_]")
+SPACES_REGEX = re.compile(r"\s+")
+WORDS_REGEX = re.compile(r"(\w+)")
+DOI_PREFIX_REGEX = re.compile(r"^(https?://)?(www\.|dx\.)?doi\.org/|^doi:\s*")
+
+
+def _needs_ftfy(text: str) -> bool:
+    """Check if `ftfy.fix_text` can change the normalized text.
+
+    For ASCII text, ftfy only unescapes HTML entities and removes terminal escape
+    sequences. Everything else it changes in ASCII text is removed by the symbol
+    filter anyway.
+    """
+    return not text.isascii() or "&" in text or "\x1b" in text
+
+
+def _clean_text(text: str) -> str:
+    return SPACES_REGEX.sub(" ", SYMBOLS_REGEX.sub("", text)).lower().strip() or None
+
+
+@lru_cache
+def load_stopwords(language: str) -> frozenset:
+    """Load the NLTK stopwords of a language.
+
+    The stopwords are downloaded if they are not available yet.
+
+    Parameters
+    ----------
+    language : str
+        Language of the stopwords, for example 'english'.
+
+    Returns
+    -------
+    frozenset
+        The stopwords.
+    """
+    try:
+        from nltk.corpus import stopwords
+
+        return frozenset(stopwords.words(language))
+    except LookupError:
+        import nltk
+
+        nltk.download("stopwords")
+        return frozenset(stopwords.words(language))
+
+
+def remove_stopwords(texts: list[str], stopwords: frozenset) -> list[str]:
+    """Remove stopwords from a batch of texts.
+
+    Every text is split once in words and the parts between them. The words that are
+    in `stopwords` are dropped and the other parts are kept as they are, so the
+    whitespace around a removed word remains.
+
+    Parameters
+    ----------
+    texts : list[str]
+        The texts. Missing texts (None) are returned as None.
+    stopwords : frozenset
+        The stopwords.
+
+    Returns
+    -------
+    list[str]
+        The texts without stopwords.
+    """
+    output = []
+    for text in texts:
+        if text is None:
+            output.append(None)
+            continue
+
+        parts = WORDS_REGEX.split(text)
+        parts[1::2] = ["" if word in stopwords else word for word in parts[1::2]]
+        output.append("".join(parts))
+    return output
+
+
+def normalize_texts(
+    texts: list[str], stopwords_language: str = None, profile: Profile = None
+) -> list[str]:
+    """Normalize a batch of texts for comparison.
+
+    The texts are fixed with `ftfy` (skipped for ASCII texts where it has no
+    effect), all characters except word characters, spaces and hyphens are removed,
+    consecutive spaces are collapsed and the texts are lowercased and stripped.
+
+    Parameters
+    ----------
+    texts : list[str]
+        The texts.
+    stopwords_language : str, optional
+        Remove the stopwords of this language after normalizing, for example
+        'english'. By default None.
+    profile : Profile, optional
+        If given, the time of the stages 'ftfy', 'clean' and 'stopwords' is added
+        to this profile, and the number of texts fixed with ftfy is counted as
+        'ftfy_texts'. By default None.
+
+    Returns
+    -------
+    list[str]
+        The normalized texts. Missing texts and texts that are empty after
+        normalization are None.
+    """
+    if profile is None:
+        profile = Profile()
+
+    with profile.stage("ftfy"):
+        texts = [None if pd.isna(text) else text for text in texts]
+        needs_ftfy = [i for i, text in enumerate(texts) if text and _needs_ftfy(text)]
+        for i in needs_ftfy:
+            texts[i] = ftfy.fix_text(texts[i])
+        profile.counts["ftfy_texts"] += len(needs_ftfy)
+
+    with profile.stage("clean"):
+        texts = [None if text is None else _clean_text(text) for text in texts]
+
+    if stopwords_language:
+        with profile.stage("stopwords"):
+            texts = remove_stopwords(texts, load_stopwords(stopwords_language))
+    return texts
+
+
+def normalize_doi(doi: str) -> str:
+    """Normalize a DOI, so different forms of the same DOI are equal.
+
+    Parameters
+    ----------
+    doi : str
+        The DOI, possibly as a URL or with a 'doi:' prefix.
+
+    Returns
+    -------
+    str
+        The lowercase DOI without a URL or 'doi:' prefix.
+    """
+    return DOI_PREFIX_REGEX.sub("", doi.strip().lower())
@@ -0,0 +1,53 @@
+import json
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+
+class Profile:
+    """Wall time of the stages of a run and counters of the work done.
+
+    A stage that is entered more than once accumulates its time. Stages are kept
+    in the order in which they were first entered. The total time is measured from
+    the creation of the profile.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.timings = {}
+        self.counts = Counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        """Measure the wall time of a stage.
+
+        Parameters
+        ----------
+        name : str
+            Name of the stage.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings[name] = self.timings.get(name, 0.0) + elapsed
+
+    def to_dict(self) -> dict:
+        """Get the timings in seconds and the counts."""
+        timings = {**self.timings, "total": time.perf_counter() - self.start}
+        return {
+            "timings": {name: round(t, 6) for name, t in timings.items()},
+            "counts": {name: int(n) for name, n in sorted(self.counts.items())},
+        }
+
+    def save(self, path: str) -> None:
+        """Save the timings and counts to a JSON file.
+
+        Parameters
+        ----------
+        path : str
+            Location of the JSON file.
+        """
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
@@ -0,0 +1,168 @@
+import csv
+import html
+from difflib import SequenceMatcher
+from pathlib import Path
+
+import pandas as pd
+
+# Formats of the report of duplicate pairs, by file extension.
+REPORT_FORMATS = [".csv", ".html"]
+
+_HTML_HEADER = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Duplicate pairs</title>
+<style>
+body { font-family: sans-serif; }
+table { border-collapse: collapse; }
+td, th { border: 1px solid #ccc; padding: 4px; vertical-align: top; }
+del { background: #fdd; }
+ins { background: #dfd; text-decoration: none; }
+</style>
+</head>
+<body>
+<table>
+"""
+
+_HTML_FOOTER = """</table>
+</body>
+</html>
+"""
+
+
+def _diff(text_1: str, text_2: str, markup: dict) -> str:
+    """Describe the changes from one text to another with markup."""
+    if pd.isna(text_1) or pd.isna(text_2):
+        return ""
+
+    seq_matcher = SequenceMatcher(None, text_1, text_2, autojunk=False)
+    parts = []
+    for tag, i1, i2, j1, j2 in seq_matcher.get_opcodes():
+        if tag == "equal":
+            parts.append(markup["escape"](text_1[i1:i2]))
+        if tag in ("replace", "delete"):
+            parts.append(markup["delete"].format(markup["escape"](text_1[i1:i2])))
+        if tag in ("replace", "insert"):
+            parts.append(markup["insert"].format(markup["escape"](text_2[j1:j2])))
+    return "".join(parts)
+
+
+_CSV_MARKUP = {"escape": str, "delete": "[-{}-]", "insert": "{{+{}+}}"}
+_HTML_MARKUP = {
+    "escape": html.escape,
+    "delete": "<del>{}</del>",
+    "insert": "<ins>{}</ins>",
+}
+
+
+class PairReport:
+    """Report of pairs of duplicates, written to a file while they are found.
+
+    Every pair is written to the file right away, so the pairs are not kept in
+    memory. The format is CSV or HTML, depending on the extension of the file.
+
+    Parameters
+    ----------
+    path : str
+        Location of the report, ending with '.csv' or '.html'.
+    texts : pd.Series
+        The texts of the records, used for the diff.
+    record_ids : pd.Index
+        The record identifiers of the records.
+    pid : str
+        Name of the persistent identifier.
+    pids : pd.Series, optional
+        The persistent identifiers of the records, by default None.
+    diff : bool, optional
+        Add the difference between the texts of every pair, by default False.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        texts: pd.Series,
+        record_ids: pd.Index,
+        pid: str,
+        pids: pd.Series = None,
+        diff: bool = False,
+    ):
+        self.format = Path(path).suffix.lower()
+        if self.format not in REPORT_FORMATS:
+            raise ValueError(
+                f"Unknown report format '{self.format}', use one of {REPORT_FORMATS}."
+            )
+
+        self.path = path
+        self.texts = texts
+        self.record_ids = record_ids
+        self.pids = pids
+        self.diff = diff
+        self.n_pairs = 0
+
+        self.columns = ["record_id_1", "record_id_2", "match", "score"]
+        if pids is not None:
+            self.columns += [f"{pid}_1", f"{pid}_2"]
+        if diff:
+            self.columns.append("diff")
+
+    def __enter__(self) -> "PairReport":
+        self.file = open(self.path, "w", newline="", encoding="utf-8")
+        if self.format == ".csv":
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(self.columns)
+        else:
+            self.file.write(_HTML_HEADER)
+            self.file.write(
+                "<tr>" + "".join(f"<th>{c}</th>" for c in self.columns) + "</tr>\n"
+            )
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self.format == ".html":
+            self.file.write(_HTML_FOOTER)
+        self.file.close()
+
+    def write(self, i: int, j: int, match: str, score: float = None) -> None:
+        """Write a pair of duplicates to the report.
+
+        Parameters
+        ----------
+        i : int
+            Position of the first record.
+        j : int
+            Position of the record that is a duplicate of the first record.
+        match : str
+            How the pair was matched, for example 'text' or 'pid'.
+        score : float, optional
+            Similarity score of the texts of the records, by default None.
+        """
+        row = [
+            self.record_ids[i],
+            self.record_ids[j],
+            match,
+            None if score is None else round(score, 4),
+        ]
+        if self.pids is not None:
+            row += [self.pids.iloc[i], self.pids.iloc[j]]
+        row = ["" if pd.isna(value) else value for value in row]
+
+        # the diff is only computed when the pair is written
+        if self.format == ".csv":
+            if self.diff:
+                row.append(_diff(self.texts.iloc[i], self.texts.iloc[j], _CSV_MARKUP))
+            self.writer.writerow(row)
+        else:
+            cells = [html.escape(str(value)) for value in row]
+            if self.diff:
+                cells.append(
+                    _diff(self.texts.iloc[i], self.texts.iloc[j], _HTML_MARKUP)
+                )
+            self.file.write(
+                "<tr>" + "".join(f"<td>{cell}</td>" for cell in cells) + "</tr>\n"
+            )
+        self.n_pairs += 1
+
+    def flush(self) -> None:
+        """Write the buffered pairs to the file."""
+        self.file.flush()
@@ -0,0 +1,212 @@
+from collections import Counter
+from difflib import SequenceMatcher
+
+import numpy as np
+
+
+def _is_similar(seq_matcher: SequenceMatcher, threshold: float, strict: bool) -> bool:
+    return (
+        seq_matcher.real_quick_ratio() > threshold
+        and seq_matcher.quick_ratio() > threshold
+        and (not strict or seq_matcher.ratio() > threshold)
+    )
+
+
+def _sort_characters(text: str) -> str:
+    # sorting the code points with numpy is much faster than sorted() on long texts
+    code_points = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+    return np.sort(code_points).tobytes().decode("utf-32-le")
+
+
+class DifflibScorer:
+    """Score the similarity of texts with the `SequenceMatcher` of difflib.
+
+    Two texts are similar if the `real_quick_ratio` and the `quick_ratio` of the
+    `SequenceMatcher` are above the threshold, and with `strict` also the `ratio`.
+    The number of calls of each ratio and the number of pairs it rejected are
+    counted in `counts`.
+
+    Parameters
+    ----------
+    texts : list[str]
+        The cleaned texts.
+    threshold : float
+        Threshold score above which two texts are similar.
+    strict : bool, optional
+        Also use the ratio of the SequenceMatcher, by default False.
+    """
+
+    def __init__(self, texts: list[str], threshold: float, strict: bool = False):
+        self.texts = texts
+        self.threshold = threshold
+        self.strict = strict
+        self.seq_matcher = SequenceMatcher()
+        self.counts = Counter()
+
+    def _count(self, stage: str, n_calls: int, n_passed: int) -> None:
+        self.counts[stage] += int(n_calls)
+        self.counts[f"rejected_{stage}"] += int(n_calls - n_passed)
+
+    def similar(self, i: int, rows: list[int]) -> list[bool]:
+        """Check which texts are similar to the text of a record.
+
+        Parameters
+        ----------
+        i : int
+            Position of the record.
+        rows : list[int]
+            Positions of the records to compare with. Their texts can not be None.
+
+        Returns
+        -------
+        list[bool]
+            For every record in `rows`, whether its text is similar.
+        """
+        # set_seq2 caches information about the text, and only recomputes it when
+        # the text changes
+        seq_matcher = self.seq_matcher
+        threshold = self.threshold
+        seq_matcher.set_seq2(self.texts[i])
+
+        # same as _is_similar, but counting the pairs that pass each ratio
+        similar = []
+        n_quick = n_ratio = 0
+        for j in rows:
+            seq_matcher.set_seq1(self.texts[j])
+            if seq_matcher.real_quick_ratio() <= threshold:
+                similar.append(False)
+                continue
+            n_quick += 1
+            if seq_matcher.quick_ratio() <= threshold:
+                similar.append(False)
+                continue
+            n_ratio += 1
+            similar.append(not self.strict or seq_matcher.ratio() > threshold)
+
+        self._count("real_quick_ratio", len(rows), n_quick)
+        self._count("quick_ratio", n_quick, n_ratio)
+        if self.strict:
+            self._count("ratio", n_ratio, sum(similar))
+        return similar
+
+    def score(self, i: int, j: int) -> float:
+        """Get the similarity score of the texts of two records.
+
+        This is the `ratio` of the `SequenceMatcher` with `strict`, and otherwise
+        the `quick_ratio`.
+
+        Parameters
+        ----------
+        i : int
+            Position of the first record.
+        j : int
+            Position of the second record.
+
+        Returns
+        -------
+        float
+            The similarity score.
+        """
+        self.seq_matcher.set_seq2(self.texts[i])
+        self.seq_matcher.set_seq1(self.texts[j])
+        if self.strict:
+            return self.seq_matcher.ratio()
+        return self.seq_matcher.quick_ratio()
+
+
+class RapidfuzzScorer(DifflibScorer):
+    """Score the similarity of texts in batches with rapidfuzz.
+
+    This scorer gives the same result as `DifflibScorer`, but scores a record
+    against all records to compare with in one call to compiled code. The
+    `quick_ratio` of difflib counts the characters two texts have in common
+    regardless of their order. This equals the longest common subsequence of the
+    texts with sorted characters, which rapidfuzz computes as the Indel distance.
+    With `strict`, the Indel similarity of the texts themselves is an upper bound of
+    the `ratio` of difflib, so only the texts above the threshold are compared with
+    difflib. The pairs rejected by this prefilter are counted as 'indel'.
+
+    Parameters
+    ----------
+    texts : list[str]
+        The cleaned texts.
+    threshold : float
+        Threshold score above which two texts are similar.
+    strict : bool, optional
+        Also use the ratio of the SequenceMatcher, by default False.
+    """
+
+    def __init__(self, texts: list[str], threshold: float, strict: bool = False):
+        try:
+            from rapidfuzz.distance import Indel  # noqa: F401
+        except ImportError as err:
+            raise ImportError(
+                "The rapidfuzz scorer requires rapidfuzz. Install it with"
+                " 'pip install rapidfuzz'."
+            ) from err
+
+        super().__init__(texts, threshold, strict)
+        self.sorted_texts = [
+            None if text is None else _sort_characters(text) for text in texts
+        ]
+        self.lengths = np.array([0 if text is None else len(text) for text in texts])
+
+    def _above_threshold(
+        self, text: str, others: list[str], totals: np.ndarray
+    ) -> np.ndarray:
+        from rapidfuzz.distance import Indel
+        from rapidfuzz.process import cdist
+
+        # distances above the cutoff can not reach the threshold for any pair
+        cutoff = int(totals.max() * (1 - self.threshold))
+        distances = cdist(
+            [text], others, scorer=Indel.distance, score_cutoff=cutoff, dtype=np.int32
+        )[0]
+        # same computation as difflib, 2.0 * matches / length
+        return 2.0 * ((totals - distances) // 2) / totals > self.threshold
+
+    def similar(self, i: int, rows: list[int]) -> list[bool]:
+        """Check which texts are similar to the text of a record.
+
+        See `DifflibScorer.similar`.
+        """
+        rows = np.asarray(rows, dtype=int)
+        totals = self.lengths[rows] + self.lengths[i]
+        similar = (
+            2.0 * np.minimum(self.lengths[rows], self.lengths[i]) / totals
+            > self.threshold
+        )
+        self._count("real_quick_ratio", len(rows), similar.sum())
+
+        selected = np.flatnonzero(similar)
+        if len(selected):
+            similar[selected] = self._above_threshold(
+                self.sorted_texts[i],
+                [self.sorted_texts[j] for j in rows[selected]],
+                totals[selected],
+            )
+        self._count("quick_ratio", len(selected), similar.sum())
+
+        if self.strict:
+            selected = np.flatnonzero(similar)
+            if len(selected):
+                similar[selected] = self._above_threshold(
+                    self.texts[i],
+                    [self.texts[j] for j in rows[selected]],
+                    totals[selected],
+                )
+            self._count("indel", len(selected), similar.sum())
+
+            # the texts passed the real_quick_ratio and quick_ratio already
+            selected = np.flatnonzero(similar)
+            self.seq_matcher.set_seq2(self.texts[i])
+            for k in selected.tolist():
+                self.seq_matcher.set_seq1(self.texts[rows[k]])
+                similar[k] = self.seq_matcher.ratio() > self.threshold
+            self._count("ratio", len(selected), similar.sum())
+
+        return similar.tolist()
+
+
+# Available scorers of the similarity of texts.
+SCORERS = {"difflib": DifflibScorer, "rapidfuzz": RapidfuzzScorer}
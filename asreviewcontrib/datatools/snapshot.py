@@ -0,0 +1,304 @@
+import gzip
+import hashlib
+import json
+import re
+from array import array
+from pathlib import Path
+
+import numpy as np
+import pyalex
+
+from asreviewcontrib.datatools.normalize import normalize_doi
+
+# Version of the layout of the snapshot index. Increase it when the layout changes,
+# so an index of an older version is not used.
+SNAPSHOT_INDEX_VERSION = 1
+
+WORK_ID_PREFIX = "https://openalex.org/W"
+WORK_ID_REGEX = re.compile(r"W(\d+)$")
+
+
+def _work_number(identifier: str) -> int:
+    """Get the number of an OpenAlex work identifier, or -1 if it is not one."""
+    match = WORK_ID_REGEX.search(identifier)
+    return int(match.group(1)) if match else -1
+
+
+def _doi_hash(doi: str) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(doi.encode(), digest_size=8).digest(), "little", signed=True
+    )
+
+
+def build_snapshot_index(snapshot_path: str, index_dir: str) -> None:
+    """Build the citation index of a local OpenAlex works snapshot.
+
+    The snapshot is a directory with gzipped JSON Lines partitions of works, such as
+    the directory 'data/works' of the OpenAlex snapshot. The index holds the works
+    with the fields used for snowballing, the references of every work and the
+    works citing every work. The references and citations are stored in
+    compressed sparse row arrays, so they can be memory-mapped. References to works
+    that are not in the snapshot are left out. If a work is in the snapshot more
+    than once, the last one in the sorted partitions is used.
+
+    Parameters
+    ----------
+    snapshot_path : str
+        Directory of the snapshot. All '.gz' files in it and its subdirectories are
+        read.
+    index_dir : str
+        Directory of the index. It is created if it does not exist.
+
+    Raises
+    ------
+    ValueError
+        If there are no works in the snapshot.
+    """
+    partitions = sorted(Path(snapshot_path).rglob("*.gz"))
+    Path(index_dir).mkdir(parents=True, exist_ok=True)
+
+    # arrays of 64-bit integers take much less memory than lists
+    numbers = array("q")
+    offsets = array("q")
+    doi_hashes = array("q")
+    has_doi = array("b")
+    n_refs = array("q")
+    refs = array("q")
+    with open(Path(index_dir, "works.jsonl"), "wb") as works_file:
+        for partition in partitions:
+            print(f"Reading {partition}")
+            with gzip.open(partition, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    work = json.loads(line)
+                    record = {
+                        "id": work["id"],
+                        "doi": work.get("doi"),
+                        "title": work.get("title"),
+                        "abstract": pyalex.Work(work)["abstract"],
+                        "publication_date": work.get("publication_date"),
+                    }
+                    offsets.append(works_file.tell())
+                    works_file.write((json.dumps(record) + "\n").encode())
+
+                    numbers.append(_work_number(work["id"]))
+                    has_doi.append(record["doi"] is not None)
+                    doi_hashes.append(
+                        0
+                        if record["doi"] is None
+                        else _doi_hash(normalize_doi(work["doi"]))
+                    )
+                    references = work.get("referenced_works") or []
+                    n_refs.append(len(references))
+                    refs.extend(_work_number(ref) for ref in references)
+
+    if not numbers:
+        raise ValueError(f"No works found in the snapshot at {snapshot_path}.")
+
+    numbers = np.frombuffer(numbers, dtype=np.int64)
+    n_refs = np.frombuffer(n_refs, dtype=np.int64)
+    refs = np.frombuffer(refs, dtype=np.int64)
+
+    # sort the works by number, keeping the last of works that are there more than once
+    order = np.argsort(numbers, kind="stable")
+    is_last = np.append(numbers[order][1:] != numbers[order][:-1], True)
+    order = order[is_last]
+    ids = numbers[order]
+    n_works = len(ids)
+
+    # the references in the order of the sorted works
+    starts = np.concatenate([[0], np.cumsum(n_refs)])[:-1][order]
+    lengths = n_refs[order]
+    indptr = np.concatenate([[0], np.cumsum(lengths)])
+    ref_numbers = refs[np.repeat(starts - indptr[:-1], lengths) + np.arange(indptr[-1])]
+
+    # keep the references to works in the snapshot, as positions of the sorted works
+    positions = np.searchsorted(ids, ref_numbers).clip(max=n_works - 1)
+    found = ids[positions] == ref_numbers
+    ref_indptr = np.concatenate([[0], np.cumsum(found)])[indptr]
+    ref_indices = positions[found]
+
+    # the works citing every work are the reverse of the references
+    citing = np.repeat(np.arange(n_works), np.diff(ref_indptr))
+    by_cited = np.argsort(ref_indices, kind="stable")
+    cited_by_indices = citing[by_cited]
+    cited_by_indptr = np.concatenate(
+        [[0], np.cumsum(np.bincount(ref_indices, minlength=n_works))]
+    )
+
+    # the works of the DOIs, sorted by the hash of the normalized DOI
+    with_doi = np.frombuffer(has_doi, dtype=np.int8)[order].astype(bool)
+    doi_positions = np.arange(n_works)[with_doi]
+    doi_keys = np.frombuffer(doi_hashes, dtype=np.int64)[order][with_doi]
+    by_doi = np.argsort(doi_keys, kind="stable")
+
+    arrays = {
+        "ids": ids,
+        "offsets": np.frombuffer(offsets, dtype=np.int64)[order],
+        "ref_indptr": ref_indptr,
+        "ref_indices": ref_indices,
+        "cited_by_indptr": cited_by_indptr,
+        "cited_by_indices": cited_by_indices,
+        "doi_hashes": doi_keys[by_doi],
+        "doi_positions": doi_positions[by_doi],
+    }
+    for name, values in arrays.items():
+        np.save(Path(index_dir, f"{name}.npy"), values)
+    with open(Path(index_dir, "index.json"), "w") as f:
+        json.dump(
+            {
+                "version": SNAPSHOT_INDEX_VERSION,
+                "n_works": n_works,
+                "n_references": len(ref_indices),
+            },
+            f,
+        )
+    print(f"Indexed {n_works} works with {len(ref_indices)} references")
+
+
+class SnapshotIndex:
+    """Citation index of a local OpenAlex works snapshot.
+
+    The references and citations are read from memory-mapped arrays, and the works
+    from the works file of the index. The index has the same methods to get works as
+    `OpenAlexCache` in offline mode, so it can be used in its place to snowball
+    without requests to OpenAlex. Build the index with `build_snapshot_index`.
+
+    Parameters
+    ----------
+    index_dir : str
+        Directory of the index.
+
+    Raises
+    ------
+    ValueError
+        If the directory does not contain an index of the current version.
+    """
+
+    # works that are not in the snapshot are never requested from OpenAlex
+    offline = True
+
+    def __init__(self, index_dir: str):
+        meta_path = Path(index_dir, "index.json")
+        if not meta_path.exists():
+            raise ValueError(f"No snapshot index found in {index_dir}.")
+        with open(meta_path) as f:
+            if json.load(f)["version"] != SNAPSHOT_INDEX_VERSION:
+                raise ValueError(
+                    f"The snapshot index in {index_dir} was built with another version."
+                    " Build it again with 'asreview data snowball index'."
+                )
+
+        self.works_path = Path(index_dir, "works.jsonl")
+        for name in [
+            "ids",
+            "offsets",
+            "ref_indptr",
+            "ref_indices",
+            "cited_by_indptr",
+            "cited_by_indices",
+            "doi_hashes",
+            "doi_positions",
+        ]:
+            setattr(self, name, np.load(Path(index_dir, f"{name}.npy"), mmap_mode="r"))
+
+    def _positions(self, identifiers: list[str]) -> dict[str, int]:
+        """Get the positions of the works in the index, for those that are in it."""
+        identifiers = list(dict.fromkeys(identifiers))
+        numbers = np.array([_work_number(i) for i in identifiers], dtype=np.int64)
+        positions = np.searchsorted(self.ids, numbers).clip(max=len(self.ids) - 1)
+        found = self.ids[positions] == numbers
+        return {
+            identifier: int(position)
+            for identifier, position, is_found in zip(identifiers, positions, found)
+            if is_found
+        }
+
+    def _read(self, positions: list[int]) -> list[dict]:
+        """Read the works at positions in the index, with their references."""
+        works = []
+        with open(self.works_path, "rb") as f:
+            for position in positions:
+                f.seek(self.offsets[position])
+                work = json.loads(f.readline())
+                references = self.ref_indices[
+                    self.ref_indptr[position] : self.ref_indptr[position + 1]
+                ]
+                work["referenced_works"] = [
+                    f"{WORK_ID_PREFIX}{self.ids[ref]}" for ref in references
+                ]
+                works.append(work)
+        return works
+
+    def get_works(self, identifiers: list[str]) -> dict[str, dict]:
+        """Get works from the index.
+
+        Parameters
+        ----------
+        identifiers : list[str]
+            OpenAlex identifiers of the works.
+
+        Returns
+        -------
+        dict[str, dict]
+            The works that are in the index, by identifier.
+        """
+        positions = self._positions(identifiers)
+        return dict(zip(positions, self._read(list(positions.values()))))
+
+    def get_aliases(self, identifiers: list[str]) -> dict[str, str]:
+        """Get the identifiers of the works that identifiers redirect to.
+
+        A snapshot has no redirects, so this is always empty.
+        """
+        return {}
+
+    def get_citing(self, identifiers: list[str]) -> dict[str, list[dict]]:
+        """Get the works citing works from the index.
+
+        Parameters
+        ----------
+        identifiers : list[str]
+            OpenAlex identifiers of the cited works.
+
+        Returns
+        -------
+        dict[str, list[dict]]
+            The citing works of the cited works that are in the index, by identifier
+            of the cited work.
+        """
+        return {
+            identifier: self._read(
+                self.cited_by_indices[
+                    self.cited_by_indptr[position] : self.cited_by_indptr[position + 1]
+                ]
+            )
+            for identifier, position in self._positions(identifiers).items()
+        }
+
+    def get_dois(self, dois: list[str]) -> dict[str, str]:
+        """Get the OpenAlex identifiers of DOIs from the index.
+
+        Parameters
+        ----------
+        dois : list[str]
+            The normalized DOIs.
+
+        Returns
+        -------
+        dict[str, str]
+            The OpenAlex identifiers of the DOIs that are in the index, by DOI.
+        """
+        id_mapping = {}
+        for doi in dict.fromkeys(dois):
+            key = _doi_hash(doi)
+            i = np.searchsorted(self.doi_hashes, key)
+            # check the DOIs of the works with the same hash
+            while i < len(self.doi_hashes) and self.doi_hashes[i] == key:
+                work = self._read([self.doi_positions[i]])[0]
+                if normalize_doi(work["doi"]) == doi:
+                    id_mapping[doi] = work["id"]
+                    break
+                i += 1
+        return id_mapping
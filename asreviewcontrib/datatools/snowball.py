@@ -1,18 +1,42 @@
 from __future__ import annotations
 
 import argparse
+import contextlib
+import csv
+import json
+import os
+import random
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable
+from collections.abc import Container
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from urllib.parse import urlencode
 
 import pandas as pd
 import pyalex
+import requests
 from asreview import ASReviewData
 from asreview import load_data
 
+from asreviewcontrib.datatools import __version__
+from asreviewcontrib.datatools.cache import DEFAULT_OPENALEX_TTL
+from asreviewcontrib.datatools.cache import OpenAlexCache
+from asreviewcontrib.datatools.cache import dataset_hash
+from asreviewcontrib.datatools.normalize import normalize_doi
+from asreviewcontrib.datatools.snapshot import SnapshotIndex
+
 # Maximum number of statements joined by a logical OR in a call to OpenAlex.
 OPENALEX_MAX_OR_LENGTH = 100
 OPENALEX_MAX_PAGE_LENGTH = 200
 OPENALEX_PREFIX = "https://openalex.org/"
+# Prefix of DOIs in OpenAlex. It is not used here anymore, because DOIs are compared
+# after `normalize_doi`, and is only kept as a public name for backward compatibility.
 DOI_PREFIX = "https://doi.org/"
+# URL of the OpenAlex API. Another URL can be set in `pyalex.config.openalex_url`.
+OPENALEX_URL = "https://api.openalex.org"
 
 # OpenAlex data fields to retrieve.
 USED_FIELDS = [
@@ -24,14 +48,493 @@ USED_FIELDS = [
     "publication_date",
 ]
 
+# Requests per second sent to OpenAlex with an email address (the polite pool) and
+# without one (the common pool). OpenAlex allows at most 10 requests per second.
+OPENALEX_POLITE_RATE = 10
+OPENALEX_COMMON_RATE = 5
+# Maximum number of requests sent to OpenAlex at the same time.
+OPENALEX_MAX_CONCURRENCY = 10
+# Status codes of responses after which a request is sent again.
+OPENALEX_RETRY_STATUS = [429, 500, 502, 503, 504]
+OPENALEX_MAX_RETRIES = 8
+# Base and maximum time to wait before sending a request again, in seconds.
+OPENALEX_BACKOFF = 1.0
+OPENALEX_MAX_BACKOFF = 60.0
+OPENALEX_TIMEOUT = 60
+# Output formats to which works are written as soon as they are found. Other formats
+# are written when snowballing is done.
+STREAM_FORMATS = [".csv", ".tsv", ".jsonl"]
+# Number of records of which the references are requested before the progress is
+# saved to the journal.
+BACKWARD_BATCH_SIZE = 1000
+# Number of records that are snowballed before they are marked as done in the
+# journal.
+JOURNAL_BATCH_SIZE = 1000
+
+
+class _TokenBucket:
+    """Token bucket limiting the number of requests per second.
+
+    The bucket holds at most one second of tokens, so short bursts are allowed.
+    """
+
+    def __init__(self):
+        # the bucket starts full
+        self.tokens = float("inf")
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, rate: float) -> None:
+        """Wait until a request can be sent at a rate of `rate` per second."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(rate, self.tokens + (now - self.updated) * rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / rate
+            time.sleep(wait)
+
+
+class _AdaptiveLimit:
+    """Limit of the number of requests that are sent at the same time.
+
+    The limit grows by one after about `limit` successful requests and is halved
+    when a request is rate limited (additive increase, multiplicative decrease).
+    """
+
+    def __init__(self, maximum: int):
+        self.maximum = maximum
+        self.limit = float(maximum)
+        self.active = 0
+        self.condition = threading.Condition()
+
+    def __enter__(self):
+        with self.condition:
+            self.condition.wait_for(lambda: self.active < int(self.limit))
+            self.active += 1
+
+    def __exit__(self, *exc_info):
+        with self.condition:
+            self.active -= 1
+            self.condition.notify_all()
+
+    def success(self) -> None:
+        with self.condition:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self.condition.notify_all()
+
+    def throttled(self) -> None:
+        with self.condition:
+            self.limit = max(1.0, self.limit / 2)
+
+
+class _OpenAlexClient:
+    """Client for the works of OpenAlex that stays within the rate limits.
+
+    The queries are built with pyalex. Requests are spread out by a token bucket
+    at the rate of the polite pool if an email address is configured in pyalex, and
+    otherwise at the rate of the common pool. Requests that fail with a connection
+    error or one of `OPENALEX_RETRY_STATUS` are sent again after an exponential
+    backoff with random jitter, or after the time the server asks for. The number
+    of concurrent requests is halved when OpenAlex responds that there are too many
+    requests, and grows again while requests succeed. The number of requests,
+    retries and rate limited requests are counted in `counts`.
+
+    Parameters
+    ----------
+    max_concurrency : int, optional
+        Maximum number of requests sent at the same time, by default
+        `OPENALEX_MAX_CONCURRENCY`.
+    max_retries : int, optional
+        Maximum number of times a request is sent again, by default
+        `OPENALEX_MAX_RETRIES`.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = OPENALEX_MAX_CONCURRENCY,
+        max_retries: int = OPENALEX_MAX_RETRIES,
+    ):
+        self.max_retries = max_retries
+        self.bucket = _TokenBucket()
+        self.limit = _AdaptiveLimit(max_concurrency)
+        self.counts = Counter()
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def _count(self, name: str) -> None:
+        with self.lock:
+            self.counts[name] += 1
+
+    def _session(self) -> requests.Session:
+        # sessions are not guaranteed to be thread safe, so every thread has its own
+        if not hasattr(self.local, "session"):
+            self.local.session = requests.Session()
+        return self.local.session
+
+    @staticmethod
+    def _url(query: pyalex.Works, **params) -> str:
+        # pyalex always builds the URL with the public API
+        openalex_url = pyalex.config.get("openalex_url") or OPENALEX_URL
+        url = query.url.replace(OPENALEX_URL, openalex_url.rstrip("/"), 1)
+        return url + ("&" if "?" in url else "?") + urlencode(params)
+
+    @staticmethod
+    def _backoff(attempt: int, response: requests.Response = None) -> float:
+        retry_after = None if response is None else response.headers.get("Retry-After")
+        if retry_after is not None and retry_after.isdigit():
+            return float(retry_after)
+        return random.uniform(
+            0, min(OPENALEX_MAX_BACKOFF, OPENALEX_BACKOFF * 2**attempt)
+        )
+
+    def request(self, url: str) -> dict:
+        """Send a request to OpenAlex, and send it again if it fails temporarily.
+
+        Parameters
+        ----------
+        url : str
+            The URL.
+
+        Returns
+        -------
+        dict
+            The response.
+
+        Raises
+        ------
+        requests.HTTPError
+            If the request failed, also after all retries.
+        requests.RequestException
+            If there was a connection error, also after all retries.
+        """
+        email = pyalex.config.get("email")
+        headers = {
+            "User-Agent": pyalex.config.get("user_agent")
+            or f"asreview-datatools/{__version__}"
+        }
+        if email:
+            headers["From"] = email
+        if pyalex.config.get("api_key"):
+            headers["Authorization"] = f"Bearer {pyalex.config['api_key']}"
+        rate = OPENALEX_POLITE_RATE if email else OPENALEX_COMMON_RATE
+
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire(rate)
+            error = None
+            with self.limit:
+                self._count("requests")
+                try:
+                    response = self._session().get(
+                        url, headers=headers, timeout=OPENALEX_TIMEOUT
+                    )
+                except (requests.ConnectionError, requests.Timeout) as err:
+                    response = None
+                    error = err
+
+            if response is not None:
+                if response.status_code not in OPENALEX_RETRY_STATUS:
+                    response.raise_for_status()
+                    self.limit.success()
+                    return response.json()
+                if response.status_code == 429:
+                    self._count("rate_limited")
+                    self.limit.throttled()
+
+            if attempt == self.max_retries:
+                if error is not None:
+                    raise error
+                response.raise_for_status()
+            self._count("retries")
+            time.sleep(self._backoff(attempt, response))
+
+    def get(self, query: pyalex.Works, per_page: int) -> list[pyalex.Work]:
+        """Get the first page of the works of a query.
+
+        Parameters
+        ----------
+        query : pyalex.Works
+            The query.
+        per_page : int
+            Number of works per page.
+
+        Returns
+        -------
+        list[pyalex.Work]
+            The works.
+        """
+        response = self.request(self._url(query, **{"per-page": per_page}))
+        return [pyalex.Work(work) for work in response["results"]]
+
+    def paginate(self, query: pyalex.Works, per_page: int):
+        """Get all works of a query, page by page.
+
+        Parameters
+        ----------
+        query : pyalex.Works
+            The query.
+        per_page : int
+            Number of works per page.
+
+        Yields
+        ------
+        list[pyalex.Work]
+            The works of a page.
+        """
+        cursor = "*"
+        while cursor is not None:
+            response = self.request(
+                self._url(query, **{"per-page": per_page, "cursor": cursor})
+            )
+            if not response["results"]:
+                break
+            yield [pyalex.Work(work) for work in response["results"]]
+            cursor = response["meta"].get("next_cursor")
+
+
+# All requests to OpenAlex are sent by this client, so they share the rate limits.
+_client = _OpenAlexClient()
+
+
+def _work_fields(work: pyalex.Work) -> dict:
+    """Get the used fields of a work, with the abstract instead of its index."""
+    return {
+        key: work[key]
+        for key in [
+            col if col != "abstract_inverted_index" else "abstract"
+            for col in USED_FIELDS
+        ]
+    }
+
+
+def _cache_works(cache: OpenAlexCache, works: list[dict]) -> None:
+    """Store works in the cache, together with the identifiers of their DOIs."""
+    cache.put_works(works)
+    cache.put_dois(
+        {
+            normalize_doi(work["doi"]): work["id"]
+            for work in works
+            if work["doi"] is not None
+        }
+    )
+
+
+def _published_from(work: dict, from_publication_date: str) -> bool:
+    """Check if a work is published on or after a date (YYYY-MM-DD)."""
+    return (
+        work["publication_date"] is not None
+        and work["publication_date"] >= from_publication_date
+    )
+
+
+def _get_works(identifiers: list[str], cache: OpenAlexCache = None) -> dict[str, dict]:
+    """Get works by OpenAlex identifier, from the cache if possible.
+
+    Works that are not in the cache are requested from OpenAlex, unless the cache is
+    offline. If an identifier redirects to another work, that work is returned with
+    its own identifier, and the redirect is stored in the cache.
+    """
+    works = {} if cache is None else cache.get_works(identifiers)
+    if cache is not None:
+        aliases = cache.get_aliases([i for i in identifiers if i not in works])
+        works.update(cache.get_works(list(set(aliases.values()))))
+    else:
+        aliases = {}
+    missing = list(
+        dict.fromkeys(i for i in identifiers if i not in works and i not in aliases)
+    )
+    if cache is not None and cache.offline:
+        if missing:
+            print(f"{len(missing)} works are not in the cache.")
+        return works
+
+    fetched = []
+    fetched_aliases = {}
+    page_length = min(OPENALEX_MAX_OR_LENGTH, OPENALEX_MAX_PAGE_LENGTH)
+    for i in range(0, len(missing), page_length):
+        batch = missing[i : i + page_length]
+        # We need to remove the prefix here because otherwise the URL is too long.
+        fltr = "|".join(
+            identifier.removeprefix(OPENALEX_PREFIX) for identifier in batch
+        )
+        query = pyalex.Works().filter(openalex=fltr).select(USED_FIELDS)
+        batch_works = [
+            _work_fields(work) for work in _client.get(query, per_page=page_length)
+        ]
+        fetched += batch_works
+        if cache is not None:
+            fetched_aliases.update(_redirects(batch, batch_works))
+
+    if cache is not None:
+        _cache_works(cache, fetched)
+        cache.put_aliases(fetched_aliases)
+    works.update((work["id"], work) for work in fetched)
+    return works
+
+
+def _redirects(identifiers: list[str], works: list[dict]) -> dict[str, str]:
+    """Get the identifiers of the works that requested identifiers redirect to.
+
+    Redirected identifiers are not among the identifiers of the works returned for
+    them. If one identifier is not found and one other work is returned, it
+    redirects to that work. Otherwise, the identifiers that were not found are
+    requested one by one to find out which work they redirect to.
+    """
+    requested = {
+        OPENALEX_PREFIX + identifier.removeprefix(OPENALEX_PREFIX): identifier
+        for identifier in identifiers
+    }
+    found = {work["id"] for work in works}
+    not_found = [identifier for i, identifier in requested.items() if i not in found]
+    others = [i for i in found if i not in requested]
+    if not not_found or not others:
+        return {}
+    if len(not_found) == 1 and len(others) == 1:
+        return {not_found[0]: others[0]}
+
+    aliases = {}
+    for identifier in not_found:
+        query = (
+            pyalex.Works()
+            .filter(openalex=identifier.removeprefix(OPENALEX_PREFIX))
+            .select(["id"])
+        )
+        redirected = _client.get(query, per_page=1)
+        if redirected:
+            aliases[identifier] = redirected[0]["id"]
+    return aliases
+
+
+def _citing_works(
+    identifiers: list[str], from_publication_date: str = None
+) -> dict[str, list[dict]]:
+    """Get all works citing one of the works, following all pages of the results.
+
+    The works are requested with one filter on all identifiers. Each citing work is
+    attributed to the identifiers in its referenced works.
+    """
+    # We need to remove the prefix here because otherwise the URL is too long.
+    fltr = "|".join(
+        identifier.removeprefix(OPENALEX_PREFIX) for identifier in identifiers
+    )
+    query = pyalex.Works().filter(cites=fltr)
+    if from_publication_date is not None:
+        query = query.filter(from_publication_date=from_publication_date)
+    query = query.select(USED_FIELDS)
+    pager = _client.paginate(query, per_page=OPENALEX_MAX_PAGE_LENGTH)
+
+    citing_works = {identifier: [] for identifier in identifiers}
+    input_ids = {
+        OPENALEX_PREFIX + identifier.removeprefix(OPENALEX_PREFIX): identifier
+        for identifier in identifiers
+    }
+    for page in pager:
+        for work in page:
+            fields = _work_fields(work)
+            for ref_id in work["referenced_works"]:
+                if ref_id in input_ids:
+                    citing_works[input_ids[ref_id]].append(fields)
+    return citing_works
+
 
-def forward_snowballing(identifiers: list[str]) -> dict[str, list[dict]]:
+def _forward_batches(
+    identifiers: list[str],
+    workers: int = 1,
+    cache: OpenAlexCache = None,
+    from_publication_date: str = None,
+):
+    """Get the citing works of the identifiers in batches.
+
+    The citing works of the identifiers in the cache are yielded first, and then
+    those of each batch of identifiers that was requested from OpenAlex. A batch is
+    a tuple with the identifiers of the citing works by identifier, and the citing
+    works by their identifier.
+    """
+    if workers < 1:
+        raise ValueError("The number of workers should be at least 1.")
+
+    cached = {} if cache is None else cache.get_citing(identifiers)
+    if cached:
+        print(f"Found the citing works of {len(cached)} records in the cache")
+        if from_publication_date is not None:
+            cached = {
+                identifier: [
+                    work
+                    for work in works
+                    if _published_from(work, from_publication_date)
+                ]
+                for identifier, works in cached.items()
+            }
+        yield _links(cached)
+    missing = list(dict.fromkeys(i for i in identifiers if i not in cached))
+    if cache is not None and cache.offline:
+        if missing:
+            print(f"The citing works of {len(missing)} records are not in the cache.")
+        missing = []
+
+    page_length = min(OPENALEX_MAX_OR_LENGTH, OPENALEX_MAX_PAGE_LENGTH)
+    batches = [
+        missing[i : i + page_length] for i in range(0, len(missing), page_length)
+    ]
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # map returns the results in the order of the batches
+        results = executor.map(
+            lambda batch: _citing_works(batch, from_publication_date), batches
+        )
+        for i, batch_works in zip(range(0, len(missing), page_length), results):
+            print(f"Got works citing records {i}-{i + page_length}")
+            links, works = _links(batch_works)
+            if cache is not None:
+                _cache_works(cache, list(works.values()))
+                # with a date filter, the lists of citing works are incomplete
+                if from_publication_date is None:
+                    cache.put_citing(links)
+            yield links, works
+
+
+def _links(
+    works_by_identifier: dict[str, list[dict]],
+) -> tuple[dict[str, list[str]], dict[str, dict]]:
+    """Split lists of works into lists of identifiers and the works by identifier."""
+    links = {
+        identifier: [work["id"] for work in works]
+        for identifier, works in works_by_identifier.items()
+    }
+    works = {
+        work["id"]: work for works in works_by_identifier.values() for work in works
+    }
+    return links, works
+
+
+def forward_snowballing(
+    identifiers: list[str],
+    workers: int = 1,
+    cache: OpenAlexCache = None,
+    from_publication_date: str = None,
+) -> dict[str, list[dict]]:
     """Get all works citing a work with the OpenAlex identifier from the list.
 
+    The citing works of up to `OPENALEX_MAX_OR_LENGTH` identifiers are requested at
+    once, and are connected back to the identifiers by their referenced works.
+
     Parameters
     ----------
     identifiers : list[str]
         List of OpenAlex identifiers.
+    workers : int, optional
+        Number of batches of identifiers for which the citing works are requested at
+        the same time, by default 1.
+    cache : OpenAlexCache, optional
+        Cache of OpenAlex works. The citing works of identifiers in the cache are not
+        requested again, and the requested works are added to the cache. By default
+        None.
+    from_publication_date : str, optional
+        Only get the citing works published on or after this date (YYYY-MM-DD), by
+        default None.
 
     Returns
     -------
@@ -39,39 +542,40 @@ def forward_snowballing(identifiers: list[str]) -> dict[str, list[dict]]:
         Dictionary of the form
             `{input OpenAlex identifier : list of OpenAlex works}`
         where each work in the list references the work with the input identifier and
-        it is a dictionary of the form `{field_name : field_value}`.
+        it is a dictionary of the form `{field_name : field_value}`. The identifiers
+        are in the same order as in the input.
     """
     citing_works = {}
-    for idx, openalex_id in enumerate(identifiers):
-        print(f"{idx}. Getting works citing {openalex_id}")
-        pager = (
-            pyalex.Works()
-            .filter(cites=openalex_id)
-            .select(USED_FIELDS)
-            .paginate(per_page=OPENALEX_MAX_PAGE_LENGTH, n_max=None)
+    for links, works in _forward_batches(
+        identifiers,
+        workers=workers,
+        cache=cache,
+        from_publication_date=from_publication_date,
+    ):
+        citing_works.update(
+            (identifier, [works[i] for i in ids]) for identifier, ids in links.items()
         )
-        citing_works[openalex_id] = []
-        for page in pager:
-            citing_works[openalex_id] += [
-                {
-                    key: work[key]
-                    for key in [
-                        col if col != "abstract_inverted_index" else "abstract"
-                        for col in USED_FIELDS
-                    ]
-                }
-                for work in page
-            ]
-    return citing_works
 
+    # keep the order of the identifiers
+    return {
+        identifier: citing_works[identifier]
+        for identifier in identifiers
+        if identifier in citing_works
+    }
 
-def backward_snowballing(identifiers: list[str]) -> dict[str, list[dict]]:
+
+def backward_snowballing(
+    identifiers: list[str], cache: OpenAlexCache = None
+) -> dict[str, list[dict]]:
     """Get all works cited by a work with the OpenAlex identifier from the list.
 
     Parameters
     ----------
     identifiers : list[str]
         List of OpenAlex identifiers.
+    cache : OpenAlexCache, optional
+        Cache of OpenAlex works. Works in the cache are not requested again, and the
+        requested works are added to the cache. By default None.
 
     Returns
     -------
@@ -82,96 +586,510 @@ def backward_snowballing(identifiers: list[str]) -> dict[str, list[dict]]:
         and it is a dictionary of the form `{field_name : field_value}`.
     """
     # Get the referenced works.
-    referenced_works = {}
-    page_length = min(OPENALEX_MAX_OR_LENGTH, OPENALEX_MAX_PAGE_LENGTH)
+    print(f"Getting the references of {len(identifiers)} records")
+    referenced_works = {
+        identifier: work["referenced_works"]
+        for identifier, work in _get_works(identifiers, cache).items()
+    }
+    links, works = _referenced_works(referenced_works, cache)
+    return {identifier: [works[i] for i in ids] for identifier, ids in links.items()}
 
-    for i in range(0, len(identifiers), page_length):
-        print(f"Getting works citing records {i}-{i+page_length}")
-        # We need to remove the prefix here because otherwise the URL is too long.
-        fltr = "|".join(
-            identifier.removeprefix(OPENALEX_PREFIX)
-            for identifier in identifiers[i : i + page_length]
-        )
-        for work in (
-            pyalex.Works()
-            .filter(openalex=fltr)
-            .select("id,referenced_works")
-            .get(per_page=page_length)
-        ):
-            referenced_works[work["id"]] = work["referenced_works"]
+
+def _referenced_works(
+    referenced_ids: dict[str, list[str]],
+    cache: OpenAlexCache = None,
+    known_works: dict[str, dict] = None,
+    skip: Container[str] = (),
+) -> tuple[dict[str, list[str]], dict[str, dict]]:
+    """Get the works referenced by works, from the identifiers of their references.
+
+    Returns the identifiers of the referenced works by referencing work, and the
+    referenced works by their identifier. Works in `known_works` are not requested
+    again. Works in `skip` are neither requested nor returned, but their identifiers
+    are.
+    """
+    known_works = {} if known_works is None else known_works
 
     # Get the fields for the referenced works.
     all_identifiers = []
-    for reference_list in referenced_works.values():
+    for reference_list in referenced_ids.values():
         all_identifiers += reference_list
     all_identifiers = list(set(all_identifiers))
     print(f"Found {len(all_identifiers)} records")
 
-    all_referenced_works = {}
-    for i in range(0, len(all_identifiers), page_length):
-        # We need to remove the prefix here because otherwise the URL is too long.
-        fltr = "|".join(
-            identifier.removeprefix(OPENALEX_PREFIX)
-            for identifier in all_identifiers[i : i + page_length]
-        )
-        for work in (
-            pyalex.Works()
-            .filter(openalex=fltr)
-            .select(USED_FIELDS)
-            .get(per_page=page_length)
-        ):
-            all_referenced_works[work["id"]] = {
-                key: work[key]
-                for key in [
-                    col if col != "abstract_inverted_index" else "abstract"
-                    for col in USED_FIELDS
-                ]
-            }
+    all_identifiers = [
+        identifier for identifier in all_identifiers if identifier not in skip
+    ]
+    all_referenced_works = _get_works(
+        [identifier for identifier in all_identifiers if identifier not in known_works],
+        cache,
+    )
+    all_referenced_works.update(
+        (identifier, known_works[identifier])
+        for identifier in all_identifiers
+        if identifier in known_works
+    )
 
     # Connect the referenced works back to the input works.
-    output = {}
-    for identifier, ref_id_list in referenced_works.items():
+    links = {}
+    for identifier, ref_id_list in referenced_ids.items():
         # We need the last check if 'ref_id' is in 'all_referenced_works': If a work
         # references an ID that redirects to another ID, it won't be present here.
         # Example: https://openalex.org/W2015370450 has in the references the identifier
         # https://openalex.org/W2008744335, but this redirects to
         # https://openalex.org/W4233569835
-        output[identifier] = [
-            all_referenced_works[ref_id]
+        links[identifier] = [
+            ref_id
             for ref_id in ref_id_list
-            if ref_id in all_referenced_works
+            if ref_id in all_referenced_works or ref_id in skip
         ]
-    return output
+    return links, all_referenced_works
+
 
+def _resolve_dois(dois: list[str]) -> dict[str, str]:
+    """Get the OpenAlex identifiers of a batch of normalized DOIs from OpenAlex."""
+    fltr = "|".join(dois)
+    query = pyalex.Works().filter(doi=fltr).select(["id", "doi"])
+    return {
+        normalize_doi(work["doi"]): work["id"]
+        for work in _client.get(query, per_page=len(dois))
+    }
 
-def openalex_from_doi(dois: list[str]) -> dict[str, str]:
+
+def openalex_from_doi(
+    dois: list[str], cache: OpenAlexCache = None, workers: int = 1
+) -> dict[str, str]:
     """Get the OpenAlex identifiers corresponding to a list of DOIs.
 
+    The DOIs are normalized with `normalize_doi`, so that different forms of the
+    same DOI are found. The number of DOIs without an
+    OpenAlex identifier is reported.
+
     Parameters
     ----------
     dois : list[str]
         List of DOIs.
+    cache : OpenAlexCache, optional
+        Cache of OpenAlex works. DOIs in the cache are not requested again, and the
+        identifiers of the requested DOIs are added to the cache. By default None.
+    workers : int, optional
+        Number of batches of DOIs that are requested at the same time, by default 1.
 
     Returns
     -------
     dict[str, str]
-        Dictionary {doi: openalex_id}. If there was no OpenAlex identifier found for a
-        DOI, the corresponding value will be None.
+        Dictionary {doi: openalex_id} with the normalized DOIs. If there
+        was no OpenAlex identifier found for a DOI, the corresponding value will be
+        None.
     """
+    if workers < 1:
+        raise ValueError("The number of workers should be at least 1.")
+
+    id_mapping = dict.fromkeys(normalize_doi(doi) for doi in dois)
+    cached = {} if cache is None else cache.get_dois(list(id_mapping))
+    id_mapping.update(cached)
+    missing = [doi for doi in id_mapping if doi not in cached]
+    if cache is not None and cache.offline:
+        if missing:
+            print(f"{len(missing)} DOIs are not in the cache.")
+        return id_mapping
+
     page_length = min(OPENALEX_MAX_OR_LENGTH, OPENALEX_MAX_PAGE_LENGTH)
-    id_mapping = {doi.removeprefix(DOI_PREFIX): None for doi in dois}
-    for i in range(0, len(dois), page_length):
-        fltr = "|".join(dois[i : i + page_length])
-        for work in (
-            pyalex.Works()
-            .filter(doi=fltr)
-            .select(["id", "doi"])
-            .get(per_page=page_length)
-        ):
-            id_mapping[work["doi"].removeprefix(DOI_PREFIX)] = work["id"]
+    batches = [
+        missing[i : i + page_length] for i in range(0, len(missing), page_length)
+    ]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for batch_mapping in executor.map(_resolve_dois, batches):
+            id_mapping.update(batch_mapping)
+
+    if cache is not None:
+        cache.put_dois({doi: id_mapping[doi] for doi in missing})
+
+    unresolved = [doi for doi, openalex_id in id_mapping.items() if openalex_id is None]
+    if unresolved:
+        print(
+            f"Found no OpenAlex identifiers for {len(unresolved)} DOIs, for example:"
+            f" {', '.join(unresolved[:5])}"
+        )
     return id_mapping
 
 
+def _read_doi_map(path: str) -> dict[str, str]:
+    """Read a CSV file with DOIs and OpenAlex identifiers, empty if not found."""
+    df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    return {
+        normalize_doi(doi): openalex_id or None
+        for doi, openalex_id in zip(df["doi"], df["openalex_id"])
+    }
+
+
+def _write_doi_map(path: str, id_mapping: dict[str, str]) -> None:
+    """Write a CSV file with DOIs and OpenAlex identifiers, empty if not found."""
+    pd.DataFrame(
+        {"doi": list(id_mapping), "openalex_id": list(id_mapping.values())}
+    ).to_csv(path, index=False)
+
+
+class _Journal:
+    """Append-only journal of the progress of snowballing.
+
+    The journal is a JSON Lines file. The first line holds a key with the hash of
+    the input records and the options, so a journal of other data or options is not
+    used. The next lines hold the OpenAlex identifiers of the DOIs, the works
+    found for each batch of records, and the identifiers of the records that are
+    done, by direction and hop. Records are done when all their batches are in the
+    journal, also if they were not found or redirected to another work. A line that
+    was not written completely, because the run was interrupted, is ignored. The
+    batches are read from the file when they are needed, so they are not kept in
+    memory.
+
+    Parameters
+    ----------
+    path : str
+        Location of the journal.
+    key : dict
+        Identification of the input records and options.
+    """
+
+    def __init__(self, path: str, key: dict):
+        self.path = path
+        # compare the key as it is stored in JSON
+        self.key = json.loads(json.dumps(key))
+        self.dois = None
+        # offsets of the batches in the file and the records that are done
+        self.offsets = {}
+        self.done = {}
+
+    def start(self, resume: bool = False) -> None:
+        """Start the journal, continuing from the existing journal if `resume`.
+
+        Parameters
+        ----------
+        resume : bool, optional
+            Load the progress from the journal if it is for the same input records
+            and options, by default False. Otherwise a new journal is started.
+        """
+        if resume and Path(self.path).exists():
+            size = self._load()
+            if size is not None:
+                print(f"Resuming from the journal at {self.path}.")
+                # remove an incomplete last line
+                os.truncate(self.path, size)
+                return
+            print(
+                f"Not resuming from the journal at {self.path}, because the data or"
+                " options changed."
+            )
+
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"key": self.key}) + "\n")
+
+    def _load(self) -> int:
+        # the size of the complete lines, or None if the key is different
+        with open(self.path, encoding="utf-8") as f:
+            offset = 0
+            for line in iter(f.readline, ""):
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                if offset == 0:
+                    if entry.get("key") != self.key:
+                        return None
+                elif "dois" in entry:
+                    self.dois = entry["dois"]
+                elif "done" in entry:
+                    batch = (entry["direction"], entry["hop"])
+                    self.done.setdefault(batch, set()).update(entry["done"])
+                else:
+                    batch = (entry["direction"], entry["hop"])
+                    self.offsets.setdefault(batch, []).append(offset)
+                    self.done.setdefault(batch, set()).update(entry["links"])
+                offset = f.tell()
+        return offset
+
+    def _append(self, entry: dict) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+    def put_dois(self, id_mapping: dict[str, str]) -> None:
+        """Add the OpenAlex identifiers of the DOIs to the journal."""
+        self._append({"dois": id_mapping})
+
+    def get_batches(self, direction: str, hop: int):
+        """Get the batches of a direction and hop that are in the journal."""
+        with open(self.path, encoding="utf-8") as f:
+            for offset in self.offsets.get((direction, hop), []):
+                f.seek(offset)
+                entry = json.loads(f.readline())
+                yield entry["links"], {work["id"]: work for work in entry["works"]}
+
+    def put_batch(
+        self,
+        direction: str,
+        hop: int,
+        links: dict[str, list[str]],
+        works: dict[str, dict],
+    ) -> None:
+        """Add a batch of a direction and hop to the journal."""
+        self._append(
+            {
+                "direction": direction,
+                "hop": hop,
+                "links": links,
+                "works": list(works.values()),
+            }
+        )
+
+    def put_done(self, direction: str, hop: int, identifiers: list[str]) -> None:
+        """Mark the requested records of a direction and hop as done."""
+        self._append({"direction": direction, "hop": hop, "done": identifiers})
+
+
+def _journaled(
+    journal: _Journal,
+    direction: str,
+    hop: int,
+    identifiers: list[str],
+    batches_fn: Callable,
+):
+    """Get the batches of the records in the journal, and of the other records.
+
+    `batches_fn` is called with the identifiers of the records that are not in the
+    journal, `JOURNAL_BATCH_SIZE` at a time. Its batches are added to the journal,
+    and the requested identifiers are marked as done when all their batches are.
+    """
+    if journal is None:
+        yield from batches_fn(identifiers)
+        return
+
+    done = journal.done.get((direction, hop), set())
+    if done:
+        print(f"Found the results of {len(done)} records in the journal")
+    yield from journal.get_batches(direction, hop)
+
+    todo = [identifier for identifier in identifiers if identifier not in done]
+    for i in range(0, len(todo), JOURNAL_BATCH_SIZE):
+        requested = todo[i : i + JOURNAL_BATCH_SIZE]
+        for links, works in batches_fn(requested):
+            journal.put_batch(direction, hop, links, works)
+            yield links, works
+        journal.put_done(direction, hop, requested)
+
+
+def _backward_batches(
+    identifiers: list[str],
+    referenced_ids: dict[str, list[str]] = None,
+    cache: OpenAlexCache = None,
+    skip: Container[str] = (),
+):
+    """Get the works referenced by the identifiers in batches.
+
+    The references of identifiers in `referenced_ids` are known, those of the
+    other identifiers are requested. A batch of `BACKWARD_BATCH_SIZE` identifiers
+    is a tuple with the identifiers of the referenced works by identifier, and the
+    referenced works by their identifier. Works in `skip` are neither requested
+    nor returned, but their identifiers are.
+    """
+    referenced_ids = {} if referenced_ids is None else referenced_ids
+    for i in range(0, len(identifiers), BACKWARD_BATCH_SIZE):
+        batch = identifiers[i : i + BACKWARD_BATCH_SIZE]
+        batch_refs = {
+            identifier: referenced_ids[identifier]
+            for identifier in batch
+            if identifier in referenced_ids
+        }
+        missing = [identifier for identifier in batch if identifier not in batch_refs]
+        works = {}
+        if missing:
+            print(f"Getting the references of {len(missing)} records")
+            works = _get_works(missing, cache)
+            # works of identifiers that redirect are returned with their own identifier
+            batch_refs.update(
+                (identifier, work["referenced_works"])
+                for identifier, work in works.items()
+            )
+        yield _referenced_works(batch_refs, cache, known_works=works, skip=skip)
+
+
+def _snowball_hops(
+    identifiers: list[str],
+    forward: bool,
+    backward: bool,
+    on_work: Callable[[dict], None],
+    depth: int = 1,
+    workers: int = 1,
+    cache: OpenAlexCache = None,
+    from_publication_date: str = None,
+    max_frontier: int = None,
+    journal: _Journal = None,
+    on_edge: Callable[[str, str, str, int], None] = None,
+) -> int:
+    """Snowball in multiple hops, each hop starting from the works found in the last.
+
+    The works are processed in batches, and only their identifiers are kept. A new
+    work is passed to `on_work` as soon as it is found, with the hop at which it
+    was found in the field 'hop'. A work is only snowballed once. Works that were
+    found before are not requested again for backward snowballing. With a journal,
+    the batches in the journal are not requested again and new batches are added
+    to it. If given, `on_edge` is called with the identifier of every snowballed
+    work, the identifier of a work found for it, the direction and the hop.
+
+    Returns the number of works found.
+    """
+    visited = set(identifiers)
+    # hop at which each work was found, or None for works that were filtered out
+    found = {}
+    frontier = identifiers
+    referenced_ids = {}
+    for hop in range(1, depth + 1):
+        if not frontier:
+            break
+        if depth > 1:
+            print(f"Hop {hop}: snowballing {len(frontier)} records")
+
+        # only the references of the next frontier are kept
+        next_frontier = []
+        next_referenced_ids = {}
+        n_candidates = 0
+
+        batches = []
+        if forward:
+            print("Starting forward snowballing")
+            batches.append(
+                (
+                    "forward",
+                    _journaled(
+                        journal,
+                        "forward",
+                        hop,
+                        frontier,
+                        lambda ids: _forward_batches(
+                            ids,
+                            workers=workers,
+                            cache=cache,
+                            from_publication_date=from_publication_date,
+                        ),
+                    ),
+                )
+            )
+        if backward:
+            batches.append(
+                (
+                    "backward",
+                    _journaled(
+                        journal,
+                        "backward",
+                        hop,
+                        frontier,
+                        lambda ids, referenced_ids=referenced_ids: _backward_batches(
+                            ids, referenced_ids, cache=cache, skip=found
+                        ),
+                    ),
+                )
+            )
+
+        for direction, direction_batches in batches:
+            if direction == "backward":
+                print("Starting backward snowballing")
+            for links, works in direction_batches:
+                for identifier, ids in links.items():
+                    for work_id in ids:
+                        if work_id not in found:
+                            work = works[work_id]
+                            if from_publication_date is not None and not (
+                                _published_from(work, from_publication_date)
+                            ):
+                                found[work_id] = None
+                                continue
+                            found[work_id] = hop
+                            on_work({**work, "hop": hop})
+                            if hop < depth and work_id not in visited:
+                                n_candidates += 1
+                                if max_frontier is None or n_candidates <= max_frontier:
+                                    next_frontier.append(work_id)
+                                    next_referenced_ids[work_id] = work[
+                                        "referenced_works"
+                                    ]
+                        if on_edge is not None and found[work_id] is not None:
+                            on_edge(identifier, work_id, direction, hop)
+
+        if len(next_frontier) < n_candidates:
+            print(
+                f"Only snowballing the first {max_frontier} of {n_candidates} records"
+            )
+        frontier = next_frontier
+        referenced_ids = next_referenced_ids
+        visited.update(frontier)
+
+    return sum(hop is not None for hop in found.values())
+
+
+class _WorkWriter:
+    """Writer of the output works as soon as they are found.
+
+    Works are written to CSV, TSV and JSON Lines files directly, in the layout of
+    ASReview for CSV and TSV files. For the other file formats of ASReview, the
+    works are collected and written when the writer is closed.
+
+    Parameters
+    ----------
+    path : str
+        Location of the output file.
+    columns : list[str]
+        The columns of the output.
+    """
+
+    def __init__(self, path: str, columns: list[str]):
+        self.path = path
+        self.columns = columns
+        self.suffix = Path(path).suffix.lower()
+        self.n_works = 0
+        self.works = []
+
+    def __enter__(self):
+        if self.suffix in STREAM_FORMATS:
+            self.file = open(self.path, "w", newline="", encoding="utf-8")
+            if self.suffix != ".jsonl":
+                delimiter = "\t" if self.suffix == ".tsv" else ","
+                self.writer = csv.writer(
+                    self.file, delimiter=delimiter, lineterminator="\n"
+                )
+                # the first column is the unnamed index of ASReview
+                self.writer.writerow(["", *self.columns])
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.suffix in STREAM_FORMATS:
+            self.file.close()
+        elif exc_type is None:
+            ASReviewData(pd.DataFrame(self.works, columns=self.columns)).to_file(
+                self.path
+            )
+
+    def write(self, work: dict) -> None:
+        """Write a work to the output.
+
+        Parameters
+        ----------
+        work : dict
+            The work, with a value for each column.
+        """
+        if self.suffix == ".jsonl":
+            self.file.write(json.dumps({c: work[c] for c in self.columns}) + "\n")
+        elif self.suffix in STREAM_FORMATS:
+            # lists are written like pandas does
+            self.writer.writerow(
+                [
+                    self.n_works,
+                    *("" if work[c] is None else str(work[c]) for c in self.columns),
+                ]
+            )
+        else:
+            self.works.append(work)
+        self.n_works += 1
+
+
 def snowball(
     input_path: Path,
     output_path: Path,
@@ -179,9 +1097,32 @@ def snowball(
     backward: bool,
     use_all: bool = False,
     email: str = None,
+    workers: int = 1,
+    cache_dir: str = None,
+    cache_ttl: float = DEFAULT_OPENALEX_TTL,
+    offline: bool = False,
+    depth: int = 1,
+    from_publication_date: str = None,
+    max_frontier: int = None,
+    resume: bool = False,
+    edges_path: str = None,
+    doi_map_path: str = None,
+    snapshot_path: str = None,
 ) -> None:
     """Perform snowballing on an ASReview dataset.
 
+    With a `depth` larger than one, the works found in a hop are snowballed in the
+    next hop, and the output contains a column 'hop' with the hop at which each work
+    was found. Works are never snowballed twice.
+
+    With `resume`, the progress is saved to a journal next to the output file,
+    which is removed when snowballing is done. An interrupted run with `resume`
+    continues from the journal, if the input records and options did not change.
+
+    Works are written to CSV, TSV and JSON Lines output files as soon as they are
+    found, and only their identifiers are kept in memory. The output contains every
+    work once, with the first hop and direction at which it was found.
+
     Parameters
     ----------
     input_path : Path
@@ -199,16 +1140,68 @@ def snowball(
         records, by default False
     email : str, optional
         Email address to send along with request to OpenAlex, by default None
+    workers : int, optional
+        Number of requests for forward snowballing and for the OpenAlex identifiers
+        of DOIs that are sent to OpenAlex at the same time, by default 1.
+    cache_dir : str, optional
+        Directory of a cache of OpenAlex works. Works in the cache are not requested
+        from OpenAlex again, and the requested works are added to the cache. By
+        default None.
+    cache_ttl : float, optional
+        Number of days after which works in the cache are requested again, by default
+        30.
+    offline : bool, optional
+        Only use the works in the cache and do not send requests to OpenAlex, by
+        default False. Requires `cache_dir`.
+    depth : int, optional
+        Number of hops, by default 1.
+    from_publication_date : str, optional
+        Only keep works published on or after this date (YYYY-MM-DD), by default
+        None.
+    max_frontier : int, optional
+        Maximum number of works snowballed in each hop after the first, by default
+        None.
+    resume : bool, optional
+        Save the progress to a journal and continue an interrupted run from it, by
+        default False.
+    edges_path : str, optional
+        Location of a CSV file with a row for every snowballed work and work found
+        for it, with the direction and hop, by default None.
+    doi_map_path : str, optional
+        Location of a CSV file with the columns 'doi' and 'openalex_id'. DOIs in the
+        file are not requested from OpenAlex, and the identifiers of the other DOIs
+        are added to it. By default None.
+    snapshot_path : str, optional
+        Directory of the citation index of a local OpenAlex snapshot, built with
+        `build_snapshot_index`. The works are only looked up in the index and no
+        requests are sent to OpenAlex. Can not be combined with `cache_dir`. By
+        default None.
 
     Raises
     ------
     ValueError
         If `forward` and `backward` are both False.
+    ValueError
+        If `depth` is smaller than 1.
+    ValueError
+        If `snapshot_path` and `cache_dir` are both given.
     ValueError
         If the dataset contains no column name `openalex_id` and no column names `doi`.
     """
     if not (forward or backward):
         raise ValueError("At least one of 'forward' or 'backward' should be True.")
+    if offline and cache_dir is None:
+        raise ValueError("Offline snowballing requires a cache directory.")
+    if snapshot_path is not None and cache_dir is not None:
+        raise ValueError("A snapshot index can not be combined with a cache.")
+    if depth < 1:
+        raise ValueError("The depth should be at least 1.")
+    if snapshot_path is not None:
+        cache = SnapshotIndex(snapshot_path)
+    elif cache_dir is not None:
+        cache = OpenAlexCache(cache_dir, ttl=cache_ttl, offline=offline)
+    else:
+        cache = None
 
     data = load_data(input_path)
     if use_all or (data.included is None):
@@ -216,14 +1209,61 @@ def snowball(
     else:
         data = data.df.loc[data.included.astype(bool)]
 
+    if "openalex_id" not in data.columns and "doi" not in data.columns:
+        raise ValueError(
+            "Dataset should contain a column 'openalex_id' containing OpenAlex"
+            " identifiers or a column 'doi' containing DOIs."
+        )
+
+    # the journal is only used for the same input records and options
+    if resume:
+        id_column = "openalex_id" if "openalex_id" in data.columns else "doi"
+        journal = _Journal(
+            f"{output_path}.snowball_journal",
+            {
+                "input": dataset_hash(
+                    [
+                        None if pd.isna(value) else str(value)
+                        for value in data[id_column]
+                    ]
+                ),
+                "options": {
+                    "forward": forward,
+                    "backward": backward,
+                    "depth": depth,
+                    "from_publication_date": from_publication_date,
+                    "max_frontier": max_frontier,
+                    "snapshot": snapshot_path is not None,
+                },
+            },
+        )
+        journal.start(resume)
+    else:
+        journal = None
+
     # Add OpenAlex identifiers if not available.
     if "openalex_id" not in data.columns:
-        if "doi" not in data.columns:
-            raise ValueError(
-                "Dataset should contain a column 'openalex_id' containing OpenAlex"
-                " identifiers or a column 'doi' containing DOIs."
+        if journal is not None and journal.dois is not None:
+            id_mapping = journal.dois
+        else:
+            dois = [normalize_doi(doi) for doi in data.doi.dropna()]
+            id_mapping = (
+                _read_doi_map(doi_map_path)
+                if doi_map_path is not None and Path(doi_map_path).exists()
+                else {}
             )
-        id_mapping = openalex_from_doi(data.doi.dropna().to_list())
+            missing = [doi for doi in dois if doi not in id_mapping]
+            if missing:
+                id_mapping.update(
+                    openalex_from_doi(missing, cache=cache, workers=workers)
+                )
+                if doi_map_path is not None:
+                    _write_doi_map(doi_map_path, id_mapping)
+            elif doi_map_path is not None:
+                print(f"Found the OpenAlex identifiers of all DOIs in {doi_map_path}")
+            id_mapping = {doi: id_mapping[doi] for doi in dois}
+            if journal is not None:
+                journal.put_dois(id_mapping)
         n_openalex_ids = len(
             [
                 openalex_id
@@ -236,40 +1276,53 @@ def snowball(
             " records. Performing snowballing for those records."
         )
         data["openalex_id"] = None
-        data.loc[data.doi.notna(), "openalex_id"] = (
-            data.loc[data.doi.notna(), "doi"]
-            .str.removeprefix(DOI_PREFIX)
-            .apply(lambda doi: id_mapping[doi])
-        )
+        data.loc[data.doi.notna(), "openalex_id"] = data.loc[
+            data.doi.notna(), "doi"
+        ].apply(lambda doi: id_mapping[normalize_doi(doi)])
 
     identifiers = data["openalex_id"].dropna().to_list()
 
     if email is not None:
         pyalex.config.email = email
 
-    if forward:
-        print("Starting forward snowballing")
-        forward_data = forward_snowballing(identifiers)
-    else:
-        forward_data = {}
-    if backward:
-        print("Starting backward snowballing")
-        backward_data = backward_snowballing(identifiers)
-    else:
-        backward_data = {}
-
-    all_works = []
-    for works_list in forward_data.values():
-        all_works += works_list
-    for works_list in backward_data.values():
-        all_works += works_list
-
-    output_data = pd.DataFrame(all_works)
-    output_data.drop_duplicates(subset=["id"], inplace=True)
-    output_data.rename({"id": "openalex_id"}, axis=1, inplace=True)
-    output_data = ASReviewData(output_data)
-    output_data.to_file(output_path)
+    columns = [
+        {"id": "openalex_id", "abstract_inverted_index": "abstract"}.get(col, col)
+        for col in USED_FIELDS
+    ]
+    if depth > 1:
+        columns.append("hop")
+
+    with contextlib.ExitStack() as stack:
+        writer = stack.enter_context(_WorkWriter(output_path, columns))
+        if edges_path is not None:
+            edges_file = stack.enter_context(
+                open(edges_path, "w", newline="", encoding="utf-8")
+            )
+            edges_writer = csv.writer(edges_file, lineterminator="\n")
+            edges_writer.writerow(["snowballed_id", "found_id", "direction", "hop"])
+
+            def on_edge(*edge):
+                edges_writer.writerow(edge)
+
+        else:
+            on_edge = None
+
+        _snowball_hops(
+            identifiers,
+            forward,
+            backward,
+            lambda work: writer.write({"openalex_id": work["id"], **work}),
+            depth=depth,
+            workers=workers,
+            cache=cache,
+            from_publication_date=from_publication_date,
+            max_frontier=max_frontier,
+            journal=journal,
+            on_edge=on_edge,
+        )
     print("Saved dataset")
+    if journal is not None:
+        Path(journal.path).unlink(missing_ok=True)
 
 
 def _parse_arguments_snowball():
@@ -306,4 +1359,105 @@ def _parse_arguments_snowball():
             "https://docs.openalex.org/how-to-use-the-api/rate-limits-and-authentication#the-polite-pool"
         ),
     )
+    parser.add_argument(
+        "--workers",
+        "-w",
+        type=int,
+        default=1,
+        help=(
+            "Number of requests for forward snowballing and for the OpenAlex"
+            " identifiers of DOIs that are sent to OpenAlex at the same time."
+            " Default: 1."
+        ),
+    )
+    parser.add_argument(
+        "--cache_dir",
+        type=str,
+        default=None,
+        help=(
+            "Directory of a cache of OpenAlex works. Works in the cache are not"
+            " requested again when snowballing the same or a similar dataset."
+            " Default: no cache."
+        ),
+    )
+    parser.add_argument(
+        "--cache_ttl",
+        type=float,
+        default=DEFAULT_OPENALEX_TTL,
+        help=(
+            "Number of days after which works in the cache are requested again."
+            f" Default: {DEFAULT_OPENALEX_TTL}."
+        ),
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help=(
+            "Only use the works in the cache and do not send requests to OpenAlex."
+            " Requires --cache_dir."
+        ),
+    )
+    parser.add_argument(
+        "--depth",
+        type=int,
+        default=1,
+        help=(
+            "Number of hops. The works found in a hop are snowballed in the next hop."
+            " Default: 1."
+        ),
+    )
+    parser.add_argument(
+        "--from_publication_date",
+        type=str,
+        default=None,
+        help="Only keep works published on or after this date (YYYY-MM-DD).",
+    )
+    parser.add_argument(
+        "--max_frontier",
+        type=int,
+        default=None,
+        help="Maximum number of works snowballed in each hop after the first.",
+    )
+    parser.add_argument(
+        "--edges",
+        type=str,
+        default=None,
+        dest="edges_path",
+        help=(
+            "File path of a CSV file with a row for every snowballed work and work"
+            " found for it, with the direction and hop."
+        ),
+    )
+    parser.add_argument(
+        "--doi_map",
+        type=str,
+        default=None,
+        dest="doi_map_path",
+        help=(
+            "File path of a CSV file with the columns 'doi' and 'openalex_id'. DOIs"
+            " in the file are not requested from OpenAlex, and the OpenAlex"
+            " identifiers of the other DOIs are added to it."
+        ),
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help=(
+            "Save the progress of snowballing to a journal file next to the output"
+            " file, and continue an interrupted run from it. The journal is only"
+            " used if the input records and options did not change."
+        ),
+    )
+    parser.add_argument(
+        "--snapshot",
+        dest="snapshot_path",
+        type=str,
+        default=None,
+        help=(
+            "Directory of the citation index of a local OpenAlex snapshot, built with"
+            " 'asreview data snowball index'. The works are only looked up in the"
+            " index and no requests are sent to OpenAlex. Can not be combined with"
+            " --cache_dir. Default: no snapshot."
+        ),
+    )
     return parser
@@ -0,0 +1,147 @@
+"""Benchmark the similarity based deduplication of `asreview data dedup`.
+
+The benchmark generates synthetic datasets with near-duplicate records and times
+the different stages of `deduplicate_data`. Run it from the root of the repository:
+
+    python benchmarks/bench_dedup.py --sizes 1000 10000 50000
+"""
+
+import argparse
+import io
+import random
+import string
+import time
+from contextlib import redirect_stderr
+from contextlib import redirect_stdout
+
+import numpy as np
+import pandas as pd
+from asreview import ASReviewData
+
+from asreviewcontrib.datatools.dedup import DEDUP_METHODS
+from asreviewcontrib.datatools.dedup import _CandidateIndex
+from asreviewcontrib.datatools.dedup import deduplicate_data
+from asreviewcontrib.datatools.scorers import SCORERS
+
+
+def make_dataset(n_records: int, seed: int = 0, dup_rate: float = 0.1) -> pd.DataFrame:
+    """Make a synthetic dataset where a fraction of the records are near-duplicates.
+
+    Parameters
+    ----------
+    n_records : int
+        Number of records in the dataset.
+    seed : int, optional
+        Seed of the random generator, by default 0.
+    dup_rate : float, optional
+        Fraction of the records that is a (slightly modified) copy of an earlier
+        record, by default 0.1.
+
+    Returns
+    -------
+    pd.DataFrame
+        Dataset with the columns 'title', 'abstract' and 'doi'.
+    """
+    rng = random.Random(seed)
+    vocabulary = [
+        "".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 10)))
+        for _ in range(5000)
+    ]
+
+    records = []
+    for i in range(n_records):
+        if records and rng.random() < dup_rate:
+            record = dict(rng.choice(records))
+            title = list(record["title"])
+            for _ in range(rng.randint(0, 2)):
+                title[rng.randrange(len(title))] = rng.choice(string.ascii_letters)
+            record["title"] = "".join(title)
+            if rng.random() < 0.5:
+                record["doi"] = np.nan
+        else:
+            record = {
+                "title": " ".join(rng.choices(vocabulary, k=rng.randint(4, 20))),
+                "abstract": " ".join(rng.choices(vocabulary, k=rng.randint(0, 250))),
+                "doi": f"10.1234/{i}" if rng.random() < 0.7 else np.nan,
+            }
+        records.append(record)
+
+    df = pd.DataFrame(records)
+    df.index.name = "record_id"
+    return df
+
+
+def _mask_candidates(s: pd.Series, pids: pd.Series) -> int:
+    """Candidate selection by boolean masks, as done before the candidate index."""
+    n_candidates = 0
+    for i, text in s.items():
+        n_candidates += len(
+            s.iloc[i + 1 :][(pids == pids.iloc[i]) | (abs(s.str.len() - len(text)) < 5)]
+        )
+    return n_candidates
+
+
+def _index_candidates(s: pd.Series, pids: pd.Series) -> int:
+    index = _CandidateIndex(s.str.len().to_numpy(), pids)
+    return sum(len(index.candidates(i)) for i in range(len(s)))
+
+
+def _time(func, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+        func(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def bench_candidates(sizes: list[int], max_mask_size: int) -> None:
+    print("Candidate selection")
+    print(f"{'records':>10} {'masks (s)':>12} {'index (s)':>12}")
+    for n_records in sizes:
+        df = make_dataset(n_records)
+        s = pd.Series(ASReviewData(df).texts).str.lower()
+        pids = df["doi"].reset_index(drop=True)
+
+        if n_records <= max_mask_size:
+            t_mask = f"{_time(_mask_candidates, s, pids):12.2f}"
+        else:
+            t_mask = f"{'-':>12}"
+        t_index = _time(_index_candidates, s, pids)
+        print(f"{n_records:>10} {t_mask} {t_index:12.2f}")
+
+
+def bench_dedup(sizes: list[int], threshold: float, jobs: int, scorer: str) -> None:
+    print(f"deduplicate_data(similar=True, jobs={jobs}, scorer={scorer!r})")
+    print(f"{'records':>10}" + "".join(f"{m + ' (s)':>12}" for m in DEDUP_METHODS))
+    for n_records in sizes:
+        df = make_dataset(n_records)
+        times = [
+            _time(
+                deduplicate_data,
+                ASReviewData(df.copy()),
+                similar=True,
+                threshold=threshold,
+                method=method,
+                jobs=jobs,
+                scorer=scorer,
+            )
+            for method in DEDUP_METHODS
+        ]
+        print(f"{n_records:>10}" + "".join(f"{t:12.2f}" for t in times))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 5000])
+    parser.add_argument(
+        "--max_mask_size",
+        type=int,
+        default=5000,
+        help="Largest dataset size for which the mask based selection is timed.",
+    )
+    parser.add_argument("--threshold", type=float, default=0.98)
+    parser.add_argument("--jobs", type=int, default=1)
+    parser.add_argument("--scorer", default="difflib", choices=list(SCORERS))
+    args = parser.parse_args()
+
+    bench_candidates(args.sizes, args.max_mask_size)
+    bench_dedup(args.sizes, args.threshold, args.jobs, args.scorer)
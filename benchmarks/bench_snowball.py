@@ -0,0 +1,162 @@
+"""Benchmark the requests, time and memory of snowballing against a local OpenAlex.
+
+The benchmark starts the local OpenAlex server of the tests with a synthetic set of
+works in a separate process, and measures the requests, the wall time and the peak
+memory of `forward_snowballing`, `backward_snowballing` and `openalex_from_doi` for
+a number of random seed works. Run it from the root of the repository:
+
+    python -m benchmarks.bench_snowball --seeds 10 100 1000 --latency 0.05
+"""
+
+import argparse
+import io
+import multiprocessing
+import random
+import time
+import tracemalloc
+from contextlib import nullcontext
+from contextlib import redirect_stderr
+from contextlib import redirect_stdout
+
+import pyalex
+
+from asreviewcontrib.datatools import snowball as snowball_module
+from asreviewcontrib.datatools.snowball import _OpenAlexClient
+from asreviewcontrib.datatools.snowball import backward_snowballing
+from asreviewcontrib.datatools.snowball import forward_snowballing
+from asreviewcontrib.datatools.snowball import openalex_from_doi
+from tests.openalex_server import OpenAlexServer
+from tests.openalex_server import make_works
+from tests.openalex_server import work_doi
+from tests.openalex_server import work_id
+
+try:
+    # requests-cache is installed globally by some dependencies of asreview, which
+    # would store every response of the server
+    from requests_cache import disabled as requests_cache_disabled
+except ImportError:
+    requests_cache_disabled = nullcontext
+
+
+def _serve(conn, n_works: int, latency: float, rate_limit_every: int) -> None:
+    works = make_works(n_works)
+    with OpenAlexServer(
+        works, latency=latency, rate_limit_every=rate_limit_every, retry_after=0
+    ) as server:
+        conn.send(server.url)
+        # serve until the benchmark is done
+        conn.recv()
+
+
+def _measure(func, *args, **kwargs) -> dict:
+    """Run a function with a new OpenAlex client and measure its requests."""
+    snowball_module._client = _OpenAlexClient()
+    tracemalloc.start()
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+        func(*args, **kwargs)
+    wall_time = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        "requests": snowball_module._client.counts["requests"],
+        "rate_limited": snowball_module._client.counts["rate_limited"],
+        "time": wall_time,
+        "peak": peak / 1024**2,
+    }
+
+
+def bench_snowball(
+    seeds: list[int],
+    n_works: int,
+    latency: float,
+    rate_limit_every: int,
+    workers: int,
+) -> None:
+    conn, child_conn = multiprocessing.Pipe()
+    process = multiprocessing.Process(
+        target=_serve, args=(child_conn, n_works, latency, rate_limit_every)
+    )
+    process.start()
+    pyalex.config.openalex_url = conn.recv()
+
+    print(
+        f"OpenAlex server with {n_works} works, {latency} s latency"
+        + (
+            f", every {rate_limit_every}th request rate limited"
+            if rate_limit_every
+            else ""
+        )
+    )
+    print(
+        f"{'seeds':>8} {'function':>22} {'requests':>10} {'429':>6} {'time (s)':>10}"
+        f" {'peak (MB)':>10}"
+    )
+    rng = random.Random(0)
+    try:
+        with requests_cache_disabled():
+            for n_seeds in seeds:
+                numbers = rng.sample(range(1, n_works + 1), n_seeds)
+                identifiers = [work_id(number) for number in numbers]
+                benchmarks = [
+                    ("forward_snowballing", forward_snowballing, identifiers, workers),
+                    ("backward_snowballing", backward_snowballing, identifiers, None),
+                    (
+                        "openalex_from_doi",
+                        openalex_from_doi,
+                        [work_doi(number) for number in numbers],
+                        workers,
+                    ),
+                ]
+                for name, func, arg, func_workers in benchmarks:
+                    kwargs = {} if func_workers is None else {"workers": func_workers}
+                    result = _measure(func, arg, **kwargs)
+                    print(
+                        f"{n_seeds:>8} {name:>22} {result['requests']:>10}"
+                        f" {result['rate_limited']:>6} {result['time']:>10.2f}"
+                        f" {result['peak']:>10.1f}"
+                    )
+    finally:
+        conn.send(None)
+        process.join()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seeds", nargs="+", type=int, default=[10, 100, 1000])
+    parser.add_argument(
+        "--n_works", type=int, default=20000, help="Number of works of the server."
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.05,
+        help="Time the server waits before answering a request, in seconds.",
+    )
+    parser.add_argument(
+        "--rate_limit_every",
+        type=int,
+        default=0,
+        help="Answer every n-th request with status 429. Default: never.",
+    )
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=None,
+        help=(
+            "Maximum number of requests per second. Default: the rate limit of"
+            " OpenAlex."
+        ),
+    )
+    parser.add_argument("--email", type=str, default="benchmark@example.com")
+    args = parser.parse_args()
+
+    pyalex.config.email = args.email
+    if args.rate is not None:
+        snowball_module.OPENALEX_POLITE_RATE = args.rate
+        snowball_module.OPENALEX_COMMON_RATE = args.rate
+
+    bench_snowball(
+        args.seeds, args.n_works, args.latency, args.rate_limit_every, args.workers
+    )
@@ -0,0 +1,265 @@
+"""Local stand-in for the works endpoint of the OpenAlex API.
+
+The server answers the requests that snowballing sends to OpenAlex from a synthetic
+set of works, so snowballing can be tested and benchmarked without network access.
+It supports the filters 'openalex', 'doi', 'cites' and 'from_publication_date', the
+'select' parameter, pagination with 'page' or 'cursor', and identifiers that
+redirect to another work in the 'openalex' filter. Point pyalex to the
+server with `pyalex.config.openalex_url = server.url`.
+"""
+
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from urllib.parse import parse_qs
+from urllib.parse import urlparse
+
+OPENALEX_PREFIX = "https://openalex.org/"
+DOI_PREFIX = "https://doi.org/"
+
+
+def work_id(number: int) -> str:
+    return f"{OPENALEX_PREFIX}W{number}"
+
+
+def work_doi(number: int) -> str:
+    return f"{DOI_PREFIX}10.{1000 + number % 7}/work.{number}"
+
+
+def make_works(n_works: int, seed: int = 0, max_references: int = 30) -> list[dict]:
+    """Make a synthetic set of works that cite each other.
+
+    Works only cite works with a lower number. Works with a low number are cited
+    much more often than works with a high number, so some works have enough citing
+    works to need several pages of results.
+
+    Parameters
+    ----------
+    n_works : int
+        Number of works. The works have the identifiers W1 to W{n_works}.
+    seed : int, optional
+        Seed of the random generator, by default 0.
+    max_references : int, optional
+        Maximum number of references of a work, by default 30.
+
+    Returns
+    -------
+    list[dict]
+        The works, with the fields used for snowballing.
+    """
+    rng = random.Random(seed)
+    works = []
+    for number in range(1, n_works + 1):
+        n_references = min(number - 1, rng.randint(0, max_references))
+        references = {
+            1 + int((number - 1) * rng.random() ** 3) for _ in range(n_references)
+        }
+        works.append(
+            {
+                "id": work_id(number),
+                "doi": work_doi(number),
+                "title": f"Title of work {number}",
+                "abstract_inverted_index": {
+                    "Abstract": [0],
+                    "of": [1],
+                    str(number): [2],
+                },
+                "referenced_works": [work_id(ref) for ref in sorted(references)],
+                "publication_date": f"{1950 + number % 70}-01-01",
+            }
+        )
+    return works
+
+
+class OpenAlexServer:
+    """HTTP server with the works endpoint of the OpenAlex API.
+
+    The server runs in a background thread and is used as a context manager. It
+    counts the requests it receives in `counts`, the answered requests with each
+    filter in `filters`, and the largest number of requests handled at the same
+    time in `max_concurrent`.
+
+    Parameters
+    ----------
+    works : list[dict]
+        The works, for example made by `make_works`.
+    latency : float, optional
+        Time to wait before answering a request, in seconds, by default 0.
+    rate_limit_every : int, optional
+        Answer every n-th request with status 429, by default 0 (never).
+    retry_after : int, optional
+        Value of the header 'Retry-After' of responses with status 429, by default
+        None (no header).
+    redirects : dict[str, str], optional
+        Identifiers that redirect to the identifier of another work, by default None.
+    """
+
+    def __init__(
+        self,
+        works: list[dict],
+        latency: float = 0.0,
+        rate_limit_every: int = 0,
+        retry_after: int = None,
+        redirects: dict[str, str] = None,
+    ):
+        self.works = {work["id"]: work for work in works}
+        self.redirects = redirects or {}
+        self.by_doi = {work["doi"].removeprefix(DOI_PREFIX): work for work in works}
+        self.cited_by = {}
+        for work in works:
+            for ref in work["referenced_works"]:
+                self.cited_by.setdefault(ref, []).append(work["id"])
+
+        self.latency = latency
+        self.rate_limit_every = rate_limit_every
+        self.retry_after = retry_after
+        self.counts = {"requests": 0, "rate_limited": 0}
+        self.filters = Counter()
+        self.max_concurrent = 0
+        self._concurrent = 0
+        self._lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                status, headers, body = server.handle(self.path)
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def handle(self, path: str) -> tuple[int, dict, bytes]:
+        """Answer a request.
+
+        Parameters
+        ----------
+        path : str
+            Path and query of the request.
+
+        Returns
+        -------
+        tuple[int, dict, bytes]
+            Status code, headers and body of the response.
+        """
+        with self._lock:
+            self.counts["requests"] += 1
+            n_request = self.counts["requests"]
+            self._concurrent += 1
+            self.max_concurrent = max(self.max_concurrent, self._concurrent)
+        try:
+            time.sleep(self.latency)
+            if self.rate_limit_every and n_request % self.rate_limit_every == 0:
+                with self._lock:
+                    self.counts["rate_limited"] += 1
+                headers = {}
+                if self.retry_after is not None:
+                    headers["Retry-After"] = str(self.retry_after)
+                return 429, headers, b'{"error": "Too many requests"}'
+
+            url = urlparse(path)
+            if url.path.rstrip("/") != "/works":
+                return 404, {}, b'{"error": "Not found"}'
+            params = {key: values[0] for key, values in parse_qs(url.query).items()}
+            try:
+                response = self.query(params)
+            except ValueError as err:
+                return 400, {}, json.dumps({"error": str(err)}).encode()
+            return 200, {}, json.dumps(response).encode()
+        finally:
+            with self._lock:
+                self._concurrent -= 1
+
+    def query(self, params: dict[str, str]) -> dict:
+        """Get a page of the works matching the parameters of a request."""
+        results = None
+        date = None
+        for fltr in filter(None, params.get("filter", "").split(",")):
+            key, _, value = fltr.partition(":")
+            values = value.split("|")
+            with self._lock:
+                self.filters[key] += 1
+            if key == "openalex":
+                ids = [
+                    OPENALEX_PREFIX + v.removeprefix(OPENALEX_PREFIX) for v in values
+                ]
+                found = [self.works.get(self.redirects.get(i, i)) for i in ids]
+            elif key == "doi":
+                found = [
+                    self.by_doi.get(v.lower().removeprefix(DOI_PREFIX)) for v in values
+                ]
+            elif key == "cites":
+                ids = {
+                    i
+                    for v in values
+                    for i in self.cited_by.get(
+                        OPENALEX_PREFIX + v.removeprefix(OPENALEX_PREFIX), []
+                    )
+                }
+                found = [self.works[i] for i in ids]
+            elif key == "from_publication_date":
+                date = value
+                continue
+            else:
+                raise ValueError(f"Unsupported filter '{key}'.")
+            found = {work["id"]: work for work in found if work is not None}
+            results = (
+                found
+                if results is None
+                else {i: work for i, work in results.items() if i in found}
+            )
+        results = list((self.works if results is None else results).values())
+        if date is not None:
+            results = [work for work in results if work["publication_date"] >= date]
+        results.sort(
+            key=lambda work: int(work["id"].removeprefix(OPENALEX_PREFIX + "W"))
+        )
+
+        per_page = int(params.get("per-page", 25))
+        if not 1 <= per_page <= 200:
+            raise ValueError("The number of works per page should be 1-200.")
+        if "cursor" in params:
+            page = None
+            start = 0 if params["cursor"] == "*" else int(params["cursor"])
+        else:
+            page = int(params.get("page", 1))
+            start = (page - 1) * per_page
+        end = start + per_page
+        works = results[start:end]
+        if "select" in params:
+            fields = params["select"].split(",")
+            works = [{field: work[field] for field in fields} for work in works]
+
+        return {
+            "meta": {
+                "count": len(results),
+                "page": page,
+                "per_page": per_page,
+                "next_cursor": (
+                    str(end) if "cursor" in params and end < len(results) else None
+                ),
+            },
+            "results": works,
+        }
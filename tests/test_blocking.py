@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+from asreview.data import ASReviewData
+
+from asreviewcontrib.datatools.blocking import Blocks
+from asreviewcontrib.datatools.blocking import _first_author
+from asreviewcontrib.datatools.blocking import parse_block_keys
+
+
+def test_parse_block_keys():
+    assert parse_block_keys("year, title_prefix:4") == [
+        ("year", None),
+        ("title_prefix", 4),
+    ]
+    assert parse_block_keys("title_prefix") == [("title_prefix", 8)]
+
+    with pytest.raises(ValueError):
+        parse_block_keys("journal")
+    with pytest.raises(ValueError):
+        parse_block_keys("year:2")
+    with pytest.raises(ValueError):
+        parse_block_keys("title_prefix:x")
+
+
+def test_first_author():
+    assert _first_author("Smith, J.; Doe, A.") == "Smith"
+    assert _first_author(["Jane Doe", "John Smith"]) == "Doe"
+    assert _first_author("['Koopman, Miriam', 'Simkens, Lieke HJ']") == "Koopman"
+    assert _first_author(np.nan) is None
+
+
+def test_blocks():
+    df = pd.DataFrame(
+        {
+            "title": ["Deep learning", "Deep learning!", "Shallow learning", "Deep"],
+            "authors": ["Smith, J.", "smith, j", "Doe, A.", None],
+            "publication_year": [2020, 2021, 2022, np.nan],
+        }
+    )
+    blocks = Blocks.from_data(ASReviewData(df), "year,first_author,title_prefix:4")
+
+    assert blocks.compatible(0, np.array([1, 2, 3])).tolist() == [True, False, True]
+    assert blocks.compatible(1, np.array([2])).tolist() == [False]
+    assert blocks.compatible(3, np.array([0, 1, 2])).tolist() == [True, True, False]
@@ -0,0 +1,68 @@
+import numpy as np
+
+from asreviewcontrib.datatools.cache import NormalizedTextCache
+from asreviewcontrib.datatools.cache import OpenAlexCache
+
+
+def test_normalized_text_cache(tmpdir):
+    cache = NormalizedTextCache(tmpdir)
+    key = cache.key(["A title", None], title_only=True, stopwords_language=None)
+
+    assert cache.get(key) is None
+    assert key != cache.key(["A title", None], False, None)
+    assert key != cache.key(["A title", None], True, "english")
+    assert key != cache.key(["A title", ""], True, None)
+
+    cache.put(key, ["a title", None], np.array([7, np.nan]))
+    texts, lengths = cache.get(key)
+    assert texts == ["a title", None]
+    np.testing.assert_array_equal(lengths, [7, np.nan])
+
+
+def test_normalized_text_cache_eviction(tmpdir):
+    cache = NormalizedTextCache(tmpdir)
+    cache.max_size = 2000
+
+    rng = np.random.default_rng(0)
+    for key in ["a", "b", "c"]:
+        texts = [str(x) for x in rng.random(50)]
+        cache.put(key, texts, np.array([len(t) for t in texts]))
+        if key == "b":
+            cache.get("a")
+
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+    assert cache.get("c") is not None
+
+
+def test_openalex_cache(tmpdir):
+    cache = OpenAlexCache(tmpdir)
+    works = [
+        {"id": "https://openalex.org/W1", "doi": None, "referenced_works": []},
+        {"id": "https://openalex.org/W2", "doi": None, "referenced_works": ["W1"]},
+    ]
+    cache.put_works(works)
+    cache.put_citing(
+        {"https://openalex.org/W1": ["https://openalex.org/W2"], "W3": ["W4"]}
+    )
+    cache.put_dois({"10.1/a": "https://openalex.org/W1", "10.1/b": None})
+    cache.put_aliases({"https://openalex.org/W9": "https://openalex.org/W1"})
+
+    assert cache.get_works(["https://openalex.org/W2", "W5"]) == {
+        "https://openalex.org/W2": works[1]
+    }
+    # the citing works of W3 are not in the cache
+    assert cache.get_citing(["https://openalex.org/W1", "W3"]) == {
+        "https://openalex.org/W1": [works[1]]
+    }
+    assert cache.get_dois(["10.1/a", "10.1/b", "10.1/c"]) == {
+        "10.1/a": "https://openalex.org/W1",
+        "10.1/b": None,
+    }
+    assert cache.get_aliases(["https://openalex.org/W9", "W1"]) == {
+        "https://openalex.org/W9": "https://openalex.org/W1"
+    }
+
+    # expired entries are only used offline
+    assert OpenAlexCache(tmpdir, ttl=0).get_works(["https://openalex.org/W1"]) == {}
+    assert len(OpenAlexCache(tmpdir, ttl=0, offline=True).get_works([works[0]["id"]]))
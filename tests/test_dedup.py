@@ -1,8 +1,17 @@
+import json
 from pathlib import Path
 
+import pandas as pd
+import pytest
 from asreview.data import ASReviewData
 
+from asreviewcontrib.datatools.dedup import DedupIndex
+from asreviewcontrib.datatools.dedup import _CandidateIndex
+from asreviewcontrib.datatools.dedup import _DuplicateFinder
+from asreviewcontrib.datatools.dedup import _exact_duplicates
+from asreviewcontrib.datatools.dedup import _UnionFind
 from asreviewcontrib.datatools.dedup import deduplicate_data
+from asreviewcontrib.datatools.dedup import merge_shards
 
 test_dir = Path(__file__).parent
 file_without_doi = Path(test_dir, "demo_data", "duplicate_data_without_doi.csv")
@@ -134,3 +143,340 @@ def test_threshold_zero():
     data = ASReviewData.from_file(file_with_doi)
     deduplicate_data(data, similar=True, threshold=0)
     assert len(data.df) == 1
+
+
+def test_candidate_index():
+    texts = pd.Series(["aaaa", None, "aaaaaaaaa", "aaaaaaa", "a", "aaaaaaaaaaaaaaa"])
+    pids = pd.Series(["x", "x", None, "y", "y", None])
+
+    lengths = texts.str.len()
+    index = _CandidateIndex(lengths.to_numpy(), pids)
+    for i in range(len(texts)):
+        expected = [
+            j
+            for j in range(i + 1, len(texts))
+            if (pids[i] is not None and pids[i] == pids[j])
+            or abs(lengths[i] - lengths[j]) < 5
+        ]
+        assert index.candidates(i).tolist() == expected
+
+
+def test_dedup_with_similarity_lsh():
+    data = ASReviewData.from_file(file_with_doi)
+    deduplicate_data(data, similar=True, threshold=0.95, method="lsh")
+    assert len(data.df) == 2
+
+
+def test_dedup_with_similarity_tfidf():
+    data = ASReviewData.from_file(file_without_doi)
+    deduplicate_data(data, similar=True, threshold=0.8, method="tfidf")
+    assert len(data.df) == 2
+
+    data = ASReviewData.from_file(file_with_doi)
+    deduplicate_data(data, similar=True, threshold=0.9, method="tfidf", jobs=2)
+    assert len(data.df) == 2
+
+
+def test_dedup_with_similarity_rapidfuzz():
+    pytest.importorskip("rapidfuzz")
+
+    for strict in [False, True]:
+        data = ASReviewData.from_file(file_with_doi)
+        deduplicate_data(
+            data, similar=True, threshold=0.95, strict=strict, scorer="rapidfuzz"
+        )
+
+        data_difflib = ASReviewData.from_file(file_with_doi)
+        deduplicate_data(data_difflib, similar=True, threshold=0.95, strict=strict)
+
+        assert data.df.equals(data_difflib.df)
+
+
+def test_dedup_with_similarity_jobs():
+    data = ASReviewData.from_file(file_with_doi)
+    deduplicate_data(data, similar=True, threshold=0.95, jobs=2)
+
+    data_serial = ASReviewData.from_file(file_with_doi)
+    deduplicate_data(data_serial, similar=True, threshold=0.95)
+
+    assert data.df.equals(data_serial.df)
+
+
+def test_exact_duplicates():
+    texts = ["a b", "c", "a b", None, None, "c", "a b"]
+    assert _exact_duplicates(texts) == [(0, 2), (1, 5), (0, 6)]
+
+
+def test_union_find():
+    clusters = _UnionFind()
+    assert clusters.union(3, 1)
+    assert clusters.union(4, 3)
+    assert not clusters.union(1, 4)
+    assert clusters.find(4) == 1
+    assert clusters.labels(6).tolist() == [0, 1, 2, 1, 1, 3]
+
+
+def test_dedup_cluster():
+    # record 2 has the text of record 0 and the doi of record 1
+    df = pd.DataFrame(
+        {
+            "title": ["a title", "another title", "a title", "something else"],
+            "abstract": ["an abstract", "other words", "an abstract", "unrelated"],
+            "doi": ["doi1", "doi2", "doi2", "doi3"],
+        }
+    )
+
+    data = ASReviewData(df.copy())
+    deduplicate_data(data, similar=True)
+    assert len(data.df) == 3
+
+    data = ASReviewData(df.copy())
+    deduplicate_data(data, similar=True, cluster=True)
+    assert len(data.df) == 4
+    assert data.df["duplicate_cluster"].tolist() == [0, 0, 0, 1]
+
+
+def test_dedup_with_similarity_block():
+    data = ASReviewData.from_file(file_with_doi)
+    deduplicate_data(data, similar=True, threshold=0.95, block="title_prefix:3")
+    assert len(data.df) == 3
+
+    # records with the same doi are duplicates in any block
+    data = ASReviewData.from_file(file_with_doi)
+    deduplicate_data(data, similar=True, threshold=0.95, block="year", jobs=2)
+    assert len(data.df) == 2
+
+
+def test_dedup_with_similarity_cache(tmpdir):
+    for _ in range(2):
+        data = ASReviewData.from_file(file_with_doi)
+        deduplicate_data(data, similar=True, threshold=0.95, cache_dir=tmpdir)
+        assert len(data.df) == 2
+
+
+def test_dedup_index(tmpdir):
+    data = ASReviewData.from_file(file_with_doi)
+    dedup_index = DedupIndex.from_data(ASReviewData(data.df.iloc[:2]))
+    index_path = Path(tmpdir, "index.json.gz")
+    dedup_index.save(index_path)
+    dedup_index = DedupIndex.load(index_path)
+
+    assert len(dedup_index) == 2
+    assert dedup_index.query(ASReviewData(data.df.iloc[2:]), threshold=0.95) == [
+        (0, 0),
+        (0, 1),
+    ]
+
+
+def test_dedup_against(tmpdir, monkeypatch):
+    index_path = Path(tmpdir, "index.json.gz")
+    data = ASReviewData.from_file(file_with_doi)
+
+    first = ASReviewData(data.df.iloc[:2])
+    deduplicate_data(first, similar=True, threshold=0.95, against=index_path)
+    assert len(first.df) == 1
+
+    # the new records are normalized once, for the query and for adding them
+    normalize = DedupIndex._normalize
+    calls = []
+    monkeypatch.setattr(
+        DedupIndex,
+        "_normalize",
+        lambda self, asdata: calls.append(len(asdata.df)) or normalize(self, asdata),
+    )
+    second = ASReviewData(data.df.iloc[2:])
+    deduplicate_data(second, similar=True, threshold=0.95, against=index_path)
+    assert len(second.df) == 1
+    assert calls == [3]
+    assert len(DedupIndex.load(index_path)) == 5
+
+
+def test_dedup_shards(tmpdir, monkeypatch):
+    monkeypatch.setattr("asreviewcontrib.datatools.dedup.DEDUP_CHUNK_SIZE", 2)
+
+    data = ASReviewData.from_file(file_with_doi)
+    deduplicate_data(data, similar=True, threshold=0.95)
+
+    paths = [Path(tmpdir, f"pairs_{k}.json.gz") for k in range(1, 4)]
+    for k, path in enumerate(paths, start=1):
+        data_shard = ASReviewData.from_file(file_with_doi)
+        deduplicate_data(data_shard, path, similar=True, threshold=0.95, shard=f"{k}/3")
+        assert len(data_shard.df) == 5
+
+    data_merged = ASReviewData.from_file(file_with_doi)
+    merge_shards(data_merged, paths)
+    assert data_merged.df.equals(data.df)
+
+    with pytest.raises(ValueError):
+        merge_shards(ASReviewData.from_file(file_with_doi), paths[:2])
+    with pytest.raises(ValueError):
+        merge_shards(ASReviewData.from_file(file_without_doi), paths)
+
+    # sharding only applies to similarity deduplication without an index
+    with pytest.raises(ValueError):
+        deduplicate_data(ASReviewData.from_file(file_with_doi), paths[0], shard="1/3")
+    with pytest.raises(ValueError):
+        deduplicate_data(
+            ASReviewData.from_file(file_with_doi),
+            paths[0],
+            similar=True,
+            against=Path(tmpdir, "index.json.gz"),
+            shard="1/3",
+        )
+
+
+def test_dedup_shards_block_columns(tmpdir):
+    df = ASReviewData.from_file(file_with_doi).df
+    df["publication_year"] = 2000
+
+    paths = [Path(tmpdir, f"pairs_{k}.json.gz") for k in range(1, 3)]
+    for k, path in enumerate(paths, start=1):
+        deduplicate_data(
+            ASReviewData(df.copy()),
+            path,
+            similar=True,
+            threshold=0.95,
+            block="year",
+            shard=f"{k}/2",
+        )
+
+    # the years are read by the block key, so other years are other data
+    df_changed = df.copy()
+    df_changed["publication_year"] = [1990, 2000, 2010, 2020, 2030]
+    with pytest.raises(ValueError, match="other data"):
+        merge_shards(ASReviewData(df_changed), paths)
+    merge_shards(ASReviewData(df.copy()), paths)
+
+
+def test_dedup_resume(tmpdir, monkeypatch, capsys):
+    monkeypatch.setattr("asreviewcontrib.datatools.dedup.DEDUP_CHUNK_SIZE", 1)
+    monkeypatch.setattr("asreviewcontrib.datatools.dedup.CHECKPOINT_INTERVAL", 0)
+    checkpoint_path = Path(tmpdir, "checkpoint.json.gz")
+
+    data = ASReviewData.from_file(file_with_doi)
+    deduplicate_data(data, similar=True, threshold=0.95)
+
+    # interrupt the deduplication at the fourth record
+    find = _DuplicateFinder.find
+
+    def interrupted_find(self, start, stop, *args, **kwargs):
+        if start == 3:
+            raise KeyboardInterrupt
+        return find(self, start, stop, *args, **kwargs)
+
+    monkeypatch.setattr(_DuplicateFinder, "find", interrupted_find)
+    with pytest.raises(KeyboardInterrupt):
+        deduplicate_data(
+            ASReviewData.from_file(file_with_doi),
+            similar=True,
+            threshold=0.95,
+            checkpoint_path=checkpoint_path,
+        )
+    assert checkpoint_path.exists()
+    monkeypatch.setattr(_DuplicateFinder, "find", find)
+
+    # a checkpoint with other options is not used
+    deduplicate_data(
+        ASReviewData.from_file(file_with_doi),
+        similar=True,
+        threshold=0.9,
+        checkpoint_path=checkpoint_path,
+        resume=True,
+    )
+    assert "Not resuming" in capsys.readouterr().out
+
+    monkeypatch.setattr(_DuplicateFinder, "find", interrupted_find)
+    with pytest.raises(KeyboardInterrupt):
+        deduplicate_data(
+            ASReviewData.from_file(file_with_doi),
+            similar=True,
+            threshold=0.95,
+            checkpoint_path=checkpoint_path,
+        )
+    monkeypatch.setattr(_DuplicateFinder, "find", find)
+
+    data_resumed = ASReviewData.from_file(file_with_doi)
+    deduplicate_data(
+        data_resumed,
+        similar=True,
+        threshold=0.95,
+        checkpoint_path=checkpoint_path,
+        resume=True,
+    )
+    assert "Resuming" in capsys.readouterr().out
+    assert data_resumed.df.equals(data.df)
+    assert not checkpoint_path.exists()
+
+
+def test_dedup_checkpoint_not_writable(tmpdir):
+    data = ASReviewData.from_file(file_with_doi)
+    deduplicate_data(data, similar=True, threshold=0.95)
+
+    data_checkpoint = ASReviewData.from_file(file_with_doi)
+    with pytest.warns(UserWarning, match="Could not save the checkpoint"):
+        deduplicate_data(
+            data_checkpoint,
+            similar=True,
+            threshold=0.95,
+            checkpoint_path=Path(tmpdir, "missing_dir", "checkpoint.json.gz"),
+        )
+    assert data_checkpoint.df.equals(data.df)
+
+
+def test_dedup_report(tmpdir):
+    report_path = Path(tmpdir, "pairs.csv")
+    data = ASReviewData.from_file(file_with_doi)
+    deduplicate_data(data, similar=True, threshold=0.95, report_path=report_path)
+
+    report = pd.read_csv(report_path)
+    assert report.columns.tolist() == [
+        "record_id_1",
+        "record_id_2",
+        "match",
+        "score",
+        "doi_1",
+        "doi_2",
+    ]
+    assert report["match"].tolist() == ["text", "pid", "similar"]
+    assert (report["score"] > 0).all()
+    assert len(data.df) == 5 - len(report)
+
+    html_path = Path(tmpdir, "pairs.html")
+    deduplicate_data(
+        ASReviewData.from_file(file_with_doi),
+        similar=True,
+        threshold=0.95,
+        report_path=html_path,
+        report_diff=True,
+    )
+    html = html_path.read_text()
+    assert html.count("<tr>") == len(report) + 1
+    assert "<ins>" in html and html.rstrip().endswith("</html>")
+
+    with pytest.raises(ValueError):
+        deduplicate_data(
+            ASReviewData.from_file(file_with_doi),
+            similar=True,
+            report_path=Path(tmpdir, "pairs.txt"),
+        )
+
+
+def test_dedup_profile(tmpdir):
+    profile_path = Path(tmpdir, "profile.json")
+    data = ASReviewData.from_file(file_with_doi)
+    deduplicate_data(
+        data, similar=True, threshold=0.9, strict=True, profile_path=profile_path
+    )
+
+    profile = json.loads(profile_path.read_text())
+    assert {"ftfy", "clean", "index", "compare", "apply", "total"} <= set(
+        profile["timings"]
+    )
+    counts = profile["counts"]
+    assert counts["records"] == 5
+    assert counts["exact_duplicates"] + counts["other_duplicates"] == 5 - len(data.df)
+    assert counts["real_quick_ratio"] == counts["compared"]
+    assert counts["quick_ratio"] == (
+        counts["real_quick_ratio"] - counts["rejected_real_quick_ratio"]
+    )
+    assert counts["ratio"] == counts["quick_ratio"] - counts["rejected_quick_ratio"]
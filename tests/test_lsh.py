@@ -0,0 +1,34 @@
+import numpy as np
+
+from asreviewcontrib.datatools.lsh import LSHIndex
+from asreviewcontrib.datatools.lsh import minhash_signatures
+
+TEXTS = [
+    "mimicking the one dimensional marginal distributions of processes",
+    "myrmecochorous plants in australia and their dispersal by ants",
+    "mimicking the one dimensional marginal distributions of processes",
+    None,
+    "myrmecochorous plants in australia and their dispersal by ant",
+    "abc",
+]
+
+
+def test_minhash_signatures():
+    signatures = minhash_signatures(TEXTS, n_permutations=64)
+
+    assert signatures.shape == (len(TEXTS), 64)
+    assert (signatures[0] == signatures[2]).all()
+    assert (signatures[1] == signatures[4]).mean() > 0.8
+    assert (signatures[0] == signatures[1]).mean() < 0.2
+    assert (signatures[3] == np.iinfo(np.uint32).max).all()
+
+
+def test_lsh_index():
+    signatures = minhash_signatures(TEXTS)
+    mask = np.array([text is not None for text in TEXTS])
+    index = LSHIndex(signatures, bands=16, rows=8, mask=mask)
+
+    assert index.candidates(0).tolist() == [2]
+    assert index.candidates(4).tolist() == [1]
+    assert index.candidates(3).tolist() == []
+    assert index.candidates(5).tolist() == []
@@ -0,0 +1,46 @@
+from asreviewcontrib.datatools.normalize import normalize_doi
+from asreviewcontrib.datatools.normalize import normalize_texts
+from asreviewcontrib.datatools.normalize import remove_stopwords
+
+
+def test_normalize_texts():
+    texts = [
+        "An  Exact, copy (of) the Title!",
+        "CafÃ© &amp; bar",
+        "well-being_score\tnow",
+        "?!",
+        None,
+        float("nan"),
+    ]
+
+    assert normalize_texts(texts) == [
+        "an exact copy of the title",
+        "café bar",
+        "well-being_scorenow",
+        None,
+        None,
+        None,
+    ]
+
+
+def test_remove_stopwords():
+    texts = ["the cat of the well-being", "the", None, "theory of the_cat"]
+    stopwords = frozenset(["the", "of", "being"])
+
+    assert remove_stopwords(texts, stopwords) == [
+        " cat   well-",
+        "",
+        None,
+        "theory  the_cat",
+    ]
+
+
+def test_normalize_doi():
+    for doi in [
+        "10.1042/CS20220150",
+        "https://doi.org/10.1042/cs20220150",
+        "HTTP://DX.DOI.ORG/10.1042/cs20220150",
+        "doi: 10.1042/cs20220150",
+        " https://www.doi.org/10.1042/cs20220150 ",
+    ]:
+        assert normalize_doi(doi) == "10.1042/cs20220150"
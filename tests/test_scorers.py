@@ -0,0 +1,35 @@
+import random
+import string
+
+import pytest
+
+from asreviewcontrib.datatools.scorers import DifflibScorer
+from asreviewcontrib.datatools.scorers import RapidfuzzScorer
+
+
+def _texts(n_texts: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    base = "".join(rng.choice(string.ascii_lowercase + " ") for _ in range(60))
+
+    texts = []
+    for _ in range(n_texts):
+        text = list(base)
+        for _ in range(rng.randint(0, 8)):
+            text[rng.randrange(len(text))] = rng.choice(string.ascii_lowercase)
+        texts.append("".join(text[: rng.randint(40, 60)]))
+    return texts
+
+
+@pytest.mark.parametrize("strict", [False, True])
+@pytest.mark.parametrize("threshold", [0.5, 0.8, 0.95])
+def test_rapidfuzz_scorer(threshold, strict):
+    pytest.importorskip("rapidfuzz")
+
+    texts = _texts(50) + ["ünïcödé text", "unicode text"]
+    rows = list(range(1, len(texts)))
+
+    expected = DifflibScorer(texts, threshold, strict).similar(0, rows)
+    assert RapidfuzzScorer(texts, threshold, strict).similar(0, rows) == expected
+
+    expected = DifflibScorer(texts, threshold, strict).similar(50, [51])
+    assert RapidfuzzScorer(texts, threshold, strict).similar(50, [51]) == expected
@@ -0,0 +1,109 @@
+import gzip
+import json
+import random
+from pathlib import Path
+
+import pandas as pd
+
+from asreviewcontrib.datatools.snapshot import SnapshotIndex
+from asreviewcontrib.datatools.snapshot import build_snapshot_index
+from asreviewcontrib.datatools.snowball import backward_snowballing
+from asreviewcontrib.datatools.snowball import forward_snowballing
+from asreviewcontrib.datatools.snowball import openalex_from_doi
+from asreviewcontrib.datatools.snowball import snowball
+
+N_WORKS = 50
+
+
+def _work_id(i):
+    return f"https://openalex.org/W{1000 + i}"
+
+
+def _make_snapshot(snapshot_dir):
+    """Write a synthetic snapshot of two partitions and return its works."""
+    rng = random.Random(0)
+    works = []
+    for i in range(N_WORKS):
+        works.append(
+            {
+                "id": _work_id(i),
+                "doi": f"https://doi.org/10.1234/Work.{i}" if i % 5 else None,
+                "title": f"Work {i}",
+                "abstract_inverted_index": {"An": [0], "abstract": [1], str(i): [2]},
+                "publication_date": f"{1980 + i}-01-01",
+                # works only cite older works, and some works outside the snapshot
+                "referenced_works": [
+                    _work_id(j) for j in rng.sample(range(i), min(i, 3))
+                ]
+                + ["https://openalex.org/W1"],
+            }
+        )
+
+    for part, part_works in enumerate([works[::2], works[1::2]]):
+        path = Path(snapshot_dir, f"updated_date=2024-01-0{part + 1}", "part_000.gz")
+        path.parent.mkdir(parents=True)
+        with gzip.open(path, "wt") as f:
+            for work in part_works:
+                f.write(json.dumps(work) + "\n")
+    return works
+
+
+def test_snapshot_index(tmpdir):
+    works = _make_snapshot(Path(tmpdir, "snapshot"))
+    build_snapshot_index(Path(tmpdir, "snapshot"), Path(tmpdir, "index"))
+    index = SnapshotIndex(Path(tmpdir, "index"))
+
+    identifiers = [_work_id(10), _work_id(40), "https://openalex.org/W1"]
+
+    backward = backward_snowballing(identifiers, cache=index)
+    # W1 is not in the snapshot
+    assert list(backward) == identifiers[:2]
+    for identifier in identifiers[:2]:
+        work = next(w for w in works if w["id"] == identifier)
+        assert sorted(w["id"] for w in backward[identifier]) == sorted(
+            work["referenced_works"][:-1]
+        )
+
+    forward = forward_snowballing(identifiers, cache=index)
+    assert list(forward) == identifiers[:2]
+    for identifier in identifiers[:2]:
+        assert sorted(w["id"] for w in forward[identifier]) == sorted(
+            w["id"] for w in works if identifier in w["referenced_works"][:-1]
+        )
+    found = forward[identifiers[0]][0]
+    assert found["abstract"].startswith("An abstract")
+    assert found["title"] == f"Work {int(found['id'][-4:]) - 1000}"
+
+    assert openalex_from_doi(
+        ["10.1234/work.1", "doi:10.1234/WORK.2", "10.1/x"], cache=index
+    ) == {
+        "10.1234/work.1": _work_id(1),
+        "10.1234/work.2": _work_id(2),
+        "10.1/x": None,
+    }
+
+
+def test_snowball_snapshot(tmpdir):
+    works = _make_snapshot(Path(tmpdir, "snapshot"))
+    build_snapshot_index(Path(tmpdir, "snapshot"), Path(tmpdir, "index"))
+
+    input_fp = Path(tmpdir, "input.csv")
+    pd.DataFrame(
+        {"title": ["Work 3", "Work 4"], "doi": ["10.1234/work.3", "10.1234/work.4"]}
+    ).to_csv(input_fp, index=False)
+    out_fp = Path(tmpdir, "output.csv")
+    snowball(
+        input_path=input_fp,
+        output_path=out_fp,
+        forward=True,
+        backward=True,
+        use_all=True,
+        snapshot_path=Path(tmpdir, "index"),
+    )
+
+    seeds = {_work_id(3), _work_id(4)}
+    expected = {w["id"] for w in works if seeds & set(w["referenced_works"])} | {
+        ref for w in works if w["id"] in seeds for ref in w["referenced_works"][:-1]
+    }
+    df = pd.read_csv(out_fp)
+    assert set(df["openalex_id"]) == expected
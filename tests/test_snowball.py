@@ -1,12 +1,34 @@
+import json
+from contextlib import nullcontext
 from pathlib import Path
 
 import pandas as pd
 import pyalex
+import pytest
+import requests
+from asreview import ASReviewData
 
+from asreviewcontrib.datatools import snowball as snowball_module
+from asreviewcontrib.datatools.cache import OpenAlexCache
+from asreviewcontrib.datatools.snowball import _Journal
+from asreviewcontrib.datatools.snowball import _journaled
+from asreviewcontrib.datatools.snowball import _OpenAlexClient
+from asreviewcontrib.datatools.snowball import _WorkWriter
 from asreviewcontrib.datatools.snowball import backward_snowballing
 from asreviewcontrib.datatools.snowball import forward_snowballing
 from asreviewcontrib.datatools.snowball import openalex_from_doi
 from asreviewcontrib.datatools.snowball import snowball
+from tests.openalex_server import OpenAlexServer
+from tests.openalex_server import make_works
+from tests.openalex_server import work_doi
+from tests.openalex_server import work_id
+
+try:
+    # requests-cache is installed globally by some dependencies of asreview, which
+    # would answer requests to the local server without reaching it
+    from requests_cache import disabled as requests_cache_disabled
+except ImportError:
+    requests_cache_disabled = nullcontext
 
 INPUT_DIR = Path(__file__).parent / "demo_data"
 EMAIL = "asreview@uu.nl"
@@ -157,3 +179,431 @@ def test_snowballing_from_doi(tmpdir):
     # Actual value at time of writing test is 46 (2024-08-26).
     # See comments in 'test_openalex_id_backward'.
     assert 43 <= len(df) <= 49
+
+
+class _FakeSession:
+    def __init__(self, statuses):
+        self.statuses = statuses
+
+    def get(self, url, **kwargs):
+        response = requests.Response()
+        response.status_code = self.statuses.pop(0)
+        response._content = b'{"meta": {}, "results": [{"id": "W1"}]}'
+        return response
+
+
+def test_openalex_client_retries(monkeypatch):
+    monkeypatch.setattr(snowball_module, "OPENALEX_BACKOFF", 0.001)
+    client = _OpenAlexClient(max_concurrency=4)
+    session = _FakeSession([429, 503, 200])
+    monkeypatch.setattr(client, "_session", lambda: session)
+
+    works = client.get(pyalex.Works().filter(openalex="W1"), per_page=1)
+
+    assert [work["id"] for work in works] == ["W1"]
+    assert client.counts == {"requests": 3, "retries": 2, "rate_limited": 1}
+    assert client.limit.limit < 4
+
+
+def test_snowball_journal(tmpdir):
+    path = Path(tmpdir, "output.csv.snowball_journal")
+    links = {"W1": ["W3", "W4"], "W2": ["W3"]}
+    works = {"W3": {"id": "W3", "title": "a"}, "W4": {"id": "W4", "title": "b"}}
+
+    journal = _Journal(path, {"input": "abc", "options": {"depth": 2}})
+    journal.start()
+    journal.put_dois({"10.1/a": "W1", "10.1/b": None})
+    journal.put_batch("forward", 1, links, works)
+    # W5 was requested but not found
+    journal.put_done("forward", 1, ["W1", "W2", "W5"])
+    # a line that was not written completely when the run was interrupted
+    with open(path, "a") as f:
+        f.write('{"direction": "backward", "hop": 1, "li')
+
+    resumed = _Journal(path, {"input": "abc", "options": {"depth": 2}})
+    resumed.start(resume=True)
+    assert resumed.dois == {"10.1/a": "W1", "10.1/b": None}
+    assert resumed.done == {("forward", 1): {"W1", "W2", "W5"}}
+    assert list(resumed.get_batches("forward", 1)) == [(links, works)]
+    assert list(resumed.get_batches("backward", 1)) == []
+
+    def batches_fn(identifiers):
+        assert identifiers == ["W6"]
+        return iter([])
+
+    assert list(_journaled(resumed, "forward", 1, ["W1", "W5", "W6"], batches_fn)) == [
+        (links, works)
+    ]
+    # W6 was not found either, and is done now
+    reloaded = _Journal(path, {"input": "abc", "options": {"depth": 2}})
+    reloaded.start(resume=True)
+    assert reloaded.done == {("forward", 1): {"W1", "W2", "W5", "W6"}}
+
+    other = _Journal(path, {"input": "abc", "options": {"depth": 3}})
+    other.start(resume=True)
+    assert other.dois is None
+    assert other.done == {}
+
+
+def test_work_writer(tmpdir):
+    columns = ["openalex_id", "title", "referenced_works"]
+    works = [
+        {"openalex_id": "W1", "title": "a, b", "referenced_works": ["W2", "W3"]},
+        {"openalex_id": "W2", "title": None, "referenced_works": []},
+    ]
+
+    for suffix in [".csv", ".tsv"]:
+        with _WorkWriter(Path(tmpdir, f"works{suffix}"), columns) as writer:
+            for work in works:
+                writer.write(work)
+        ASReviewData(pd.DataFrame(works)).to_file(Path(tmpdir, f"expected{suffix}"))
+
+        assert (
+            Path(tmpdir, f"works{suffix}").read_text()
+            == Path(tmpdir, f"expected{suffix}").read_text()
+        )
+
+    with _WorkWriter(Path(tmpdir, "works.jsonl"), columns) as writer:
+        for work in works:
+            writer.write(work)
+    with open(Path(tmpdir, "works.jsonl")) as f:
+        assert [json.loads(line) for line in f] == works
+
+
+# Works served by the local OpenAlex server. The first works are cited by more than
+# 200 works, so their citing works take more than one page.
+SERVER_WORKS = make_works(2000)
+
+
+@pytest.fixture
+def openalex_server(monkeypatch):
+    # every fifth request is rate limited, and can be sent again right away
+    with requests_cache_disabled():
+        with OpenAlexServer(SERVER_WORKS, rate_limit_every=5, retry_after=0) as server:
+            monkeypatch.setitem(pyalex.config, "openalex_url", server.url)
+            monkeypatch.setattr(snowball_module, "_client", _OpenAlexClient())
+            yield server
+
+
+def test_forward_snowballing_server(openalex_server):
+    identifiers = [work_id(number) for number in [1, 2, 3, 1500, 2000]]
+
+    forwards_citations = forward_snowballing(identifiers, workers=2)
+
+    assert list(forwards_citations) == identifiers
+    for identifier in identifiers:
+        assert sorted(work["id"] for work in forwards_citations[identifier]) == sorted(
+            openalex_server.cited_by.get(identifier, [])
+        )
+    assert len(forwards_citations[identifiers[0]]) > 200
+    assert openalex_server.counts["rate_limited"] > 0
+
+
+def test_forward_snowballing_workers(openalex_server):
+    # requests take long enough to overlap, and are not rate limited
+    openalex_server.latency = 0.1
+    openalex_server.rate_limit_every = 0
+    identifiers = [work_id(number) for number in range(1000, 2000, 3)]
+
+    serial = forward_snowballing(identifiers, workers=1)
+    assert openalex_server.max_concurrent == 1
+    parallel = forward_snowballing(identifiers, workers=4)
+    assert openalex_server.max_concurrent > 1
+
+    assert parallel == serial
+    assert list(parallel) == identifiers
+
+
+def test_backward_snowballing_server(openalex_server):
+    identifiers = [work_id(number) for number in range(100, 2000, 10)]
+
+    backwards_citations = backward_snowballing(identifiers)
+
+    assert list(backwards_citations) == identifiers
+    for identifier in identifiers:
+        assert [work["id"] for work in backwards_citations[identifier]] == (
+            openalex_server.works[identifier]["referenced_works"]
+        )
+
+
+def test_openalex_from_doi_server(openalex_server):
+    dois = [work_doi(number).removeprefix("https://doi.org/") for number in [1, 2, 3]]
+
+    assert openalex_from_doi(
+        [dois[0], "HTTPS://DOI.ORG/" + dois[1].upper(), "doi:" + dois[2], "not_a_doi"],
+        workers=2,
+    ) == {
+        dois[0]: work_id(1),
+        dois[1]: work_id(2),
+        dois[2]: work_id(3),
+        "not_a_doi": None,
+    }
+
+
+def test_snowballing_server(openalex_server, tmpdir):
+    numbers = [10, 500, 1999]
+    input_fp = Path(tmpdir, "input.csv")
+    pd.DataFrame(
+        {
+            "title": [f"Title of work {number}" for number in numbers],
+            "doi": [work_doi(number) for number in numbers],
+        }
+    ).to_csv(input_fp, index=False)
+    out_fp = Path(tmpdir, "output.csv")
+    snowball(
+        input_path=input_fp,
+        output_path=out_fp,
+        forward=True,
+        backward=True,
+        use_all=True,
+    )
+
+    expected = set()
+    for number in numbers:
+        expected.update(openalex_server.cited_by.get(work_id(number), []))
+        expected.update(openalex_server.works[work_id(number)]["referenced_works"])
+    df = pd.read_csv(out_fp)
+    assert set(df["openalex_id"]) == expected
+
+
+@pytest.mark.parametrize("redirected", [[100], [100, 200]])
+def test_backward_snowballing_redirects(monkeypatch, tmpdir, redirected):
+    redirects = {work_id(100000 + number): work_id(number) for number in redirected}
+    with requests_cache_disabled(), OpenAlexServer(
+        SERVER_WORKS, redirects=redirects
+    ) as server:
+        monkeypatch.setitem(pyalex.config, "openalex_url", server.url)
+        monkeypatch.setattr(snowball_module, "_client", _OpenAlexClient())
+        identifiers = [work_id(50)] + list(redirects)
+        backwards_citations = backward_snowballing(
+            identifiers, cache=OpenAlexCache(tmpdir)
+        )
+
+    # redirected works are returned with their own identifier
+    expected = [work_id(50)] + [work_id(number) for number in redirected]
+    assert list(backwards_citations) == expected
+    assert OpenAlexCache(tmpdir).get_aliases(identifiers) == redirects
+    # the redirected identifiers are found in the cache, without requests
+    assert (
+        backward_snowballing(identifiers, cache=OpenAlexCache(tmpdir, offline=True))
+        == backwards_citations
+    )
+
+
+def _expected_hops(
+    seeds, forward, backward, depth, max_frontier=None, from_publication_date=None
+):
+    """Snowball the works of the server, and get the hop of every work found."""
+    works = {work["id"]: work for work in SERVER_WORKS}
+    citing = {}
+    for work in SERVER_WORKS:
+        for ref in work["referenced_works"]:
+            citing.setdefault(ref, []).append(work["id"])
+
+    found = {}
+    frontier = seeds
+    visited = set(seeds)
+    for hop in range(1, depth + 1):
+        next_frontier = []
+        directions = ["forward"] * forward + ["backward"] * backward
+        for direction in directions:
+            for identifier in frontier:
+                if direction == "forward":
+                    ids = citing.get(identifier, [])
+                else:
+                    ids = works[identifier]["referenced_works"]
+                for i in ids:
+                    if i in found:
+                        continue
+                    if (
+                        from_publication_date is not None
+                        and works[i]["publication_date"] < from_publication_date
+                    ):
+                        found[i] = None
+                        continue
+                    found[i] = hop
+                    if hop < depth and i not in visited:
+                        next_frontier.append(i)
+        frontier = next_frontier[:max_frontier]
+        visited.update(frontier)
+    return {i: hop for i, hop in found.items() if hop is not None}
+
+
+@pytest.mark.parametrize(
+    "forward,backward,depth,max_frontier,from_publication_date",
+    [
+        (False, True, 2, None, None),
+        (True, True, 2, 5, None),
+        (False, True, 3, 10, None),
+        (True, True, 2, None, "2000-01-01"),
+        (True, False, 1, None, "2010-01-01"),
+    ],
+)
+def test_snowballing_depth(
+    openalex_server,
+    tmpdir,
+    forward,
+    backward,
+    depth,
+    max_frontier,
+    from_publication_date,
+):
+    seeds = [work_id(number) for number in [1500, 1800, 1999]]
+    input_fp = Path(tmpdir, "input.csv")
+    pd.DataFrame(
+        {"title": ["Seed 1", "Seed 2", "Seed 3"], "openalex_id": seeds}
+    ).to_csv(input_fp, index=False)
+    out_fp = Path(tmpdir, "output.csv")
+    snowball(
+        input_path=input_fp,
+        output_path=out_fp,
+        forward=forward,
+        backward=backward,
+        use_all=True,
+        depth=depth,
+        max_frontier=max_frontier,
+        from_publication_date=from_publication_date,
+    )
+
+    expected = _expected_hops(
+        seeds, forward, backward, depth, max_frontier, from_publication_date
+    )
+    df = pd.read_csv(out_fp)
+    assert df["openalex_id"].is_unique
+    if depth == 1:
+        assert set(df["openalex_id"]) == set(expected)
+    else:
+        assert dict(zip(df["openalex_id"], df["hop"])) == expected
+        assert set(expected.values()) == set(range(1, depth + 1))
+    if from_publication_date is not None:
+        assert (df["publication_date"] >= from_publication_date).all()
+
+
+def test_snowball_resume(openalex_server, tmpdir, monkeypatch, capsys):
+    # more records than fit in one batch of forward snowballing
+    numbers = range(1000, 2000, 8)
+    input_fp = Path(tmpdir, "input.csv")
+    pd.DataFrame(
+        {
+            "title": [f"Title of work {number}" for number in numbers],
+            "doi": [work_doi(number) for number in numbers],
+        }
+    ).to_csv(input_fp, index=False)
+    options = {
+        "forward": True,
+        "backward": True,
+        "use_all": True,
+        "depth": 2,
+        "max_frontier": 300,
+    }
+
+    expected_fp = Path(tmpdir, "expected.csv")
+    snowball(input_path=input_fp, output_path=expected_fp, **options)
+    n_works = len(pd.read_csv(expected_fp))
+
+    # interrupt the run halfway through writing the works
+    write = _WorkWriter.write
+
+    def interrupted_write(self, work):
+        if self.n_works == n_works // 2:
+            raise KeyboardInterrupt
+        write(self, work)
+
+    out_fp = Path(tmpdir, "output.csv")
+    journal_fp = Path(tmpdir, "output.csv.snowball_journal")
+    with monkeypatch.context() as m:
+        m.setattr(_WorkWriter, "write", interrupted_write)
+        with pytest.raises(KeyboardInterrupt):
+            snowball(input_path=input_fp, output_path=out_fp, resume=True, **options)
+    assert journal_fp.exists()
+
+    capsys.readouterr()
+    snowball(input_path=input_fp, output_path=out_fp, resume=True, **options)
+    out = capsys.readouterr().out
+    assert "Resuming from the journal" in out
+    assert "Found the results of" in out
+
+    assert out_fp.read_bytes() == expected_fp.read_bytes()
+    assert not journal_fp.exists()
+
+
+def test_snowball_edges(openalex_server, tmpdir):
+    seeds = [work_id(number) for number in [10, 500, 1999]]
+    input_fp = Path(tmpdir, "input.csv")
+    pd.DataFrame(
+        {"title": ["Seed 1", "Seed 2", "Seed 3"], "openalex_id": seeds}
+    ).to_csv(input_fp, index=False)
+    edges_fp = Path(tmpdir, "edges.csv")
+    snowball(
+        input_path=input_fp,
+        output_path=Path(tmpdir, "output.csv"),
+        forward=True,
+        backward=True,
+        use_all=True,
+        edges_path=edges_fp,
+    )
+
+    expected = {
+        (seed, work["id"], "forward", 1)
+        for seed in seeds
+        for work in SERVER_WORKS
+        if seed in work["referenced_works"]
+    } | {
+        (seed, ref, "backward", 1)
+        for seed in seeds
+        for ref in openalex_server.works[seed]["referenced_works"]
+    }
+    edges = pd.read_csv(edges_fp)
+    assert list(edges.columns) == ["snowballed_id", "found_id", "direction", "hop"]
+    assert len(edges) == len(expected)
+    assert set(edges.itertuples(index=False, name=None)) == expected
+
+
+def test_snowball_doi_map(openalex_server, tmpdir, capsys):
+    numbers = [10, 500, 1999]
+    input_fp = Path(tmpdir, "input.csv")
+    pd.DataFrame(
+        {
+            "title": [f"Title of work {number}" for number in numbers],
+            "doi": [work_doi(number) for number in numbers],
+        }
+    ).to_csv(input_fp, index=False)
+    map_fp = Path(tmpdir, "doi_map.csv")
+    options = {"forward": False, "backward": True, "use_all": True}
+
+    snowball(
+        input_path=input_fp,
+        output_path=Path(tmpdir, "first.csv"),
+        doi_map_path=map_fp,
+        **options,
+    )
+    doi_map = pd.read_csv(map_fp)
+    assert dict(zip(doi_map["doi"], doi_map["openalex_id"])) == {
+        work_doi(number).removeprefix("https://doi.org/"): work_id(number)
+        for number in numbers
+    }
+    assert openalex_server.filters["doi"] > 0
+
+    # DOIs in the map are normalized
+    doi_map["doi"] = [
+        "HTTPS://DOI.ORG/" + doi.upper() if i % 2 else "https://doi.org/" + doi
+        for i, doi in enumerate(doi_map["doi"])
+    ]
+    doi_map.to_csv(map_fp, index=False)
+    openalex_server.filters.clear()
+    capsys.readouterr()
+    snowball(
+        input_path=input_fp,
+        output_path=Path(tmpdir, "second.csv"),
+        doi_map_path=map_fp,
+        **options,
+    )
+
+    assert openalex_server.filters["doi"] == 0
+    assert f"Found the OpenAlex identifiers of all DOIs in {map_fp}" in (
+        capsys.readouterr().out
+    )
+    assert (
+        Path(tmpdir, "second.csv").read_bytes()
+        == Path(tmpdir, "first.csv").read_bytes()
+    )